@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Any, Dict, List
 import os
 
 class Settings(BaseSettings):
@@ -59,6 +59,78 @@ class Settings(BaseSettings):
     MAX_FILE_SIZE: int = 10485760  # 10MB
     UPLOAD_DIR: str = "./uploads"
     
+    # Source Store (used when MongoDB is unavailable: local SQLite file)
+    SOURCE_STORE_PATH: str = "./data/sources.db"
+    SOURCE_CACHE_MAX_BYTES: int = 67108864  # 64MB of hot source content per worker
+    SOURCE_CACHE_TTL_SECONDS: int = 300
+    SOURCE_TTL_SECONDS: int = 604800  # 7 days
+    SOURCE_CLEANUP_INTERVAL_SECONDS: int = 3600
+    SOURCE_INGEST_CONCURRENCY: int = 4  # Sources fetched/extracted at once per request
+    
+    # Background ingestion
+    INGEST_WORKERS: int = 2
+    INGEST_QUEUE_SIZE: int = 100
+    INGEST_WEBHOOK_TIMEOUT_SECONDS: int = 10
+    INGEST_RETRY_AFTER_SECONDS: int = 30  # Retry-After sent when the queue is full
+    INGEST_WORKER_ID: str = ""  # Stable id for this worker (default host:pid); at startup its own "processing" sources are marked failed
+    INGEST_RECOVERY_GRACE_SECONDS: int = 3600  # Other workers' "processing" sources only once older than this (longer than any ingestion job)
+    
+    # Exam parsing (documents analyzed per worker, keyed by content hash)
+    EXAM_CACHE_MAX_ENTRIES: int = 128
+    EXAM_SHARD_QUESTIONS: int = 250  # Questions per shard for parallel parsing
+    EXAM_PARSE_PROCESSES: int = 4
+    EXAM_STREAM_MAX_PAGE_SIZE: int = 250  # Bigger pages would hold questions back until several shards finish
+    
+    # URL Fetcher
+    URL_FETCH_MAX_CONNECTIONS: int = 20
+    URL_FETCH_MAX_BYTES: int = 5242880  # 5MB per page
+    URL_CACHE_MAX_BYTES: int = 33554432  # 32MB of extracted page text
+    URL_CACHE_FRESH_SECONDS: int = 600  # Served without any request
+    URL_CACHE_MAX_AGE_SECONDS: int = 86400  # Kept for conditional revalidation
+    
+    # Resource scraper (one shared aiohttp session per process)
+    SCRAPER_MAX_CONNECTIONS: int = 64
+    SCRAPER_MAX_CONNECTIONS_PER_HOST: int = 8
+    SCRAPER_CONCURRENCY: int = 16  # Topic x site scrapes in flight per request
+    SCRAPER_DEADLINE_SECONDS: float = 12.0  # Overall budget for resource collection
+    # Per-site budgets as JSON, e.g. {"github": {"enabled": false}, "youtube": {"timeout": 6}}
+    SCRAPER_SITE_OVERRIDES: Dict[str, Dict[str, Any]] = {}
+    SCRAPER_FIXTURE_MODE: str = ""  # "record" saves fetched pages, "replay" serves them instead of the network
+    SCRAPER_FIXTURE_DIR: str = "./data/scraper_fixtures"
+    
+    # Persistent caches (MongoDB when connected, otherwise this SQLite file)
+    CACHE_STORE_PATH: str = "./data/cache.db"
+    CACHE_STORE_TOUCH_SECONDS: float = 60.0  # Memory hits refresh an entry's stored last_used at most this often
+    RESOURCE_CACHE_MAX_ENTRIES: int = 5000  # Topic x site entries
+    RESOURCE_CACHE_TTL_SECONDS: int = 21600  # 6 hours fresh
+    RESOURCE_CACHE_STALE_SECONDS: int = 604800  # Then served stale (and refreshed) for 7 days
+    RESOURCE_CACHE_EMPTY_TTL_SECONDS: int = 900  # Empty results (blocked/failed scrapes)
+    ROADMAP_CACHE_MAX_ENTRIES: int = 2000  # Topic x difficulty (plus per-user variants)
+    ROADMAP_CACHE_TTL_SECONDS: int = 604800  # 7 days
+    ROADMAP_TOPIC_SYNONYMS: Dict[str, str] = {}  # Extra topic spellings to fold, e.g. {"rust lang": "rust"}
+    
+    # Roadmap warm-up (pre-generates popular roadmaps off-peak; enable on one worker)
+    ROADMAP_WARMUP_ENABLED: bool = False
+    ROADMAP_WARMUP_TOPICS: List[str] = []  # Always warmed, e.g. ["python", "react", "machine learning"]
+    ROADMAP_WARMUP_MINE_REQUESTS: bool = True  # Also warm the most requested topics
+    ROADMAP_WARMUP_MAX_TOPICS: int = 300
+    ROADMAP_WARMUP_DIFFICULTIES: List[str] = ["beginner", "intermediate", "advanced"]
+    ROADMAP_WARMUP_START_HOUR: int = 1  # Off-peak window, server local time (may wrap midnight)
+    ROADMAP_WARMUP_END_HOUR: int = 6
+    ROADMAP_WARMUP_INTERVAL_SECONDS: float = 30.0  # Between roadmap generations
+    ROADMAP_WARMUP_CHECK_SECONDS: int = 600  # Between passes / window checks
+    ROADMAP_WARMUP_REFRESH_AGE_SECONDS: int = 432000  # Regenerate cached roadmaps older than 5 days
+    
+    # Vendored page scripts (d3/markmap); fill with `python -m app.services.static_assets`
+    STATIC_VENDOR_DIR: str = ""  # Defaults to app/static/vendor
+    STATIC_ASSETS_BASE_URL: str = ""  # Public URL of this server (behind a proxy); defaults to the request's
+    STATIC_ASSETS_USE_CDN: bool = False  # Reference the CDN even when the assets are vendored
+    
+    # Visual roadmaps (markdown parsed server-side into markmap trees)
+    MARKMAP_TREE_CACHE_MAX_ENTRIES: int = 2000
+    MARKMAP_LAZY_MIN_NODES: int = 400  # Larger trees ship only their top levels; deeper subtrees load on expand
+    MARKMAP_INLINE_LEVELS: int = 3  # Levels below the root included in the page for such trees
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
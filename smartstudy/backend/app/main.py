@@ -2,6 +2,7 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
 import os
 import logging
 from dotenv import load_dotenv
@@ -13,24 +14,57 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-from app.database import init_database, close_database
+from app.database import init_database, close_database, db
 from app.config import settings
+from app.services.source_store import source_store
+from app.services.ingestion_queue import ingestion_queue
+from app.services.url_fetcher import url_fetcher
+from app.services.exam_extractor import exam_extractor
+from app.services.scraper_service import scraper_service
+from app.services.resource_cache import resource_cache
+from app.services.cache_store import configure_cache_stores
+from app.services.roadmap_warmup import roadmap_warmup
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    database_connected = False
     try:
         await init_database()
+        database_connected = True
         logger.info("✅ Database connected successfully")
     except Exception as e:
         logger.warning(f"⚠️ Database connection failed: {e}")
         logger.info("🚀 Starting without database for testing...")
     
+    # Sources live in MongoDB when connected, otherwise in a local SQLite file
+    source_store.configure(db.database if database_connected else None)
+    source_store.start_cleanup()
+    # Queued ingestion jobs are lost on restart, so their sources would stay "processing" forever
+    try:
+        await source_store.fail_interrupted(
+            ingestion_queue.worker_id,
+            datetime.now() - timedelta(seconds=settings.INGEST_RECOVERY_GRACE_SECONDS)
+        )
+    except Exception as e:
+        logger.warning(f"⚠️ Could not recover interrupted sources: {e}")
+    configure_cache_stores(db.database if database_connected else None)
+    ingestion_queue.start()
+    await scraper_service.start()
+    roadmap_warmup.start(roadmap.build_roadmap_for_cache)
+    
     logger.info("🚀 FastAPI AceMind Backend Started!")
     logger.info(f"📊 Database: {settings.DATABASE_NAME}")
     logger.info(f"🤖 DeepSeek API: {'Configured' if settings.DEEPSEEK_API_KEY else 'Not Configured'}")
     yield
     # Shutdown
+    await roadmap_warmup.stop()
+    await ingestion_queue.stop()
+    await source_store.stop_cleanup()
+    await url_fetcher.close()
+    exam_extractor.shutdown()
+    await resource_cache.stop()
+    await scraper_service.close()
     try:
         await close_database()
     except:
@@ -63,7 +97,7 @@ os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
 app.mount("/uploads", StaticFiles(directory=settings.UPLOAD_DIR), name="uploads")
 
 # Import routers
-from app.routers import auth, users, notes, study_sessions, quiz, quiz_v2, test_quiz, roadmap
+from app.routers import auth, users, notes, study_sessions, quiz, quiz_v2, test_quiz, roadmap, assets
 
 # Include routers
 app.include_router(test_quiz.router, prefix="/test", tags=["Test Quiz Generation"])
@@ -74,6 +108,7 @@ app.include_router(study_sessions.router, prefix="/study-sessions", tags=["Study
 app.include_router(quiz_v2.router, prefix="/quiz/v2", tags=["Quiz V2 - Fast"])
 app.include_router(quiz.router, prefix="/quiz", tags=["Quiz"])
 app.include_router(roadmap.router, prefix="/roadmap", tags=["Roadmap"])
+app.include_router(assets.router, prefix="/static", tags=["Static Assets"])
 
 # Health check endpoints
 @app.get("/")
@@ -2,7 +2,7 @@
 Source Model - Represents a content source
 """
 from pydantic import BaseModel
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 from datetime import datetime
 from enum import Enum
 
@@ -21,8 +21,29 @@ class Source(BaseModel):
     created_at: datetime
     word_count: int
     status: str  # processing, ready, error
+    content_hash: Optional[str] = None
+    ref_count: int = 0  # Explicit owners (POST /sources); quiz requests reusing a source aren't counted
     
     class Config:
         json_encoders = {
             datetime: lambda v: v.isoformat()
         }
+
+class SourceSummary(BaseModel):
+    """Listing projection of a source (no content)"""
+    id: str
+    type: SourceType
+    title: str
+    word_count: int
+    status: str
+    created_at: datetime
+    
+    class Config:
+        json_encoders = {
+            datetime: lambda v: v.isoformat()
+        }
+
+class SourceStatus(SourceSummary):
+    """Ingestion status of a source"""
+    error: Optional[str] = None
+    progress: Optional[Dict[str, Any]] = None  # Live while processing (stage, chars)
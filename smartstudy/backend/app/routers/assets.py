@@ -0,0 +1,21 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse
+import logging
+from app.services.static_assets import IMMUTABLE_CACHE_CONTROL, static_assets
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.api_route("/vendor/{asset_path:path}", methods=["GET", "HEAD"])
+async def vendored_asset(asset_path: str, request: Request):
+    """Serve a vendored script, pre-compressed when the client accepts it"""
+    resolved = static_assets.resolve(asset_path, request.headers.get("accept-encoding"))
+    if resolved is None:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    
+    file, coding = resolved
+    headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    if coding:
+        headers["Content-Encoding"] = coding
+    return FileResponse(file, media_type="text/javascript; charset=utf-8", headers=headers)
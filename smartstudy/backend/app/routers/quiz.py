@@ -12,7 +12,8 @@ from app.models.quiz import (
 from app.models.user import User
 from app.dependencies import get_current_user, get_current_user_optional
 from app.services.deepseek_ai import deepseek_service
-from app.utils.pdf_parser import extract_text_from_pdf
+from app.utils.pdf_parser import extract_text_from_pdf, iter_pdf_text
+from app.utils.text_stream import TextCollector, iter_sections
 
 router = APIRouter()
 
@@ -251,7 +252,8 @@ async def generate_quiz_with_deepseek(request: GenerateQuizRequest):
 async def generate_quiz_from_pdf(
     file: UploadFile = File(...),
     topic: str = Form("PDF Content"),
-    difficulty: str = Form("medium")
+    difficulty: str = Form("medium"),
+    pipelined: bool = Form(True)
 ):
     """Generate quiz from PDF - compatible with enhanced frontend"""
     
@@ -261,21 +263,35 @@ async def generate_quiz_from_pdf(
     try:
         logger.info(f"Processing PDF file: {file.filename}")
         
-        # Extract text from PDF
-        content = await extract_text_from_pdf(file)
-        logger.info(f"Extracted {len(content)} characters from PDF")
+        if pipelined:
+            # Batches are queued as sections are extracted, overlapping extraction/OCR with the LLM
+            collector = TextCollector(iter_pdf_text(file))
+            try:
+                questions = await deepseek_service.generate_quiz_from_stream(
+                    iter_sections(collector, deepseek_service.SECTION_CHARS),
+                    topic,
+                    full_text=lambda: collector.text
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            content = collector.text
+            logger.info(f"Extracted {len(content)} characters from PDF")
+        else:
+            # Extract text from PDF
+            content = await extract_text_from_pdf(file)
+            logger.info(f"Extracted {len(content)} characters from PDF")
         
-        if len(content.strip()) < 50:
-            raise HTTPException(status_code=400, detail="PDF content too short for quiz generation")
+            if len(content.strip()) < 50:
+                raise HTTPException(status_code=400, detail="PDF content too short for quiz generation")
         
-        # Calculate number of questions based on content length
-        word_count = len(content.split())
-        num_questions = max(5, min(200, word_count // 200))  # 1 question per 200 words
+            # Calculate number of questions based on content length
+            word_count = len(content.split())
+            num_questions = max(5, min(200, word_count // 200))  # 1 question per 200 words
         
-        logger.info(f"Generating {num_questions} questions from {word_count} words")
+            logger.info(f"Generating {num_questions} questions from {word_count} words")
         
-        # Generate questions using AI service (same as text input)
-        questions = await deepseek_service.generate_quiz_from_text(content, topic, num_questions)
+            # Generate questions using AI service (same as text input)
+            questions = await deepseek_service.generate_quiz_from_text(content, topic, num_questions)
         
         if not questions:
             raise HTTPException(status_code=500, detail="Failed to generate quiz questions")
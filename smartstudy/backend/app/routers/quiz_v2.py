@@ -1,20 +1,31 @@
 """
 Quiz Router V2 - Optimized for speed and multi-source support
 """
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query
+from fastapi.responses import StreamingResponse
 from typing import Optional, List
 from pydantic import BaseModel
+import asyncio
+import json
 import logging
 
+from app.config import settings
 from app.services.fast_ai_service import fast_ai_service
 from app.services.exam_extractor import exam_extractor
+from app.services.ingestion_queue import validate_callback_url
 from app.services.source_manager import source_manager
 from app.models.quiz import QuizQuestion
+from app.models.source import SourceStatus, SourceSummary, SourceType
+from app.utils.pdf_parser import iter_pdf_text
+from app.utils.text_stream import TextCollector, iter_sections, iter_chain
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Text inspected for an exam key before pipelined generation starts
+EXAM_PROBE_CHARS = 12000
+
 class QuizGenerateRequest(BaseModel):
     content: str
     topic: Optional[str] = None
@@ -25,6 +36,10 @@ class QuizResponse(BaseModel):
     questions: List[QuizQuestion]
     metadata: dict
 
+class SourceListResponse(BaseModel):
+    sources: List[SourceSummary]
+    next_cursor: Optional[str] = None
+
 @router.post("/generate-fast", response_model=QuizResponse)
 async def generate_quiz_fast(request: QuizGenerateRequest):
     """
@@ -36,9 +51,10 @@ async def generate_quiz_fast(request: QuizGenerateRequest):
         logger.info(f"🚀 Fast quiz generation: {request.num_questions} questions")
         
         # Check if content is an exam key
-        if exam_extractor.is_exam_key(request.content):
+        analysis = await exam_extractor.analyze_async(request.content)
+        if analysis.is_exam:
             logger.info("📋 Detected exam key, extracting questions...")
-            questions = exam_extractor.extract_exam_questions(request.content)
+            questions = analysis.questions
             
             return QuizResponse(
                 success=True,
@@ -77,16 +93,21 @@ async def generate_quiz_fast(request: QuizGenerateRequest):
 async def generate_quiz_from_pdf_fast(
     file: UploadFile = File(...),
     topic: Optional[str] = Form(None),
-    num_questions: int = Form(10)
+    num_questions: int = Form(10),
+    pipelined: bool = Form(True)
 ):
     """
     Generate quiz from PDF quickly
     Supports both regular PDFs and exam keys
+    With pipelined=True, batches start while later pages are still being extracted
     """
     
     try:
         logger.info(f"📄 Processing PDF: {file.filename}")
         
+        if pipelined:
+            return await _generate_from_pdf_pipelined(file, topic, num_questions)
+        
         # Add PDF as source
         source = await source_manager.add_pdf_source(file, title=file.filename)
         
@@ -97,9 +118,10 @@ async def generate_quiz_from_pdf_fast(
             )
         
         # Check if it's an exam key
-        if exam_extractor.is_exam_key(source.content):
+        analysis = await exam_extractor.analyze_async(source.content)
+        if analysis.is_exam:
             logger.info("📋 Detected exam key in PDF")
-            questions = exam_extractor.extract_exam_questions(source.content)
+            questions = analysis.questions
             
             return QuizResponse(
                 success=True,
@@ -134,6 +156,73 @@ async def generate_quiz_from_pdf_fast(
         logger.error(f"❌ PDF quiz generation error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _generate_from_pdf_pipelined(
+    file: UploadFile,
+    topic: Optional[str],
+    num_questions: int
+) -> QuizResponse:
+    """Overlap PDF extraction/OCR with generation, one batch per extracted section"""
+    
+    # Same PDF uploaded before: reuse its extracted text instead of re-reading the file
+    source_id, existing = await source_manager.lookup_pdf_source(file, title=file.filename)
+    if existing:
+        chunks = iter_chain([existing.content])
+    else:
+        chunks = iter_pdf_text(file)
+    
+    collector = TextCollector(chunks)
+    sections = iter_sections(collector, fast_ai_service.SECTION_CHARS)
+    
+    # Look at the first pages for an exam key before spending any LLM calls
+    probe = []
+    probe_chars = 0
+    async for section in sections:
+        probe.append(section)
+        probe_chars += len(section)
+        if probe_chars >= EXAM_PROBE_CHARS:
+            break
+    
+    if probe_chars < 10:
+        raise HTTPException(
+            status_code=400,
+            detail="PDF processing failed: No meaningful text could be extracted from the PDF"
+        )
+    
+    if exam_extractor.is_exam_key("\n\n".join(probe)):
+        logger.info("📋 Detected exam key in PDF")
+        async for _ in sections:
+            pass
+        source = existing or await source_manager.add_extracted_pdf_source(source_id, file.filename, collector.text)
+        questions = (await exam_extractor.analyze_async(source.content)).questions
+        
+        return QuizResponse(
+            success=True,
+            questions=questions[:num_questions],
+            metadata={
+                "method": "exam_extraction",
+                "source_id": source.id,
+                "total_extracted": len(questions)
+            }
+        )
+    
+    questions = await fast_ai_service.generate_quiz_pipelined(
+        iter_chain(probe, sections),
+        topic=topic,
+        num_questions=num_questions
+    )
+    source = existing or await source_manager.add_extracted_pdf_source(source_id, file.filename, collector.text)
+    
+    return QuizResponse(
+        success=True,
+        questions=questions,
+        metadata={
+            "method": "ai_generation",
+            "source_id": source.id,
+            "word_count": source.word_count,
+            "pipelined": True
+        }
+    )
+
 @router.post("/generate-from-url-fast")
 async def generate_quiz_from_url_fast(
     url: str = Form(...),
@@ -180,16 +269,223 @@ async def generate_quiz_from_url_fast(
         logger.error(f"❌ URL quiz generation error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/sources")
-async def list_sources():
-    """List all sources"""
-    sources = source_manager.get_all_sources()
-    return {"sources": sources}
+@router.post("/generate-from-sources", response_model=QuizResponse)
+async def generate_quiz_from_sources(
+    urls: Optional[List[str]] = Form(None),
+    texts: Optional[List[str]] = Form(None),
+    files: Optional[List[UploadFile]] = File(None),
+    source_ids: Optional[List[str]] = Form(None),
+    topic: Optional[str] = Form(None),
+    num_questions: int = Form(10)
+):
+    """
+    Generate one quiz from a mix of URLs, texts, PDFs and existing sources
+    New sources are ingested concurrently; questions are split by source size
+    """
+    
+    if not (urls or texts or files or source_ids):
+        raise HTTPException(status_code=400, detail="Provide at least one url, text, file or source_id")
+    
+    try:
+        logger.info(
+            f"📚 Multi-source quiz: {len(urls or [])} URLs, {len(texts or [])} texts, "
+            f"{len(files or [])} files, {len(source_ids or [])} existing"
+        )
+        
+        sources = await source_manager.add_sources(urls=urls, texts=texts, files=files)
+        for source_id in source_ids or []:
+            source = await source_manager.get_source(source_id)
+            if source is None:
+                raise HTTPException(status_code=404, detail=f"Source not found: {source_id}")
+            sources.append(source)
+        
+        # Same content given twice counts once
+        ready = list({s.id: s for s in sources if s.status == "ready"}.values())
+        failed = [
+            {"title": s.title, "error": s.metadata.get("error", "Unknown error")}
+            for s in sources if s.status == "error"
+        ]
+        if not ready:
+            raise HTTPException(status_code=400, detail=f"No source could be ingested: {failed}")
+        
+        allocation = source_manager.allocate_questions(ready, num_questions)
+        
+        # Exam keys contribute their own questions; everything else goes to the AI
+        questions = []
+        ai_sources = []
+        for source in ready:
+            analysis = await exam_extractor.analyze_async(source.content)
+            if analysis.is_exam:
+                logger.info(f"📋 Detected exam key in source {source.id}")
+                questions.extend(analysis.questions[:allocation[source.id]])
+            else:
+                ai_sources.append((source.content, allocation[source.id]))
+        
+        if ai_sources:
+            questions.extend(await fast_ai_service.generate_quiz_from_sources(ai_sources, topic=topic))
+        
+        return QuizResponse(
+            success=True,
+            questions=questions,
+            metadata={
+                "method": "multi_source",
+                "source_ids": [s.id for s in ready],
+                "allocation": allocation,
+                "failed": failed,
+                "word_count": sum(s.word_count for s in ready)
+            }
+        )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Multi-source quiz generation error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/extract-exam-stream")
+async def extract_exam_stream(
+    file: Optional[UploadFile] = File(None),
+    text: Optional[str] = Form(None),
+    source_id: Optional[str] = Form(None),
+    page_size: int = Form(50, ge=1, le=settings.EXAM_STREAM_MAX_PAGE_SIZE)
+):
+    """
+    Extract every question from a (large) exam key as NDJSON
+    One line per page of questions, then a final {"done": true, ...} line
+    """
+    
+    if sum(x is not None for x in (file, text, source_id)) != 1:
+        raise HTTPException(status_code=400, detail="Provide exactly one of file, text or source_id")
+    
+    source = None
+    if file is not None:
+        source = await source_manager.add_pdf_source(file, title=file.filename)
+        if source.status == "error":
+            raise HTTPException(
+                status_code=400,
+                detail=f"PDF processing failed: {source.metadata.get('error', 'Unknown error')}"
+            )
+    elif source_id is not None:
+        source = await source_manager.get_source(source_id)
+        if source is None or source.status != "ready":
+            raise HTTPException(status_code=404, detail="Source not found or not ready")
+    
+    content = source.content if source else text
+    
+    async def stream():
+        total = 0
+        async for page_num, questions in _enumerate(exam_extractor.iter_exam_questions(content, page_size)):
+            total += len(questions)
+            yield json.dumps({"page": page_num, "questions": [q.model_dump() for q in questions]}) + "\n"
+        yield json.dumps({"done": True, "total": total, "source_id": source.id if source else None}) + "\n"
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+async def _enumerate(items):
+    index = 0
+    async for item in items:
+        yield index, item
+        index += 1
+
+@router.get("/sources", response_model=SourceListResponse)
+async def list_sources(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    type: Optional[SourceType] = None,
+    status: Optional[str] = None
+):
+    """
+    List sources (summaries only, newest first)
+    Pass next_cursor back as cursor to get the following page
+    """
+    try:
+        sources, next_cursor = await source_manager.list_source_summaries(
+            limit=limit,
+            cursor=cursor,
+            source_type=type,
+            status=status
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return SourceListResponse(sources=sources, next_cursor=next_cursor)
+
+@router.post("/sources", response_model=SourceStatus, status_code=202)
+async def add_source(
+    url: Optional[str] = Form(None),
+    text: Optional[str] = Form(None),
+    file: Optional[UploadFile] = File(None),
+    title: Optional[str] = Form(None),
+    callback_url: Optional[str] = Form(None)
+):
+    """
+    Add a source and return immediately
+    URLs and PDFs are ingested in the background: poll GET /sources/{id},
+    follow GET /sources/{id}/events, or pass callback_url for a webhook
+    """
+    
+    if sum(x is not None for x in (url, text, file)) != 1:
+        raise HTTPException(status_code=400, detail="Provide exactly one of url, text or file")
+    if callback_url:
+        try:
+            await validate_callback_url(callback_url)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        if url is not None:
+            source = await source_manager.add_url_source(url, title, background=True, callback_url=callback_url, owner=True)
+        elif file is not None:
+            source = await source_manager.add_pdf_source(file, title, background=True, callback_url=callback_url, owner=True)
+        else:
+            source = await source_manager.add_text_source(text, title, owner=True)
+    except asyncio.QueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many sources are being ingested; try again later",
+            headers={"Retry-After": str(settings.INGEST_RETRY_AFTER_SECONDS)}
+        )
+    
+    return await source_manager.get_source_status(source.id)
+
+@router.get("/sources/{source_id}", response_model=SourceStatus)
+async def get_source_status(source_id: str):
+    """Status of a source (processing, ready, error) with progress while processing"""
+    status = await source_manager.get_source_status(source_id)
+    if not status:
+        raise HTTPException(status_code=404, detail="Source not found")
+    return status
+
+@router.get("/sources/{source_id}/events")
+async def source_events(source_id: str):
+    """Server-sent events: current status, progress updates, then a final "done" event"""
+    if not await source_manager.get_source_summary(source_id):
+        raise HTTPException(status_code=404, detail="Source not found")
+    
+    async def stream():
+        async for event in source_manager.watch_source(source_id):
+            yield f"event: {event['event']}\ndata: {json.dumps(event, default=str)}\n\n"
+    
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+@router.get("/sources/{source_id}/content")
+async def get_source_content(source_id: str):
+    """Stream the full text of one source"""
+    source = await source_manager.get_source_summary(source_id)
+    if not source:
+        raise HTTPException(status_code=404, detail="Source not found")
+    return StreamingResponse(
+        source_manager.iter_source_content(source_id),
+        media_type="text/plain; charset=utf-8"
+    )
 
 @router.delete("/sources/{source_id}")
 async def remove_source(source_id: str):
-    """Remove a source"""
-    success = source_manager.remove_source(source_id)
-    if not success:
+    """
+    Remove a source
+    Each POST /sources of the same content is one reference; the source is only
+    deleted once all are removed ("deleted": false while others still hold it)
+    """
+    remaining = await source_manager.remove_source(source_id)
+    if remaining is None:
         raise HTTPException(status_code=404, detail="Source not found")
-    return {"success": True}
+    return {"success": True, "deleted": remaining == 0, "references": remaining}
@@ -1,10 +1,21 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import json
 import logging
-from app.services.llm_service import LLMService
-from app.services.scraper_service import ScraperService
+from app.config import settings
+from app.services.llm_service import LLMService, MARKMAP_TEMPLATE
+from app.services.markmap_trees import markmap_trees
+from app.services.scraper_service import scraper_service
+from app.services.resource_cache import resource_cache
+from app.services.roadmap_cache import roadmap_cache
+from app.services.roadmap_warmup import roadmap_warmup
+from app.services.static_assets import IMMUTABLE_CACHE_CONTROL, static_assets
+from app.utils.markmap_tree import find_node, prune_tree
+from app.utils.roadmap_markdown import MarkdownSectionStream, split_markdown_sections
 
 logger = logging.getLogger(__name__)
 
@@ -12,7 +23,6 @@ router = APIRouter()
 
 # Initialize services
 llm_service = LLMService()
-scraper_service = ScraperService()
 
 # Request/Response Models
 class Resource(BaseModel):
@@ -26,6 +36,8 @@ class RoadmapRequest(BaseModel):
     topic: str
     difficulty_level: str
     roadmap_markdown: Optional[str] = ""
+    force_refresh: bool = False  # Skip the roadmap cache and regenerate
+    user_id: Optional[str] = None  # Personal cached variant (a forced refresh only replaces this user's copy)
 
 class VisualRoadmapRequest(BaseModel):
     topic: str
@@ -37,333 +49,52 @@ class RoadmapResponse(BaseModel):
     roadmap_markdown: str
     resources: List[Resource]
     estimated_duration: str
+    cached: bool = False
 
 
 def generate_visual_html(topic: str, roadmap_markdown: str, difficulty_level: str) -> str:
     """Generate valid HTML with mind map visualization using dark theme"""
+    return llm_service.convert_to_markmap(
+        roadmap_markdown,
+        title=f"{topic} - Interactive Learning Roadmap",
+        subtitle=f"Difficulty: {difficulty_level.capitalize()} | Click nodes to expand • Drag to navigate • Scroll to zoom"
+    )
     
-    # Properly escape markdown content for JavaScript
-    escaped_markdown = (roadmap_markdown
-                       .replace('\\', '\\\\')
-                       .replace('"', '\\"')
-                       .replace('\n', '\\n')
-                       .replace('\r', '\\r')
-                       .replace('\t', '\\t'))
+def _public_base_url(http_request: Request) -> str:
+    """
+    This server's public URL. Pages are served by GET /visual-roadmap/{tree_id}, but
+    the HTML from POST /generate-visual-roadmap can be shown from anywhere, so links are absolute.
+    """
+    return (settings.STATIC_ASSETS_BASE_URL or str(http_request.base_url)).rstrip("/")
     
-    # Generate complete HTML with inline JavaScript
-    html_content = f'''<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{topic} - Interactive Learning Roadmap</title>
-    <style>
-        * {{{{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}}}
-        
-        body {{{{
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            background: linear-gradient(135deg, #0d1117 0%, #161b22 50%, #21262d 100%);
-            min-height: 100vh;
-            color: #e6edf3;
-        }}}}
-        
-        .container {{{{
-            max-width: 1600px;
-            margin: 20px auto;
-            background: rgba(33, 38, 45, 0.8);
-            border-radius: 16px;
-            box-shadow: 0 20px 40px rgba(0, 0, 0, 0.4);
-            overflow: hidden;
-            backdrop-filter: blur(20px);
-            border: 1px solid rgba(240, 246, 252, 0.1);
-            height: calc(100vh - 40px);
-            display: flex;
-            flex-direction: column;
-        }}}}
-        
-        .header {{{{
-            background: linear-gradient(135deg, #1f2937 0%, #374151 100%);
-            color: #f9fafb;
-            padding: 24px 32px;
-            text-align: center;
-            position: relative;
-            border-bottom: 1px solid rgba(240, 246, 252, 0.1);
-            flex-shrink: 0;
-        }}}}
-        
-        .header h1 {{{{
-            margin: 0;
-            font-size: 2rem;
-            font-weight: 700;
-            background: linear-gradient(135deg, #3b82f6, #8b5cf6);
-            -webkit-background-clip: text;
-            -webkit-text-fill-color: transparent;
-            background-clip: text;
-        }}}}
-        
-        .header p {{{{
-            margin: 12px 0 0 0;
-            opacity: 0.8;
-            font-size: 0.9rem;
-            color: #d1d5db;
-        }}}}
-        
-        .mindmap-container {{{{
-            position: relative;
-            background: #0d1117;
-            flex: 1;
-            min-height: 0;
-        }}}}
-        
-        #mindmap {{{{
-            width: 100%;
-            height: 100%;
-        }}}}
-        
-        .controls {{{{
-            padding: 16px 24px;
-            background: rgba(21, 26, 33, 0.9);
-            border-top: 1px solid rgba(240, 246, 252, 0.1);
-            display: flex;
-            justify-content: center;
-            gap: 12px;
-            flex-wrap: wrap;
-            flex-shrink: 0;
-        }}}}
-        
-        .btn {{{{
-            background: rgba(30, 41, 59, 0.8);
-            color: #e2e8f0;
-            border: 1px solid rgba(240, 246, 252, 0.2);
-            padding: 12px 16px;
-            border-radius: 8px;
-            cursor: pointer;
-            font-size: 13px;
-            font-weight: 500;
-            transition: all 0.2s ease;
-        }}}}
-        
-        .btn:hover {{{{
-            background: rgba(51, 65, 85, 0.9);
-            border-color: rgba(240, 246, 252, 0.3);
-            transform: translateY(-1px);
-        }}}}
-        
-        .btn.success {{{{
-            background: #059669;
-            border-color: #059669;
-            color: white;
-        }}}}
-        
-        .btn.success:hover {{{{
-            background: #047857;
-        }}}}
-        
-        .loading {{{{
-            display: none;
-            position: absolute;
-            top: 50%;
-            left: 50%;
-            transform: translate(-50%, -50%);
-            background: rgba(21, 26, 33, 0.95);
-            padding: 24px;
-            border-radius: 12px;
-            z-index: 100;
-        }}}}
-        
-        .spinner {{{{
-            width: 32px;
-            height: 32px;
-            border: 3px solid rgba(59, 130, 246, 0.3);
-            border-top: 3px solid #3b82f6;
-            border-radius: 50%;
-            animation: spin 1s linear infinite;
-            margin: 0 auto 12px;
-        }}}}
-        
-        @keyframes spin {{{{
-            0% {{{{ transform: rotate(0deg); }}}}
-            100% {{{{ transform: rotate(360deg); }}}}
-        }}}}
-        
-        .toast {{{{
-            position: fixed;
-            top: 24px;
-            right: 24px;
-            background: #059669;
-            color: white;
-            padding: 12px 20px;
-            border-radius: 8px;
-            transform: translateX(400px);
-            transition: transform 0.3s ease;
-            z-index: 1000;
-            font-size: 14px;
-        }}}}
-        
-        .toast.show {{{{
-            transform: translateX(0);
-        }}}}
-        
-        .toast.error {{{{
-            background: #dc2626;
-        }}}}
-        
-        @media print {{{{
-            body {{{{ background: white; }}}}
-            .container {{{{ max-width: 100%; margin: 0; box-shadow: none; border: none; height: auto; }}}}
-            .controls {{{{ display: none !important; }}}}
-            .header {{{{ background: white; color: black; border-bottom: 2px solid #e5e7eb; }}}}
-            .header h1 {{{{ background: none; -webkit-text-fill-color: #1f2937; color: #1f2937; }}}}
-            .header p {{{{ color: #6b7280; }}}}
-            .mindmap-container {{{{ background: white; }}}}
-            .toast, .loading {{{{ display: none !important; }}}}
-        }}}}
-    </style>
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/d3/7.8.5/d3.min.js"></script>
-    <script src="https://cdn.jsdelivr.net/npm/markmap-lib@0.15.3/dist/browser/index.js"></script>
-    <script src="https://cdn.jsdelivr.net/npm/markmap-view@0.15.3/dist/browser/index.js"></script>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>🎯 {topic}</h1>
-            <p>Difficulty: {difficulty_level.capitalize()} | Click nodes to expand • Drag to navigate • Scroll to zoom</p>
-        </div>
-        <div class="mindmap-container">
-            <svg id="mindmap"></svg>
-            <div class="loading" id="loading">
-                <div class="spinner"></div>
-                <div>Loading...</div>
-            </div>
-        </div>
-        <div class="controls">
-            <button class="btn" onclick="fitScreen()">🔍 Fit Screen</button>
-            <button class="btn" onclick="expandAll()">📖 Expand All</button>
-            <button class="btn" onclick="collapseAll()">📚 Collapse All</button>
-            <button class="btn success" onclick="downloadHTML()">⬇️ Download HTML</button>
-        </div>
-    </div>
-
-    <script>
-        var mm;
-        var markdown = "{escaped_markdown}";
-        
-        function init() {{{{
-            document.getElementById('loading').style.display = 'block';
-            
-            setTimeout(function() {{{{
-                try {{{{
-                    var transformer = new window.markmap.Transformer();
-                    var data = transformer.transform(markdown).root;
-                    
-                    mm = window.markmap.Markmap.create('#mindmap', {{{{
-                        color: function(node) {{{{
-                            var colors = ['#3b82f6', '#10b981', '#f59e0b', '#ef4444', '#8b5cf6', '#06b6d4'];
-                            return colors[node.depth % 6];
-                        }}}},
-                        duration: 300,
-                        maxWidth: 280,
-                        initialExpandLevel: 2
-                    }}}}, data);
-                    
-                    mm.fit();
-                    document.getElementById('loading').style.display = 'none';
-                    showToast('Roadmap loaded successfully!');
-                }}}} catch(e) {{{{
-                    console.error(e);
-                    document.getElementById('loading').style.display = 'none';
-                    showToast('Error loading roadmap: ' + e.message, true);
-                }}}}
-            }}}}, 100);
-        }}}}
-        
-        function fitScreen() {{{{
-            if (mm) mm.fit();
-            showToast('Fitted to screen');
-        }}}}
-        
-        function expandAll() {{{{
-            if (!mm) return;
-            showToast('Expanding all nodes...');
-            var transformer = new window.markmap.Transformer();
-            var data = transformer.transform(markdown).root;
-            function forceExpandEverything(node) {{{{
-                if (node.payload) delete node.payload.fold;
-                node.payload = node.payload || {{}};
-                node.payload.fold = 0;
-                if (node.children) {{{{
-                    for (var i = 0; i < node.children.length; i++) {{{{
-                        forceExpandEverything(node.children[i]);
-                    }}}}
-                }}}}
-            }}}}
-            forceExpandEverything(data);
-            mm.setData(data);
-            setTimeout(function() {{{{ mm.fit(); showToast('All nodes expanded!'); }}}}, 300);
-        }}}}
-        
-        function collapseAll() {{{{
-            if (!mm) return;
-            var transformer = new window.markmap.Transformer();
-            var data = transformer.transform(markdown).root;
-            function foldAllNodes(node, isRoot) {{{{
-                if (!isRoot) {{{{
-                    node.payload = node.payload || {{}};
-                    node.payload.fold = 1;
-                }}}}
-                if (node.children && node.children.length > 0) {{{{
-                    for (var i = 0; i < node.children.length; i++) {{{{
-                        foldAllNodes(node.children[i], false);
-                    }}}}
-                }}}}
-            }}}}
-            foldAllNodes(data, true);
-            mm.setData(data);
-            setTimeout(function() {{{{ mm.fit(); showToast('All nodes collapsed!'); }}}}, 100);
-        }}}}
-        
-        function downloadHTML() {{{{
-            try {{{{
-                showToast('Creating HTML file...');
-                var htmlContent = document.documentElement.outerHTML;
-                var blob = new Blob([htmlContent], {{{{type: 'text/html;charset=utf-8'}}}});
-                var url = URL.createObjectURL(blob);
-                var a = document.createElement('a');
-                a.href = url;
-                a.download = 'learning-roadmap-' + new Date().toISOString().split('T')[0] + '.html';
-                document.body.appendChild(a);
-                a.click();
-                document.body.removeChild(a);
-                setTimeout(function() {{{{ URL.revokeObjectURL(url); }}}}, 100);
-                showToast('HTML file downloaded successfully!');
-            }}}} catch(e) {{{{
-                console.error('Download error:', e);
-                showToast('Download failed: ' + e.message, true);
-            }}}}
-        }}}}
-        
-        function showToast(msg, error) {{{{
-            var toast = document.createElement('div');
-            toast.className = 'toast' + (error ? ' error' : '');
-            toast.textContent = msg;
-            document.body.appendChild(toast);
-            setTimeout(function() {{{{ toast.classList.add('show'); }}}}, 100);
-            setTimeout(function() {{{{
-                toast.classList.remove('show');
-                setTimeout(function() {{{{ toast.remove(); }}}}, 300);
-            }}}}, 2000);
-        }}}}
-        
-        init();
-    </script>
-</body>
-</html>'''
-    
-    return html_content
+def _visual_etag(tree_id: str, page_options: Dict[str, Any]) -> str:
+    """Strong ETag for a visual roadmap page: the tree (a markdown hash) plus the page template version and options"""
+    page = f"{MARKMAP_TEMPLATE.fingerprint}:{json.dumps(page_options, sort_keys=True)}:{tree_id}"
+    digest = hashlib.sha256(page.encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+        
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+        
+def _visual_page_options(http_request: Request, tree_id: str) -> Dict[str, Any]:
+    """Everything besides the tree that goes into a visual roadmap page"""
+    base_url = _public_base_url(http_request)
+    return {
+        "scripts": static_assets.script_srcs(base_url),
+        "subtree_url": base_url + http_request.app.url_path_for("markmap_subtree", tree_id=tree_id),
+        "lazy": [settings.MARKMAP_LAZY_MIN_NODES, settings.MARKMAP_INLINE_LEVELS]
+    }
+        
+def _render_visual_page(tree: Dict[str, Any], page_options: Dict[str, Any]) -> str:
+    return llm_service.convert_to_markmap(
+        "",
+        script_srcs=page_options["scripts"],
+        tree=tree,
+        subtree_url=page_options["subtree_url"]
+    )
 
 
 @router.post("/generate", response_model=RoadmapResponse)
@@ -374,65 +105,224 @@ async def generate_roadmap(request: RoadmapRequest):
         if not request.topic or not request.topic.strip():
             raise HTTPException(status_code=400, detail="Topic is required")
         
+        # Popular topics are served from the roadmap cache
+        if not request.force_refresh:
+            cached = await roadmap_cache.get(request.topic, request.difficulty_level, request.user_id)
+            if cached is not None:
+                logger.info(f"Roadmap cache hit for topic: {request.topic}, difficulty: {request.difficulty_level}")
+                return RoadmapResponse(**{**cached, "topic": request.topic, "cached": True})
+        
         logger.info(f"Generating roadmap for topic: {request.topic}, difficulty: {request.difficulty_level}")
+        response, from_llm = await _build_roadmap(request.topic, request.difficulty_level)
+        
+        # Fallback roadmaps (LLM unavailable) are not worth keeping
+        if from_llm:
+            user_id = request.user_id if request.force_refresh else None
+            await roadmap_cache.set(request.topic, request.difficulty_level, response.model_dump(exclude={"cached"}), user_id)
+        
+        logger.info(f"Successfully generated roadmap for: {request.topic}")
+        return response
         
-        # Generate roadmap using LLM service (Ollama/Gemini)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error generating roadmap: {e}")
+        import traceback
+        logger.error(f"Traceback: {traceback.format_exc()}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to generate roadmap: {str(e)}"
+        )
+
+@router.post("/generate-stream")
+async def generate_roadmap_stream(request: RoadmapRequest, http_request: Request):
+    """
+    Stream a roadmap while it is written: "token" events with markdown as the
+    model produces it, a "section" event as each section closes, "resources"
+    batches as each scrape finishes, and a final "done" event carrying the
+    full /generate response. NDJSON, or server-sent events when the client
+    accepts text/event-stream.
+    """
+    if not request.topic or not request.topic.strip():
+        raise HTTPException(status_code=400, detail="Topic is required")
+    
+    sse = "text/event-stream" in http_request.headers.get("accept", "")
+    
+    async def stream():
+        async for event in _roadmap_events(request):
+            if sse:
+                yield f"event: {event['event']}\ndata: {json.dumps(event, default=str)}\n\n"
+            else:
+                yield json.dumps(event, default=str) + "\n"
+    
+    return StreamingResponse(stream(), media_type="text/event-stream" if sse else "application/x-ndjson")
+
+async def _roadmap_events(request: RoadmapRequest) -> AsyncIterator[Dict[str, Any]]:
+    """Events for /generate-stream (see there); cached roadmaps are replayed at once"""
+    topic, difficulty_level = request.topic, request.difficulty_level
+    
+    if not request.force_refresh:
+        cached = await roadmap_cache.get(topic, difficulty_level, request.user_id)
+        if cached is not None:
+            for section in split_markdown_sections(cached["roadmap_markdown"]):
+                yield {"event": "section", **section}
+            yield {"event": "resources", "topic": topic, "resources": cached["resources"]}
+            yield {"event": "done", **cached, "topic": topic, "cached": True}
+            return
+    
+    events: asyncio.Queue = asyncio.Queue()
+    finished = object()  # Each producer puts this last
+    producers: List[asyncio.Task] = []
+    by_topic: Dict[str, List[Tuple[float, Dict]]] = {topic: []}
+    sent_urls = set()
+    
+    async def scrape(topics: List[str]):
         try:
-            roadmap_markdown = llm_service.generate_roadmap(request.topic, request.difficulty_level)
+            async for scraped_topic, adapter, resources in scraper_service.iter_resources_for_topics(topics, limit_per_topic=8):
+                by_topic[scraped_topic].extend((adapter.weight, resource) for resource in resources)
+                batch = [resource for resource in resources if resource.get("url") not in sent_urls]
+                sent_urls.update(resource.get("url") for resource in batch)
+                if batch:
+                    await events.put({"event": "resources", "topic": scraped_topic, "site": adapter.name, "resources": batch})
+        except Exception as e:
+            logger.error(f"Resource collection failed for {topics}: {e}")
+        finally:
+            await events.put(finished)
+    
+    def start(producer) -> None:
+        # Producers only start others before finishing, so the count never reaches zero early
+        producers.append(asyncio.create_task(producer))
+    
+    async def write(result: Dict[str, Any]):
+        sections = MarkdownSectionStream()
+        parts: List[str] = []
+        
+        def closed(new_sections: List[Dict]) -> List[Dict[str, Any]]:
+            # Subtopics are scraped as soon as the section naming them closes
+            subtopics = []
+            for section in new_sections:
+                for subtopic in scraper_service._extract_topics_from_roadmap(section["markdown"]):
+                    if subtopic not in by_topic and len(by_topic) <= 5:
+                        by_topic[subtopic] = []
+                        subtopics.append(subtopic)
+            if subtopics:
+                start(scrape(subtopics))
+            return [{"event": "section", **section} for section in new_sections]
+        
+        try:
+            async for chunk in llm_service.astream_roadmap(topic, difficulty_level):
+                parts.append(chunk)
+                await events.put({"event": "token", "text": chunk})
+                for event in closed(sections.feed(chunk)):
+                    await events.put(event)
+            for event in closed(sections.close()):
+                await events.put(event)
+            result["markdown"] = "".join(parts)
+        except Exception as e:
+            logger.error(f"Roadmap streaming failed: {e}")
+            await events.put({"event": "error", "detail": str(e)})
+            result["markdown"] = "".join(parts) or _get_fallback_roadmap(topic, difficulty_level)
+            result["failed"] = True
+        finally:
+            await events.put(finished)
+    
+    result: Dict[str, Any] = {}
+    start(scrape([topic]))
+    start(write(result))
+    try:
+        finished_count = 0
+        while finished_count < len(producers):
+            event = await events.get()
+            if event is finished:
+                finished_count += 1
+            else:
+                yield event
+    finally:
+        for task in producers:
+            task.cancel()
+    
+    roadmap_markdown = result["markdown"]
+    resources = _to_resources(scraper_service.rank_topic_resources(by_topic, 8))
+    response = RoadmapResponse(
+        topic=topic,
+        roadmap_markdown=roadmap_markdown,
+        resources=resources,
+        estimated_duration=_estimate_duration(roadmap_markdown, difficulty_level)
+    )
+    
+    if not result.get("failed") and not llm_service.is_fallback_roadmap(topic, roadmap_markdown):
+        user_id = request.user_id if request.force_refresh else None
+        await roadmap_cache.set(topic, difficulty_level, response.model_dump(exclude={"cached"}), user_id)
+    
+    yield {"event": "done", **response.model_dump()}
+
+async def _build_roadmap(topic: str, difficulty_level: str) -> Tuple[RoadmapResponse, bool]:
+    """
+    Generate the roadmap and its resources; also reports whether the LLM (not the fallback) wrote it.
+    The main topic's resources don't depend on the roadmap, so they are scraped while the LLM runs;
+    subtopics are scraped once the markdown is in.
+    """
+    main_scrape = asyncio.create_task(scraper_service.collect_resources_for_topics([topic], limit_per_topic=8))
+    try:
+        # Generate roadmap using LLM service (Ollama/Gemini); the client is blocking, so run it in a thread
+        try:
+            roadmap_markdown = await asyncio.to_thread(llm_service.generate_roadmap, topic, difficulty_level)
+            from_llm = not llm_service.is_fallback_roadmap(topic, roadmap_markdown)
             logger.info(f"LLM generated roadmap, length: {len(roadmap_markdown)} characters")
         except Exception as e:
             logger.error(f"LLM generation failed: {e}, using fallback")
-            roadmap_markdown = _get_fallback_roadmap(request.topic, request.difficulty_level)
+            roadmap_markdown = _get_fallback_roadmap(topic, difficulty_level)
+            from_llm = False
         
         # Extract topics from roadmap for resource collection
         try:
-            roadmap_topics = scraper_service._extract_topics_from_roadmap(roadmap_markdown)
-            search_topics = [request.topic] + roadmap_topics[:5]  # Main topic + top 5 subtopics
-            logger.info(f"Collecting resources for topics: {search_topics}")
+            roadmap_topics = [t for t in scraper_service._extract_topics_from_roadmap(roadmap_markdown) if t != topic]
+            subtopics = roadmap_topics[:5]  # Top 5 subtopics
+            logger.info(f"Collecting resources for subtopics: {subtopics}")
             
             # Collect real resources using web scraping
-            scraped_resources = await scraper_service.collect_resources_for_topics(search_topics, limit_per_topic=8)
+            subtopic_resources = await scraper_service.collect_resources_for_topics(subtopics, limit_per_topic=8)
+            main_resources = await main_scrape
             
-            # Convert to Resource model
-            resources = [
-                Resource(
-                    title=res.get("title", ""),
-                    url=res.get("url", ""),
-                    type=res.get("type", "Resource"),
-                    source=res.get("source", ""),
-                    description=res.get("description", "")
-                )
-                for res in scraped_resources
-            ]
+            scraped_resources = scraper_service._remove_duplicates(main_resources + subtopic_resources)[:50]
+            resources = _to_resources(scraped_resources)
             
             logger.info(f"Collected {len(resources)} resources from web scraping")
         except Exception as e:
             logger.error(f"Resource collection failed: {e}, using fallback resources")
-            resources = _get_fallback_resources(request.topic)
-        
-        # Estimate duration based on difficulty and content
-        estimated_duration = _estimate_duration(roadmap_markdown, request.difficulty_level)
-        
-        response = RoadmapResponse(
-            topic=request.topic,
-            roadmap_markdown=roadmap_markdown,
-            resources=resources,
-            estimated_duration=estimated_duration
-        )
-        
-        logger.info(f"Successfully generated roadmap for: {request.topic}")
-        return response
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error generating roadmap: {e}")
-        import traceback
-        logger.error(f"Traceback: {traceback.format_exc()}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to generate roadmap: {str(e)}"
+            resources = _get_fallback_resources(topic)
+    finally:
+        if not main_scrape.done():
+            main_scrape.cancel()
+    
+    # Estimate duration based on difficulty and content
+    estimated_duration = _estimate_duration(roadmap_markdown, difficulty_level)
+    
+    response = RoadmapResponse(
+        topic=topic,
+        roadmap_markdown=roadmap_markdown,
+        resources=resources,
+        estimated_duration=estimated_duration
+    )
+    return response, from_llm
+
+async def build_roadmap_for_cache(topic: str, difficulty_level: str) -> Optional[Dict[str, Any]]:
+    """A roadmap as /generate would cache it, or None for a fallback roadmap (used by the warm-up job)"""
+    response, from_llm = await _build_roadmap(topic, difficulty_level)
+    return response.model_dump(exclude={"cached"}) if from_llm else None
+
+def _to_resources(scraped_resources: List[dict]) -> List[Resource]:
+    """Convert scraped dicts to the Resource model"""
+    return [
+        Resource(
+            title=res.get("title", ""),
+            url=res.get("url", ""),
+            type=res.get("type", "Resource"),
+            source=res.get("source", ""),
+            description=res.get("description", "")
         )
+        for res in scraped_resources
+    ]
 
 def _get_fallback_roadmap(topic: str, difficulty_level: str) -> str:
     """Generate a basic fallback roadmap when LLM is unavailable"""
@@ -516,16 +406,52 @@ def _estimate_duration(roadmap_markdown: str, difficulty_level: str) -> str:
     
     return f"{base_weeks}-{base_weeks + 4} weeks"
 
+@router.post("/visual-roadmap")
+async def create_visual_roadmap(request: VisualRoadmapRequest, http_request: Request):
+    """
+    Register a roadmap for visualization and return its page URL.
+    The page is a plain GET keyed by the markdown's tree id, so browsers cache
+    it and revalidate repeat views with If-None-Match.
+    """
+    if not request.roadmap_markdown or not request.roadmap_markdown.strip():
+        raise HTTPException(status_code=400, detail="roadmap_markdown is required")
+    
+    try:
+        tree_id, _ = await markmap_trees.get_or_build(request.roadmap_markdown)
+    except Exception as e:
+        logger.error(f"Error parsing visual roadmap: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to generate visual roadmap: {str(e)}")
+    
+    url = _public_base_url(http_request) + http_request.app.url_path_for("visual_roadmap_page", tree_id=tree_id)
+    logger.info(f"Registered visual roadmap for topic: {request.topic}")
+    return {"tree_id": tree_id, "url": url}
+
+@router.get("/visual-roadmap/{tree_id}", response_class=HTMLResponse, name="visual_roadmap_page")
+async def visual_roadmap_page(tree_id: str, http_request: Request):
+    """Interactive HTML mind map for a registered roadmap (304 when the client's copy is current)"""
+    page_options = _visual_page_options(http_request, tree_id)
+    etag = _visual_etag(tree_id, page_options)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(http_request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    
+    tree = await markmap_trees.get(tree_id)
+    if tree is None:
+        raise HTTPException(status_code=404, detail="Roadmap tree not found")
+    
+    return HTMLResponse(content=_render_visual_page(tree, page_options), headers=headers)
+
 @router.post("/generate-visual-roadmap")
-async def generate_visual_roadmap(request: VisualRoadmapRequest):
-    """Generate interactive HTML mind map visualization"""
+async def generate_visual_roadmap(request: VisualRoadmapRequest, http_request: Request):
+    """Generate interactive HTML mind map visualization (use POST /visual-roadmap for a cacheable page URL)"""
     try:
         # Validate that we have markdown content
         if not request.roadmap_markdown or not request.roadmap_markdown.strip():
             raise HTTPException(status_code=400, detail="roadmap_markdown is required")
         
-        # Convert markdown to Markmap HTML using llm_service
-        html_content = llm_service.convert_to_markmap(request.roadmap_markdown)
+        # Convert markdown to Markmap HTML using llm_service (the tree is parsed once per document)
+        tree_id, tree = await markmap_trees.get_or_build(request.roadmap_markdown)
+        html_content = _render_visual_page(tree, _visual_page_options(http_request, tree_id))
         
         logger.info(f"Generated visual roadmap for topic: {request.topic}")
         
@@ -539,3 +465,43 @@ async def generate_visual_roadmap(request: VisualRoadmapRequest):
             status_code=500,
             detail=f"Failed to generate visual roadmap: {str(e)}"
         )
+
+@router.get("/cache/stats")
+async def roadmap_cache_stats():
+    """Hit rate and size of the roadmap cache (this worker)"""
+    return roadmap_cache.stats()
+
+@router.get("/markmap-tree/{tree_id}", name="markmap_subtree")
+async def markmap_subtree(
+    tree_id: str,
+    path: str = "",
+    levels: Optional[int] = Query(None, ge=1),
+    all_levels: bool = Query(False, alias="all")
+):
+    """A node of a parsed roadmap tree with `levels` levels below it (or all); deeper subtrees stay lazy"""
+    tree = await markmap_trees.get(tree_id)
+    if tree is None:
+        raise HTTPException(status_code=404, detail="Roadmap tree not found")
+    
+    node = find_node(tree, path)
+    if node is None:
+        raise HTTPException(status_code=404, detail="Tree node not found")
+    
+    subtree = prune_tree(node, None if all_levels else levels or settings.MARKMAP_INLINE_LEVELS, path)
+    # Tree ids are content hashes, so a subtree never changes
+    return JSONResponse(subtree, headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL})
+
+@router.get("/markmap-tree-cache/stats")
+async def markmap_tree_cache_stats():
+    """Hit rate and size of the parsed roadmap tree cache (this worker)"""
+    return markmap_trees.stats()
+
+@router.get("/warmup/status")
+async def roadmap_warmup_status():
+    """Whether the warm-up job is running (this worker) and what it has generated"""
+    return roadmap_warmup.status()
+
+@router.get("/resource-cache/stats")
+async def resource_cache_stats():
+    """Hit rate and size of the scraped-resource cache (this worker)"""
+    return resource_cache.stats()
@@ -2,13 +2,12 @@ from fastapi import APIRouter, HTTPException
 from fastapi.responses import HTMLResponse
 from pydantic import BaseModel
 from app.services.llm_service import LLMService
-from app.services.scraper_service import ScraperService
+from app.services.scraper_service import scraper_service
 import logging
 import re
 
 router = APIRouter()
 llm_service = LLMService()
-scraper_service = ScraperService()
 
 class RoadmapRequest(BaseModel):
     topic: str
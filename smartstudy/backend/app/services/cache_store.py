@@ -0,0 +1,223 @@
+"""
+Cache Store - Persistent, size-bounded key/value caches
+Entries live in a MongoDB collection (or a local SQLite table when MongoDB
+is unavailable), so they survive restarts and are shared by all workers.
+Recently used entries are also kept in memory.
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+class _SQLiteBackend:
+    """One table per cache in a local SQLite file"""
+    
+    def __init__(self, path: str, table: str):
+        self.path = path
+        self.table = table
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                f"""CREATE TABLE IF NOT EXISTS {table} (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    stored_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )"""
+            )
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_last_used ON {table}(last_used)")
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+    
+    def _run(self, fn, *args):
+        def call():
+            conn = self._connect()
+            try:
+                with conn:
+                    return fn(conn, *args)
+            finally:
+                conn.close()
+        return asyncio.to_thread(call)
+    
+    async def get(self, key: str, now: float) -> Optional[Dict]:
+        def op(conn, key, now):
+            row = conn.execute(f"SELECT value, stored_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute(f"UPDATE {self.table} SET last_used = ? WHERE key = ?", (now, key))
+            return {"value": json.loads(row["value"]), "stored_at": row["stored_at"]}
+        return await self._run(op, key, now)
+    
+    async def put(self, key: str, value: Any, now: float, max_entries: int) -> int:
+        def op(conn, key, value, now, max_entries):
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, stored_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, default=str), now, now)
+            )
+            # Evict least recently used entries past the bound
+            cursor = conn.execute(
+                f"""DELETE FROM {self.table} WHERE key IN (
+                    SELECT key FROM {self.table} ORDER BY last_used ASC
+                    LIMIT MAX(0, (SELECT COUNT(*) FROM {self.table}) - ?)
+                )""",
+                (max_entries,)
+            )
+            return cursor.rowcount
+        return await self._run(op, key, value, now, max_entries)
+    
+    async def touch(self, key: str, now: float) -> None:
+        def op(conn, key, now):
+            conn.execute(f"UPDATE {self.table} SET last_used = MAX(last_used, ?) WHERE key = ?", (now, key))
+        await self._run(op, key, now)
+    
+    async def delete(self, key: str) -> None:
+        def op(conn, key):
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+        await self._run(op, key)
+    
+    async def keys_by_use(self, limit: int) -> List[str]:
+        def op(conn, limit):
+            rows = conn.execute(f"SELECT key FROM {self.table} ORDER BY last_used DESC LIMIT ?", (limit,)).fetchall()
+            return [row["key"] for row in rows]
+        return await self._run(op, limit)
+
+class _MongoBackend:
+    """One collection per cache"""
+    
+    def __init__(self, database, collection: str):
+        self.entries = database[collection]
+        self._indexes_ready = False
+    
+    async def get(self, key: str, now: float) -> Optional[Dict]:
+        record = await self.entries.find_one_and_update(
+            {"_id": key},
+            {"$set": {"last_used": now}},
+            projection={"value": 1, "stored_at": 1}
+        )
+        if record is None:
+            return None
+        return {"value": record["value"], "stored_at": record["stored_at"]}
+    
+    async def put(self, key: str, value: Any, now: float, max_entries: int) -> int:
+        if not self._indexes_ready:
+            await self.entries.create_index("last_used")
+            self._indexes_ready = True
+        
+        await self.entries.replace_one(
+            {"_id": key},
+            {"_id": key, "value": value, "stored_at": now, "last_used": now},
+            upsert=True
+        )
+        
+        excess = await self.entries.estimated_document_count() - max_entries
+        if excess <= 0:
+            return 0
+        oldest = self.entries.find({}, {"_id": 1}).sort("last_used", 1).limit(excess)
+        keys = [record["_id"] async for record in oldest]
+        result = await self.entries.delete_many({"_id": {"$in": keys}})
+        return result.deleted_count
+    
+    async def touch(self, key: str, now: float) -> None:
+        await self.entries.update_one({"_id": key}, {"$max": {"last_used": now}})
+    
+    async def delete(self, key: str) -> None:
+        await self.entries.delete_one({"_id": key})
+    
+    async def keys_by_use(self, limit: int) -> List[str]:
+        cursor = self.entries.find({}, {"_id": 1}).sort("last_used", -1).limit(limit)
+        return [record["_id"] async for record in cursor]
+
+class CacheStore:
+    """
+    Persistent cache of JSON-serializable values, bounded to `max_entries`
+    (least recently used entries are evicted). Callers decide freshness from
+    each entry's stored_at.
+    
+    Hits served from memory still refresh the stored last_used (at most once
+    per CACHE_STORE_TOUCH_SECONDS per key), so eviction and recent_keys see
+    the hot entries as recently used.
+    """
+    
+    def __init__(self, name: str, max_entries: int, memory_entries: int = 256):
+        self.name = name
+        self.max_entries = max_entries
+        self._backend = None
+        self.memory = LRUCache(max_entries=memory_entries)
+        self._touched = LRUCache(max_entries=memory_entries)  # Key -> last time last_used was written
+        self.evictions = 0
+        _stores.append(self)
+    
+    def configure(self, database=None) -> None:
+        """Use MongoDB when a database is available, otherwise a local SQLite file"""
+        if database is not None:
+            self._backend = _MongoBackend(database, f"cache_{self.name}")
+        else:
+            self._backend = _SQLiteBackend(settings.CACHE_STORE_PATH, f"cache_{self.name}")
+        self.memory.clear()
+        self._touched.clear()
+    
+    @property
+    def backend(self):
+        if self._backend is None:
+            self.configure()
+        return self._backend
+    
+    async def get(self, key: str) -> Optional[Dict]:
+        """{"value", "stored_at"} for a key, or None"""
+        now = time.time()
+        entry = self.memory.get(key)
+        if entry is None:
+            entry = await self.backend.get(key, now)
+            if entry is not None:
+                self.memory.set(key, entry)
+                self._touched.set(key, now)
+        elif now - self._touched.get(key, 0.0) >= settings.CACHE_STORE_TOUCH_SECONDS:
+            self._touched.set(key, now)
+            try:
+                await self.backend.touch(key, now)
+            except Exception as e:
+                logger.warning(f"⚠️ Cache {self.name}: could not record use of {key}: {e}")
+        return entry
+    
+    async def set(self, key: str, value: Any) -> None:
+        now = time.time()
+        self.memory.set(key, {"value": value, "stored_at": now})
+        self._touched.set(key, now)
+        evicted = await self.backend.put(key, value, now, self.max_entries)
+        if evicted:
+            self.evictions += evicted
+            logger.info(f"🧹 Cache {self.name}: evicted {evicted} entries")
+    
+    async def delete(self, key: str) -> None:
+        self.memory.pop(key)
+        self._touched.pop(key)
+        await self.backend.delete(key)
+    
+    async def recent_keys(self, limit: int) -> List[str]:
+        """Most recently used keys, newest first"""
+        return await self.backend.keys_by_use(limit)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {"max_entries": self.max_entries, "evictions": self.evictions, "memory": self.memory.stats()}
+
+_stores: List[CacheStore] = []
+
+def configure_cache_stores(database=None) -> None:
+    """Point every cache store at MongoDB (or SQLite); called from the app lifespan"""
+    for store in _stores:
+        store.configure(database)
+    logger.info(f"📦 Cache stores: {'MongoDB' if database is not None else f'SQLite ({settings.CACHE_STORE_PATH})'}")
@@ -1,14 +1,19 @@
+import asyncio
 import httpx
 import json
 import re
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, Callable, List, Dict, Any, Optional
 from app.config import settings
 from app.models.quiz import QuizQuestion
+from app.services.exam_extractor import exam_extractor
 import logging
 
 logger = logging.getLogger(__name__)
 
 class DeepSeekAIService:
+    # Text per pipelined section (~1000 words, i.e. one 5-question batch)
+    SECTION_CHARS = 6000
+    
     def __init__(self):
         self.api_key = settings.DEEPSEEK_API_KEY
         self.base_url = settings.DEEPSEEK_BASE_URL
@@ -21,6 +26,12 @@ class DeepSeekAIService:
     async def generate_quiz_from_text(self, content: str, topic: Optional[str] = None, num_questions: Optional[int] = None) -> List[QuizQuestion]:
         """Generate quiz questions from text content"""
         
+        # Exam keys already contain their questions (and answers); parsed once per document
+        analysis = await exam_extractor.analyze_async(content)
+        if analysis.is_exam and analysis.questions:
+            logger.info(f"📋 Detected exam key, using {len(analysis.questions)} extracted questions")
+            return analysis.questions[:num_questions]
+        
         # Calculate optimal number of questions based on content length
         if num_questions is None:
             # Estimate: 1 question per 200 words (roughly 1000 characters)
@@ -42,57 +53,182 @@ class DeepSeekAIService:
         
         for batch_num in range(num_batches):
             questions_in_batch = min(batch_size, num_questions - len(all_questions))
-            
-            # Try AI generation with retry logic
-            max_retries = 2
-            for attempt in range(max_retries):
-                try:
-                    logger.info(f"🎯 Batch {batch_num + 1}/{num_batches}: Attempting to generate {questions_in_batch} questions using AI (attempt {attempt + 1}/{max_retries})")
-                    prompt = self._create_quiz_prompt(content, topic, questions_in_batch, batch_num)
-                    logger.info(f"📝 Prompt created, length: {len(prompt)} characters")
-                    
-                    response = await self._call_deepseek_api(prompt)
-                    
-                    logger.info(f"✅ Received AI response, length: {len(response)} characters")
-                    logger.info(f"📄 Response preview: {response[:200]}...")
-                    
-                    questions = self._parse_quiz_response(response)
-                    
-                    if questions and len(questions) >= questions_in_batch // 2:  # Accept if we get at least half
-                        logger.info(f"🎉 Successfully generated {len(questions)} questions using AI for batch {batch_num + 1}")
-                        all_questions.extend(questions)
-                        break
-                    else:
-                        logger.warning(f"⚠️ AI generated only {len(questions)} questions (expected {questions_in_batch}), retrying...")
-                        if attempt == max_retries - 1:  # Last attempt
-                            logger.warning("❌ Final attempt failed for this batch, using intelligent fallback")
-                            fallback_questions = self._generate_fallback_questions(content, topic, questions_in_batch)
-                            all_questions.extend(fallback_questions)
-                            break
-                        
-                except Exception as e:
-                    logger.error(f"❌ AI API error (attempt {attempt + 1}): {e}")
-                    import traceback
-                    logger.error(f"Full traceback: {traceback.format_exc()}")
-                    if attempt == max_retries - 1:  # Last attempt
-                        logger.info("⚠️ All AI attempts failed for this batch, falling back to intelligent question generation")
-                        fallback_questions = self._generate_fallback_questions(content, topic, questions_in_batch)
-                        all_questions.extend(fallback_questions)
-                        break
+            batch_questions = await self._generate_batch(
+                content, topic, questions_in_batch, batch_num, num_batches, existing_questions=analysis.questions
+            )
+            all_questions.extend(batch_questions)
         
         logger.info(f"Total questions generated: {len(all_questions)}")
         return all_questions[:num_questions]  # Ensure we don't exceed requested number
     
-    def _create_quiz_prompt(self, content: str, topic: Optional[str], num_questions: int = 5, batch_num: int = 0) -> str:
+    async def generate_quiz_from_stream(
+        self,
+        sections: AsyncIterator[str],
+        topic: Optional[str] = None,
+        min_chars: int = 50,
+        full_text: Optional[Callable[[], str]] = None
+    ) -> List[QuizQuestion]:
+        """
+        Generate quiz questions while content is still being extracted.
+        
+        Each section gets its share of the 1-question-per-200-words budget and
+        is queued for generation as soon as it arrives, so PDF extraction/OCR
+        overlaps with LLM calls. Batches still run one at a time, as in
+        generate_quiz_from_text.
+        
+        The exam check needs the whole document, so it runs once after the
+        last section; exam keys then return their extracted questions (as in
+        generate_quiz_from_text) and the remaining batches are dropped.
+        `full_text` returns the exact document once streamed (sections are
+        stripped, so joining them is only an approximation).
+        """
+        
+        batch_size = 5
+        queue: asyncio.Queue = asyncio.Queue()
+        all_questions: List[QuizQuestion] = []
+        
+        async def worker():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                section, questions_in_batch, batch_num = item
+                # Sections aren't analyzed one by one (the document is analyzed once, below)
+                batch_questions = await self._generate_batch(
+                    section, topic, questions_in_batch, batch_num, 0, section=section, existing_questions=[]
+                )
+                all_questions.extend(batch_questions)
+        
+        def enqueue(section: str, count: int) -> int:
+            batches = 0
+            while count > 0:
+                questions_in_batch = min(batch_size, count)
+                queue.put_nowait((section, questions_in_batch, planned_batches + batches))
+                count -= questions_in_batch
+                batches += 1
+            return batches
+        
+        worker_task = asyncio.create_task(worker())
+        planned = 0
+        planned_batches = 0
+        total_words = 0
+        total_chars = 0
+        last_section = ""
+        document: List[str] = []
+        
+        try:
+            async for section in sections:
+                last_section = section
+                document.append(section)
+                total_words += len(section.split())
+                total_chars += len(section.strip())
+                
+                # Same budget as generate_quiz_from_text: 1 question per 200 words, max 200
+                target = min(200, total_words // 200)
+                if target > planned:
+                    planned_batches += enqueue(section, target - planned)
+                    planned = target
+            
+            if total_chars < min_chars:
+                raise ValueError("PDF content too short for quiz generation")
+            
+            # Short documents still get the minimum of 5 questions
+            final_target = max(5, min(200, total_words // 200))
+            
+            analysis = await exam_extractor.analyze_async(full_text() if full_text else "\n\n".join(document))
+            if analysis.is_exam and analysis.questions:
+                logger.info(f"📋 Detected exam key, using {len(analysis.questions)} extracted questions")
+                return analysis.questions[:final_target]
+            
+            if final_target > planned:
+                planned_batches += enqueue(last_section, final_target - planned)
+                planned = final_target
+            
+            logger.info(f"Pipelined generation: {planned} questions in {planned_batches} batches from {total_words} words")
+            
+            queue.put_nowait(None)
+            await worker_task
+        finally:
+            worker_task.cancel()
+        
+        logger.info(f"Total questions generated: {len(all_questions)}")
+        return all_questions[:planned]
+    
+    async def _generate_batch(
+        self,
+        content: str,
+        topic: Optional[str],
+        questions_in_batch: int,
+        batch_num: int,
+        num_batches: int,
+        section: Optional[str] = None,
+        existing_questions: Optional[List[QuizQuestion]] = None
+    ) -> List[QuizQuestion]:
+        """
+        Generate one batch of questions with retries, falling back to intelligent generation.
+        existing_questions: the document's extracted exam questions, when the caller already analyzed it
+        """
+        
+        # Try AI generation with retry logic
+        max_retries = 2
+        for attempt in range(max_retries):
+            try:
+                logger.info(f"🎯 Batch {batch_num + 1}/{num_batches or '?'}: Attempting to generate {questions_in_batch} questions using AI (attempt {attempt + 1}/{max_retries})")
+                prompt = self._create_quiz_prompt(
+                    content, topic, questions_in_batch, batch_num, section=section, existing_questions=existing_questions
+                )
+                logger.info(f"📝 Prompt created, length: {len(prompt)} characters")
+                
+                response = await self._call_deepseek_api(prompt)
+                
+                logger.info(f"✅ Received AI response, length: {len(response)} characters")
+                logger.info(f"📄 Response preview: {response[:200]}...")
+                
+                questions = self._parse_quiz_response(response)
+                
+                if questions and len(questions) >= questions_in_batch // 2:  # Accept if we get at least half
+                    logger.info(f"🎉 Successfully generated {len(questions)} questions using AI for batch {batch_num + 1}")
+                    return questions
+                else:
+                    logger.warning(f"⚠️ AI generated only {len(questions)} questions (expected {questions_in_batch}), retrying...")
+                    if attempt == max_retries - 1:  # Last attempt
+                        logger.warning("❌ Final attempt failed for this batch, using intelligent fallback")
+                        fallback_questions = self._generate_fallback_questions(content, topic, questions_in_batch, existing_questions)
+                        return fallback_questions
+            
+            except Exception as e:
+                logger.error(f"❌ AI API error (attempt {attempt + 1}): {e}")
+                import traceback
+                logger.error(f"Full traceback: {traceback.format_exc()}")
+                if attempt == max_retries - 1:  # Last attempt
+                    logger.info("⚠️ All AI attempts failed for this batch, falling back to intelligent question generation")
+                    fallback_questions = self._generate_fallback_questions(content, topic, questions_in_batch, existing_questions)
+                    return fallback_questions
+        
+        return []
+    
+    def _create_quiz_prompt(
+        self,
+        content: str,
+        topic: Optional[str],
+        num_questions: int = 5,
+        batch_num: int = 0,
+        section: Optional[str] = None,
+        existing_questions: Optional[List[QuizQuestion]] = None
+    ) -> str:
         """Create optimized prompt for quiz generation"""
         
-        # For large documents, use different sections for each batch
-        content_length = len(content)
-        section_size = content_length // max(1, (num_questions // 5))  # Divide content into sections
-        start_pos = batch_num * section_size
-        end_pos = min(start_pos + section_size + 2000, content_length)  # Overlap sections
+        if section is not None:
+            # Caller already picked this batch's section (pipelined generation)
+            content_section = section
+        else:
+            # For large documents, use different sections for each batch
+            content_length = len(content)
+            section_size = content_length // max(1, (num_questions // 5))  # Divide content into sections
+            start_pos = batch_num * section_size
+            end_pos = min(start_pos + section_size + 2000, content_length)  # Overlap sections
         
-        content_section = content[start_pos:end_pos]
+            content_section = content[start_pos:end_pos]
         
         # Analyze content to extract key information
         import hashlib
@@ -108,8 +244,10 @@ class DeepSeekAIService:
         dates = re.findall(r'\b(?:\d{1,2}[/-]\d{1,2}[/-]\d{2,4}|\d{4}|\w+\s+\d{1,2},?\s+\d{4})\b', content_section)
         proper_nouns = re.findall(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b', content_section)
         
-        # Check if content contains existing questions (exam key format)
-        has_existing_questions = bool(re.search(r'\b(?:Question|Q\.|Q\d+|^\d+\.)\s*[:\)]?\s*[A-Z]', content_section, re.MULTILINE))
+        # Check if the document contains existing questions (parsed once per document)
+        if existing_questions is None:
+            existing_questions = exam_extractor.analyze(content).questions
+        has_existing_questions = bool(existing_questions)
         
         if has_existing_questions:
             # Content appears to be an exam/quiz - extract and reformat questions
@@ -730,7 +868,13 @@ Your questions should force the user to recall specific information from the sou
             logger.error("Returning empty list - fallback will be triggered")
             return []
     
-    def _generate_fallback_questions(self, content: str, topic: Optional[str], num_questions: int = 5) -> List[QuizQuestion]:
+    def _generate_fallback_questions(
+        self,
+        content: str,
+        topic: Optional[str],
+        num_questions: int = 5,
+        existing_questions: Optional[List[QuizQuestion]] = None
+    ) -> List[QuizQuestion]:
         """Generate intelligent fallback questions when AI is unavailable"""
         
         # Advanced content analysis
@@ -739,12 +883,13 @@ Your questions should force the user to recall specific information from the sou
         
         logger.info(f"Generating {num_questions} fallback questions from content")
         
-        # Check if content contains existing questions (exam key format)
-        has_existing_questions = bool(re.search(r'\b(?:Question|Q\.|Q\d+|^\d+\.)\s*[:\)]?\s*[A-Z]', content, re.MULTILINE))
+        # Check if content contains existing questions (exam key format), unless the caller already did
+        if existing_questions is None:
+            existing_questions = exam_extractor.analyze(content).questions
         
-        if has_existing_questions:
+        if existing_questions:
             logger.info("Content appears to contain existing questions, extracting them")
-            return self._extract_existing_questions(content, num_questions)
+            return existing_questions[:num_questions]
         
         # Clean and analyze content
         content_clean = re.sub(r'[^\w\s]', ' ', content.lower())
@@ -969,68 +1114,5 @@ Your questions should force the user to recall specific information from the sou
         logger.info(f"Generated {len(questions)} intelligent fallback questions")
         return questions[:num_questions]
     
-    def _extract_existing_questions(self, content: str, num_questions: int) -> List[QuizQuestion]:
-        """Extract existing questions from exam/quiz documents"""
-        import re
-        
-        logger.info("Extracting existing questions from exam document")
-        
-        questions = []
-        
-        # Pattern 1: Numbered questions with options (1. Question? A) Option B) Option)
-        pattern1 = r'(?:^|\n)(\d+)[\.\)]\s*(.+?)\n\s*(?:A[\.\)]|a[\.\)])\s*(.+?)\n\s*(?:B[\.\)]|b[\.\)])\s*(.+?)\n\s*(?:C[\.\)]|c[\.\)])\s*(.+?)\n\s*(?:D[\.\)]|d[\.\)])\s*(.+?)(?=\n\d+[\.\)]|\n\n|$)'
-        matches1 = re.finditer(pattern1, content, re.MULTILINE | re.DOTALL)
-        
-        for match in matches1:
-            q_num, question, opt_a, opt_b, opt_c, opt_d = match.groups()
-            questions.append(QuizQuestion(
-                id=f"extracted_{q_num}",
-                question=question.strip(),
-                options=[opt_a.strip(), opt_b.strip(), opt_c.strip(), opt_d.strip()]
-            ))
-        
-        # Pattern 2: Question followed by options on separate lines
-        pattern2 = r'(?:Question|Q)\s*(\d+)[:\.\)]\s*(.+?)\n\s*(?:Options?:|Choices?:)?\s*\n\s*(?:A[\.\)]|1[\.\)])\s*(.+?)\n\s*(?:B[\.\)]|2[\.\)])\s*(.+?)\n\s*(?:C[\.\)]|3[\.\)])\s*(.+?)\n\s*(?:D[\.\)]|4[\.\)])\s*(.+?)(?=\n(?:Question|Q)\s*\d+|$)'
-        matches2 = re.finditer(pattern2, content, re.MULTILINE | re.DOTALL | re.IGNORECASE)
-        
-        for match in matches2:
-            q_num, question, opt_a, opt_b, opt_c, opt_d = match.groups()
-            questions.append(QuizQuestion(
-                id=f"extracted_q{q_num}",
-                question=question.strip(),
-                options=[opt_a.strip(), opt_b.strip(), opt_c.strip(), opt_d.strip()]
-            ))
-        
-        # Pattern 3: Simple numbered list with inline options
-        pattern3 = r'(\d+)[\.\)]\s*(.+?)\s+(?:A[\.\)]|a[\.\)])\s*(.+?)\s+(?:B[\.\)]|b[\.\)])\s*(.+?)\s+(?:C[\.\)]|c[\.\)])\s*(.+?)\s+(?:D[\.\)]|d[\.\)])\s*(.+?)(?=\n\d+[\.\)]|$)'
-        matches3 = re.finditer(pattern3, content, re.MULTILINE)
-        
-        for match in matches3:
-            q_num, question, opt_a, opt_b, opt_c, opt_d = match.groups()
-            questions.append(QuizQuestion(
-                id=f"extracted_{q_num}",
-                question=question.strip(),
-                options=[opt_a.strip(), opt_b.strip(), opt_c.strip(), opt_d.strip()]
-            ))
-        
-        # Remove duplicates based on question text
-        seen_questions = set()
-        unique_questions = []
-        for q in questions:
-            q_text = q.question.lower().strip()
-            if q_text not in seen_questions and len(q_text) > 10:
-                seen_questions.add(q_text)
-                unique_questions.append(q)
-        
-        logger.info(f"Extracted {len(unique_questions)} unique questions from document")
-        
-        # If we found questions, return them
-        if unique_questions:
-            return unique_questions[:num_questions]
-        
-        # If no questions found, return empty list (will be handled by caller)
-        logger.warning("No questions found in expected format")
-        return []
-
 # Global instance
 deepseek_service = DeepSeekAIService()
\ No newline at end of file
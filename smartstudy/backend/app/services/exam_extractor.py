@@ -2,168 +2,154 @@
 Exam Key Extractor - Extract questions from exam PDFs
 Handles 200+ questions automatically
 """
-import re
+import asyncio
 import logging
-from typing import List, Dict, Optional, Tuple
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, List, Dict, Optional
+from pydantic import BaseModel
+from app.config import settings
 from app.models.quiz import QuizQuestion
+from app.services.source_store import content_hash
+from app.utils.cache import LRUCache
+from app.utils.exam_parser import merge_exam_shards, parse_exam, parse_exam_shard, split_exam
 
 logger = logging.getLogger(__name__)
 
+class ExamAnalysis(BaseModel):
+    """Everything the quiz services need to know about a document as an exam"""
+    is_exam: bool
+    questions: List[QuizQuestion]  # Correct answer first when the key has it
+    answer_key: Dict[int, str]
+
 class ExamExtractor:
     """Extract questions from exam keys and answer sheets"""
     
     def __init__(self):
-        self.question_patterns = {
-            'numbered': r'(\d+)\.\s*(.+?)(?=\n(?:\d+\.|[A-D]\)|$))',
-            'parenthesis': r'(\d+)\)\s*(.+?)(?=\n(?:\d+\)|[A-D]\)|$))',
-            'lettered': r'([A-Z])\.\s*(.+?)(?=\n(?:[A-Z]\.|$))',
-        }
-        
-        self.option_patterns = {
-            'parenthesis': r'([A-D])\)\s*(.+?)(?=\n[A-D]\)|$|\n\d+)',
-            'period': r'([A-D])\.\s*(.+?)(?=\n[A-D]\.|$|\n\d+)',
-            'bracket': r'\[([A-D])\]\s*(.+?)(?=\n\[[A-D]\]|$|\n\d+)',
-        }
-        
-        self.answer_key_patterns = {
-            'simple': r'(\d+)\.\s*([A-D])',
-            'dash': r'(\d+)-([A-D])',
-            'colon': r'(\d+):\s*([A-D])',
-            'table': r'(\d+)\s+([A-D])\s',
-        }
-    
-    def is_exam_key(self, content: str) -> bool:
-        """Detect if content is an exam key"""
-        
-        # Check for multiple numbered questions
-        numbered_questions = re.findall(r'^\d+[\.\)]\s+', content, re.MULTILINE)
+        # content hash -> ExamAnalysis, so each document is parsed once
+        self.cache = LRUCache(max_entries=settings.EXAM_CACHE_MAX_ENTRIES)
+        self._pool: Optional[ProcessPoolExecutor] = None
         
-        # Check for option patterns
-        options = re.findall(r'^[A-D][\.\)]\s+', content, re.MULTILINE)
+    def analyze(self, content: str) -> ExamAnalysis:
+        """Detect and extract in one parse, memoized per content hash"""
         
-        # If we have 10+ questions and 40+ options, likely an exam
-        is_exam = len(numbered_questions) >= 10 and len(options) >= 40
+        digest = content_hash(content)
+        analysis = self.cache.get(digest)
+        if analysis is not None:
+            return analysis
         
-        logger.info(f"Exam detection: {len(numbered_questions)} questions, {len(options)} options -> {is_exam}")
+        analysis = self._build_analysis(parse_exam(content))
+        self.cache.set(digest, analysis)
         
-        return is_exam
+        return analysis
     
-    def extract_exam_questions(self, content: str) -> List[QuizQuestion]:
-        """Extract all questions from exam key"""
-        
-        logger.info("🔍 Extracting exam questions...")
+    async def analyze_async(self, content: str) -> ExamAnalysis:
+        """
+        Same result as analyze, without blocking the event loop.
+        Large banks are split at question boundaries and the shards parsed in parallel processes.
+        """
         
-        # Step 1: Detect format
-        format_type = self._detect_format(content)
-        logger.info(f"📋 Detected format: {format_type}")
+        digest = content_hash(content)
+        analysis = self.cache.get(digest)
+        if analysis is not None:
+            return analysis
         
-        # Step 2: Extract questions
-        questions = self._extract_questions(content, format_type)
-        logger.info(f"📝 Extracted {len(questions)} questions")
+        shards, _ = split_exam(content, settings.EXAM_SHARD_QUESTIONS)
+        parts = await asyncio.gather(*self._parse_shards(shards))
         
-        # Step 3: Extract options for each question
-        questions_with_options = self._extract_options(content, questions)
-        logger.info(f"✅ Parsed {len(questions_with_options)} questions with options")
-        
-        # Step 4: Find and match answer key
-        answer_key = self._find_answer_key(content)
-        if answer_key:
-            logger.info(f"🔑 Found answer key with {len(answer_key)} answers")
-            questions_with_options = self._match_answers(questions_with_options, answer_key)
+        analysis = self._build_analysis(merge_exam_shards(parts))
+        self.cache.set(digest, analysis)
         
-        # Step 5: Convert to QuizQuestion objects
-        quiz_questions = self._convert_to_quiz_questions(questions_with_options)
-        
-        logger.info(f"🎉 Successfully extracted {len(quiz_questions)} exam questions")
-        
-        return quiz_questions
+        return analysis
     
-    def _detect_format(self, content: str) -> str:
-        """Detect question format"""
-        
-        # Count occurrences of each pattern
-        scores = {}
-        
-        for format_name, pattern in self.question_patterns.items():
-            matches = re.findall(pattern, content, re.MULTILINE | re.DOTALL)
-            scores[format_name] = len(matches)
-        
-        # Return format with most matches
-        if scores:
-            best_format = max(scores, key=scores.get)
-            if scores[best_format] > 5:  # At least 5 questions
-                return best_format
-        
-        return 'numbered'  # Default
+    async def iter_exam_questions(self, content: str, page_size: int = 50) -> AsyncIterator[List[QuizQuestion]]:
+        """
+        Yield extracted questions a page at a time, in document order,
+        as soon as the shards holding them are parsed
+        """
+        
+        cached = self.cache.get(content_hash(content))
+        if cached is not None:
+            for start in range(0, len(cached.questions), page_size):
+                yield cached.questions[start:start + page_size]
+            return
+        
+        # The key is read while splitting, so each shard can be answered when it finishes
+        shards, answer_key = split_exam(content, settings.EXAM_SHARD_QUESTIONS)
+        logger.info(f"🧩 Streaming exam extraction: {len(shards)} shards, {len(answer_key)} answers in key")
+        
+        pending = self._parse_shards(shards)
+        try:
+            page: List[QuizQuestion] = []
+            for future in pending:
+                part = await future
+                questions = self._match_answers(part['questions'], answer_key)
+                page.extend(self._convert_to_quiz_questions(questions))
+                
+                while len(page) >= page_size:
+                    yield page[:page_size]
+                    page = page[page_size:]
+            
+            if page:
+                yield page
+        finally:
+            for future in pending:
+                future.cancel()
     
-    def _extract_questions(self, content: str, format_type: str) -> List[Dict]:
-        """Extract question texts"""
-        
-        pattern = self.question_patterns.get(format_type, self.question_patterns['numbered'])
-        matches = re.findall(pattern, content, re.MULTILINE | re.DOTALL)
+    def shutdown(self) -> None:
+        """Stop the shard worker processes (on shutdown)"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+    
+    def _parse_shards(self, shards: List[str]) -> List[asyncio.Future]:
+        """Start parsing every shard: in worker processes when there are several, else in a thread"""
+        
+        loop = asyncio.get_running_loop()
+        if len(shards) == 1:
+            return [asyncio.ensure_future(asyncio.to_thread(parse_exam_shard, shards[0]))]
+        
+        if self._pool is None:
+            # spawn: children only import the parser, not a copy of the running app
+            self._pool = ProcessPoolExecutor(
+                max_workers=settings.EXAM_PARSE_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return [loop.run_in_executor(self._pool, parse_exam_shard, shard) for shard in shards]
+    
+    def _build_analysis(self, parsed: Dict) -> ExamAnalysis:
+        """Exam detection plus answer matching for a parse_exam result"""
         
-        questions = []
-        for match in matches:
-            q_num, q_text = match
-            questions.append({
-                'number': int(q_num) if q_num.isdigit() else len(questions) + 1,
-                'text': q_text.strip(),
-                'options': []
-            })
+        numbered_questions = parsed['question_lines']
+        options = parsed['option_lines']
         
-        return questions
-    
-    def _extract_options(self, content: str, questions: List[Dict]) -> List[Dict]:
-        """Extract options for each question"""
+        # If we have 10+ questions and 40+ options, likely an exam
+        is_exam = numbered_questions >= 10 and options >= 40
+        logger.info(f"Exam detection: {numbered_questions} questions, {options} options -> {is_exam}")
         
-        # Try each option pattern
-        for pattern_name, pattern in self.option_patterns.items():
-            all_options = re.findall(pattern, content, re.MULTILINE | re.DOTALL)
-            
-            if len(all_options) >= len(questions) * 2:  # At least 2 options per question
-                logger.info(f"Using option pattern: {pattern_name}")
-                
-                # Group options by question
-                option_index = 0
-                for question in questions:
-                    question_options = []
-                    
-                    # Get next 4 options (or until we run out)
-                    for _ in range(4):
-                        if option_index < len(all_options):
-                            opt_letter, opt_text = all_options[option_index]
-                            question_options.append({
-                                'letter': opt_letter,
-                                'text': opt_text.strip()
-                            })
-                            option_index += 1
-                    
-                    question['options'] = question_options
-                
-                break
+        questions = parsed['questions']
+        answer_key = parsed['answer_key']
+        if answer_key:
+            logger.info(f"🔑 Found answer key with {len(answer_key)} answers")
+            questions = self._match_answers(questions, answer_key)
         
-        return questions
+        return ExamAnalysis(
+            is_exam=is_exam,
+            questions=self._convert_to_quiz_questions(questions),
+            answer_key=answer_key
+        )
+    
+    def is_exam_key(self, content: str) -> bool:
+        """Detect if content is an exam key"""
+        return self.analyze(content).is_exam
     
-    def _find_answer_key(self, content: str) -> Dict[int, str]:
-        """Find answer key in content"""
+    def extract_exam_questions(self, content: str) -> List[QuizQuestion]:
+        """Extract all questions from exam key"""
         
-        # Try each answer key pattern
-        for pattern_name, pattern in self.answer_key_patterns.items():
-            matches = re.findall(pattern, content, re.MULTILINE)
-            
-            if len(matches) > 10:  # Valid answer key
-                logger.info(f"Found answer key using pattern: {pattern_name}")
-                answer_key = {}
-                
-                for q_num, answer in matches:
-                    try:
-                        answer_key[int(q_num)] = answer.upper()
-                    except ValueError:
-                        continue
-                
-                return answer_key
+        quiz_questions = list(self.analyze(content).questions)
+        logger.info(f"🎉 Successfully extracted {len(quiz_questions)} exam questions")
         
-        return {}
+        return quiz_questions
     
     def _match_answers(self, questions: List[Dict], answer_key: Dict[int, str]) -> List[Dict]:
         """Match answers to questions"""
@@ -6,15 +6,19 @@ import httpx
 import asyncio
 import json
 import logging
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
 from app.config import settings
 from app.models.quiz import QuizQuestion
+from app.utils.text_stream import split_sections
 
 logger = logging.getLogger(__name__)
 
 class FastAIService:
     """Optimized AI service for fast quiz generation"""
     
+    # Content sent per batch (see _create_optimized_prompt)
+    SECTION_CHARS = 3000
+    
     def __init__(self):
         self.openai_api_key = getattr(settings, 'OPENAI_API_KEY', None)
         self.deepseek_api_key = settings.DEEPSEEK_API_KEY
@@ -61,6 +65,82 @@ class FastAIService:
         ]
         
         logger.info(f"⚡ Generating {len(batches)} batches in parallel...")
+        return await self._gather_batches(tasks, num_questions)
+    
+    async def generate_quiz_pipelined(
+        self,
+        sections: AsyncIterator[str],
+        topic: Optional[str] = None,
+        num_questions: int = 10
+    ) -> List[QuizQuestion]:
+        """
+        Generate quiz questions while content is still streaming in.
+        Each batch starts as soon as its own section (SECTION_CHARS) is
+        available, so extraction/OCR overlaps with the LLM calls.
+        """
+        logger.info(f"🚀 Pipelined generation: {num_questions} questions")
+        
+        batches = self._create_batches(num_questions, 10)
+        tasks = []
+        received = []
+        
+        try:
+            async for section in sections:
+                if len(tasks) < len(batches):
+                    i = len(tasks)
+                    received.append(section)
+                    logger.info(f"⚡ Section {i+1} ready, starting batch {i+1}/{len(batches)}")
+                    tasks.append(asyncio.create_task(self._generate_batch(section, topic, batches[i], i)))
+            
+            # Short documents: remaining batches reuse the sections we have
+            while received and len(tasks) < len(batches):
+                i = len(tasks)
+                section = received[i % len(received)]
+                tasks.append(asyncio.create_task(self._generate_batch(section, topic, batches[i], i)))
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        
+        return await self._gather_batches(tasks, num_questions)
+    
+    async def generate_quiz_from_sources(
+        self,
+        sources: List[Tuple[str, int]],
+        topic: Optional[str] = None
+    ) -> List[QuizQuestion]:
+        """
+        Generate one quiz over several documents.
+        `sources` pairs each document's text with its share of the questions;
+        batches are spread over each document's sections and all run in parallel.
+        """
+        jobs = []
+        for content, budget in sources:
+            sections = split_sections(content, self.SECTION_CHARS)
+            if not sections or budget <= 0:
+                continue
+            
+            batches = self._create_batches(budget, 10)
+            for j, batch_size in enumerate(batches):
+                section = sections[j * len(sections) // len(batches)]
+                jobs.append((section, batch_size))
+        
+        sizes = [batch_size for _, batch_size in jobs]
+        tasks = [
+            self._generate_batch(section, topic, batch_size, i)
+            for i, (section, batch_size) in enumerate(jobs)
+        ]
+        
+        logger.info(f"⚡ Generating {len(tasks)} batches over {len(sources)} sources in parallel...")
+        return await self._gather_batches(tasks, sum(sizes), sizes)
+    
+    async def _gather_batches(
+        self,
+        tasks: list,
+        num_questions: int,
+        sizes: Optional[List[int]] = None
+    ) -> List[QuizQuestion]:
+        """Wait for batch tasks and combine their questions (each trimmed to its size, if given)"""
         results = await asyncio.gather(*tasks, return_exceptions=True)
         
         # Combine results
@@ -69,7 +149,7 @@ class FastAIService:
             if isinstance(result, Exception):
                 logger.error(f"❌ Batch {i+1} failed: {result}")
                 continue
-            all_questions.extend(result)
+            all_questions.extend(result[:sizes[i]] if sizes else result)
         
         logger.info(f"✅ Generated {len(all_questions)} questions")
         return all_questions[:num_questions]
@@ -134,7 +214,7 @@ class FastAIService:
         """Create optimized prompt for fast generation"""
         
         # Truncate content if too long (for speed)
-        max_content_length = 3000
+        max_content_length = self.SECTION_CHARS
         if len(content) > max_content_length:
             content = content[:max_content_length] + "..."
         
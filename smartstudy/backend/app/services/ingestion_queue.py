@@ -0,0 +1,182 @@
+"""
+Ingestion Queue - Finish slow sources (PDF/OCR, URL fetch) in the background
+"""
+import asyncio
+import ipaddress
+import logging
+import os
+import socket
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Statuses after which a source no longer changes
+TERMINAL_STATUSES = ("ready", "error")
+
+async def validate_callback_url(url: str) -> None:
+    """
+    Reject webhook URLs that could reach internal services: only http(s) to
+    hosts whose every address is public (no loopback, private, link-local,
+    reserved or multicast). Raises ValueError.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError("callback_url must be an http(s) URL")
+    
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        infos = await asyncio.get_running_loop().getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)
+    except (ValueError, OSError) as e:
+        raise ValueError(f"callback_url host can't be resolved: {e}")
+    
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0].split("%")[0])
+        if not address.is_global or address.is_multicast:
+            raise ValueError("callback_url must not point at a private, loopback or link-local address")
+
+class IngestionQueue:
+    """
+    Bounded pool of workers that run ingestion jobs outside the request.
+    
+    A job is a zero-argument coroutine function returning the finished
+    Source. Progress lives in memory (per process); watchers get progress
+    events and one final event, and an optional webhook is called when done.
+    """
+    
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or settings.INGEST_WORKERS
+        # Recorded on queued sources, so a restart only fails this worker's jobs
+        self.worker_id = settings.INGEST_WORKER_ID or f"{socket.gethostname()}:{os.getpid()}"
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._pending: Set[str] = set()
+        self._progress: Dict[str, Dict[str, Any]] = {}
+        self._watchers: Dict[str, List[asyncio.Queue]] = {}
+        self._webhooks: Set[asyncio.Task] = set()
+    
+    def start(self) -> None:
+        """Start the worker pool (idempotent)"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=settings.INGEST_QUEUE_SIZE)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"🧵 Ingestion queue started ({self.workers} workers)")
+    
+    async def stop(self) -> None:
+        """Cancel the workers and pending webhooks; queued jobs are dropped"""
+        tasks = self._tasks + list(self._webhooks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        self._webhooks.clear()
+        self._queue = None
+        self._pending.clear()
+        self._progress.clear()
+    
+    def is_pending(self, source_id: str) -> bool:
+        return source_id in self._pending
+    
+    def submit(
+        self,
+        source_id: str,
+        job: Callable[[], Awaitable[Any]],
+        callback_url: Optional[str] = None
+    ) -> bool:
+        """
+        Queue a job. False if this source is already queued; raises
+        asyncio.QueueFull instead of waiting when the queue is full.
+        """
+        
+        if source_id in self._pending:
+            return False
+        
+        self.start()
+        self._queue.put_nowait((source_id, job, callback_url))
+        self._pending.add(source_id)
+        self.update(source_id, stage="queued")
+        return True
+    
+    def update(self, source_id: str, **progress: Any) -> None:
+        """Record progress for a queued source and tell its watchers"""
+        if source_id not in self._pending:
+            return
+        state = self._progress.setdefault(source_id, {})
+        state.update(progress)
+        self._publish(source_id, {"event": "progress", "source_id": source_id, **state})
+    
+    def progress(self, source_id: str) -> Optional[Dict[str, Any]]:
+        """Latest progress of a queued source, if this process is running it"""
+        state = self._progress.get(source_id)
+        return dict(state) if state is not None else None
+    
+    def subscribe(self, source_id: str) -> asyncio.Queue:
+        """Queue receiving a source's progress events and its final "done" event"""
+        events: asyncio.Queue = asyncio.Queue()
+        self._watchers.setdefault(source_id, []).append(events)
+        return events
+    
+    def unsubscribe(self, source_id: str, events: asyncio.Queue) -> None:
+        watchers = self._watchers.get(source_id, [])
+        if events in watchers:
+            watchers.remove(events)
+        if not watchers:
+            self._watchers.pop(source_id, None)
+    
+    async def _worker(self, n: int) -> None:
+        while True:
+            source_id, job, callback_url = await self._queue.get()
+            try:
+                self.update(source_id, stage="extracting")
+                source = await job()
+                event = self._final_event(source_id, source.status, source.word_count, source.metadata.get("error"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Ingestion job {source_id} failed: {e}")
+                event = self._final_event(source_id, "error", 0, str(e))
+            finally:
+                self._pending.discard(source_id)
+                self._progress.pop(source_id, None)
+                self._queue.task_done()
+            
+            logger.info(f"📬 Ingestion finished: {source_id} ({event['status']})")
+            self._publish(source_id, event)
+            if callback_url:
+                # Sent on the side: a slow webhook must not hold up the next job
+                task = asyncio.create_task(self._notify(callback_url, event))
+                self._webhooks.add(task)
+                task.add_done_callback(self._webhooks.discard)
+    
+    @staticmethod
+    def _final_event(source_id: str, status: str, word_count: int, error: Optional[str]) -> Dict[str, Any]:
+        return {
+            "event": "done",
+            "source_id": source_id,
+            "status": status,
+            "word_count": word_count,
+            "error": error
+        }
+    
+    def _publish(self, source_id: str, event: Dict[str, Any]) -> None:
+        for events in self._watchers.get(source_id, []):
+            events.put_nowait(event)
+    
+    async def _notify(self, callback_url: str, event: Dict[str, Any]) -> None:
+        """POST the final event to the caller's webhook (best effort, redirects not followed)"""
+        try:
+            # Checked again here: the host may resolve differently than at submit time
+            await validate_callback_url(callback_url)
+            async with httpx.AsyncClient(timeout=settings.INGEST_WEBHOOK_TIMEOUT_SECONDS, follow_redirects=False) as client:
+                response = await client.post(callback_url, json=event)
+            logger.info(f"🔔 Webhook {callback_url}: HTTP {response.status_code}")
+        except Exception as e:
+            logger.warning(f"⚠️ Webhook {callback_url} failed: {e}")
+
+# Global instance
+ingestion_queue = IngestionQueue()
@@ -1,10 +1,18 @@
 import os
 import re
 import json
+import asyncio
+import html
 import logging
+import threading
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
 import google.generativeai as genai
 import requests
 from dotenv import load_dotenv
+from app.utils.page_template import PageTemplate, script_json
+from app.services.static_assets import static_assets
+from app.config import settings
+from app.utils.markmap_tree import count_nodes, parse_markmap_tree, prune_tree
 
 # Load environment variables from .env file
 load_dotenv()
@@ -12,6 +20,9 @@ load_dotenv()
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Markmap page shell, loaded once per process
+MARKMAP_TEMPLATE = PageTemplate.load("markmap.html")
+
 class LLMService:
     """
     A service to interact with Google's Gemini API for generating learning roadmaps.
@@ -181,6 +192,142 @@ class LLMService:
             return self._generate_with_deepseek(topic, prompt)
         return self._generate_with_gemini(topic, prompt)
     
+    def stream_roadmap(self, topic: str, difficulty_level: str = "beginner") -> Iterator[str]:
+        """
+        Like generate_roadmap, but yields the markdown in chunks as the provider writes it.
+        Providers are tried in the same order; one that fails before producing
+        anything falls through to the next, and the static fallback comes last.
+        """
+        prompt = self._create_roadmap_prompt(topic, difficulty_level)
+        
+        providers = []
+        if self.deepseek_api_key and self.deepseek_api_key.strip():
+            providers.append(("DeepSeek", self._stream_with_deepseek))
+        providers.append(("Ollama", self._stream_with_local_llm))
+        if self.api_key:
+            providers.append(("Gemini", self._stream_with_gemini))
+        
+        for name, stream in providers:
+            produced = False
+            try:
+                logging.info(f"🤖 Streaming roadmap via {name} for: {topic}")
+                for chunk in stream(prompt):
+                    if chunk:
+                        produced = True
+                        yield chunk
+                if produced:
+                    return
+                logging.warning(f"⚠️ {name} streamed no content")
+            except Exception as e:
+                if produced:
+                    raise  # Part of the roadmap is already out; can't switch providers now
+                logging.error(f"❌ {name} streaming failed: {e}")
+        
+        yield self._get_fallback_roadmap(topic)
+    
+    async def astream_roadmap(self, topic: str, difficulty_level: str = "beginner") -> AsyncIterator[str]:
+        """stream_roadmap for async callers: the blocking provider calls run in a worker thread"""
+        loop = asyncio.get_running_loop()
+        chunks: asyncio.Queue = asyncio.Queue()
+        finished = object()
+        stop = threading.Event()
+        
+        def put(item):
+            try:
+                loop.call_soon_threadsafe(chunks.put_nowait, item)
+            except RuntimeError:
+                stop.set()  # Event loop closed
+        
+        def produce():
+            try:
+                for chunk in self.stream_roadmap(topic, difficulty_level):
+                    if stop.is_set():
+                        return
+                    put(chunk)
+            except Exception as e:
+                put(e)
+            finally:
+                put(finished)
+        
+        loop.run_in_executor(None, produce)
+        try:
+            while (item := await chunks.get()) is not finished:
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+    
+    def _stream_with_deepseek(self, prompt: str) -> Iterator[str]:
+        """DeepSeek chat completion with server-sent event streaming"""
+        headers = {
+            "Authorization": f"Bearer {self.deepseek_api_key}",
+            "Content-Type": "application/json"
+        }
+        payload = {
+            "model": "deepseek-chat",
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0.7,
+            "max_tokens": 2048,
+            "stream": True
+        }
+        with requests.post(
+            f"{self.deepseek_base_url}/chat/completions",
+            headers=headers,
+            json=payload,
+            stream=True,
+            timeout=60
+        ) as resp:
+            resp.raise_for_status()
+            for line in resp.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or [{}]
+                yield choices[0].get("delta", {}).get("content") or ""
+    
+    def _stream_with_local_llm(self, prompt: str) -> Iterator[str]:
+        """Ollama generate endpoint in streaming mode (one JSON object per line)"""
+        with requests.post(
+            f"{self.local_llm_base_url}/api/generate",
+            json={
+                "model": self.local_llm_model,
+                "prompt": prompt,
+                "stream": True,
+                "options": {
+                    "temperature": 0.7,
+                    "num_predict": 2048,
+                }
+            },
+            stream=True,
+            timeout=300,
+        ) as resp:
+            resp.raise_for_status()
+            for line in resp.iter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                yield data.get("response", "")
+                if data.get("done"):
+                    break
+    
+    def _stream_with_gemini(self, prompt: str) -> Iterator[str]:
+        """Gemini generate_content in streaming mode"""
+        model = genai.GenerativeModel(self.model_name)
+        response = model.generate_content(
+            prompt,
+            generation_config={"temperature": 0.7, "top_p": 1.0},
+            stream=True
+        )
+        for chunk in response:
+            yield getattr(chunk, "text", "") or ""
+    
+    def is_fallback_roadmap(self, topic: str, roadmap_markdown: str) -> bool:
+        """True when generation fell back to the static template instead of a model"""
+        return roadmap_markdown.strip() == self._get_fallback_roadmap(topic).strip()
+    
     def _generate_with_deepseek(self, topic: str, prompt: str) -> str:
         """Generate roadmap using DeepSeek API."""
         try:
@@ -317,404 +464,70 @@ class LLMService:
         else:
             return "6-12 weeks"
     
-    def convert_to_markmap(self, roadmap_markdown: str, output_file: str = "roadmap.html") -> str:
+    def convert_to_markmap(
+        self,
+        roadmap_markdown: str,
+        output_file: Optional[str] = None,
+        title: str = "Interactive Learning Roadmap",
+        subtitle: str = "Click nodes to expand • Drag to navigate • Scroll to zoom",
+        script_srcs: Optional[Dict[str, str]] = None,
+        tree: Optional[Dict[str, Any]] = None,
+        subtree_url: Optional[str] = None
+    ) -> str:
         """
         Converts markdown roadmap to interactive Markmap HTML visualization with classy, minimal UI.
         
         Args:
             roadmap_markdown: The markdown content from Gemini API
-            output_file: Output filename for the HTML file
+            output_file: Optional filename to also save the HTML to (off by default; not for request paths)
+            title: Page title and heading
+            subtitle: Line under the heading
+            script_srcs: d3/markmap script URLs (default: static_assets.script_srcs(), i.e. the CDN unless a base URL is configured)
+            tree: The markdown's markmap tree, if already parsed (e.g. from markmap_trees)
+            subtree_url: Subtree endpoint for this tree; large trees are then shipped top levels only
             
         Returns:
             The HTML content as a string
         """
-        # Count nodes to optimize initial expand level
-        # Count headers (##) and list items (-) as nodes
-        header_count = len(re.findall(r'^#{1,6}\s', roadmap_markdown, re.MULTILINE))
-        list_item_count = len(re.findall(r'^\s*[-*]\s', roadmap_markdown, re.MULTILINE))
-        total_nodes = header_count + list_item_count
+        # The page gets the parsed tree, so the browser doesn't run markmap's transformer
+        if tree is None:
+            tree = parse_markmap_tree(roadmap_markdown)
+        total_nodes = count_nodes(tree)
         
         # Set initial expand level based on node count
         # Level 2 for <50 nodes, level 1 for >=50 nodes
         initial_expand_level = 2 if total_nodes < 50 else 1
         
-        logging.info(f"📊 Roadmap stats: {total_nodes} nodes (headers: {header_count}, items: {list_item_count}), expand level: {initial_expand_level}")
-        
-        # Escape the markdown content for JavaScript
-        escaped_markdown = json.dumps(roadmap_markdown)
-        
-        html_template = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Interactive Learning Roadmap</title>
-    <style>
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-        
-        body {{
-            font-family: 'Inter', -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            background: #0d1117;
-            min-height: 100vh;
-            color: #e6edf3;
-            overflow: hidden;
-        }}
-        
-        .container {{
-            max-width: 1600px;
-            margin: 20px auto;
-            background: rgba(33, 38, 45, 0.8);
-            border-radius: 16px;
-            box-shadow: 0 20px 40px rgba(0, 0, 0, 0.4);
-            overflow: hidden;
-            backdrop-filter: blur(20px);
-            border: 1px solid rgba(240, 246, 252, 0.1);
-            height: calc(100vh - 40px);
-            display: flex;
-            flex-direction: column;
-        }}
-        
-        .header {{
-            background: linear-gradient(135deg, #1f2937 0%, #374151 100%);
-            color: #e6edf3;
-            padding: 24px 32px;
-            text-align: center;
-            position: relative;
-            border-bottom: 1px solid rgba(240, 246, 252, 0.1);
-            flex-shrink: 0;
-        }}
-        
-        .header h1 {{
-            margin: 0;
-            font-size: 2rem;
-            font-weight: 700;
-            background: linear-gradient(135deg, #3b82f6, #8b5cf6);
-            -webkit-background-clip: text;
-            -webkit-text-fill-color: transparent;
-            background-clip: text;
-        }}
-        
-        .header p {{
-            margin: 12px 0 0 0;
-            font-size: 0.9rem;
-            color: #e6edf3;
-            opacity: 0.85;
-        }}
-        
-        .mindmap-container {{
-            position: relative;
-            background: #0d1117;
-            flex: 1;
-            min-height: 0;
-        }}
-        
-        #mindmap {{
-            width: 100%;
-            height: 100%;
-        }}
-        
-        .controls {{
-            position: fixed;
-            top: 20px;
-            right: 20px;
-            z-index: 1000;
-            display: flex;
-            flex-direction: column;
-            gap: 10px;
-        }}
-        
-        .btn {{
-            background: #21262d;
-            color: #e6edf3;
-            border: 1px solid #30363d;
-            padding: 10px 16px;
-            border-radius: 6px;
-            cursor: pointer;
-            font-size: 14px;
-            font-weight: 500;
-            font-family: 'Inter', -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif;
-            transition: all 0.2s ease;
-            box-shadow: 0 2px 4px rgba(0, 0, 0, 0.2);
-        }}
-        
-        .btn:hover {{
-            background: #30363d;
-            border-color: #484f58;
-            box-shadow: 0 4px 8px rgba(0, 0, 0, 0.3);
-            transform: translateY(-1px);
-        }}
-        
-        .btn:active {{
-            transform: translateY(0) scale(0.98);
-            box-shadow: 0 1px 2px rgba(0, 0, 0, 0.2);
-        }}
-        
-        .btn:focus {{
-            outline: 2px solid #3b82f6;
-            outline-offset: 2px;
-        }}
-        
-        /* Markmap Node Styling - Dark Theme */
-        .markmap-node {{
-            cursor: pointer;
-        }}
-        
-        .markmap-node circle {{
-            stroke-width: 2px;
-            transition: all 0.2s ease;
-        }}
-        
-        .markmap-node:hover circle {{
-            stroke-width: 3px;
-            filter: brightness(1.2);
-        }}
-        
-        .markmap-node text {{
-            fill: #e6edf3;
-            font-size: 14px;
-            font-family: 'Inter', -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif;
-            font-weight: 500;
-        }}
-        
-        /* Markmap Link Styling - Dark Theme */
-        .markmap-link {{
-            stroke-width: 2px;
-            opacity: 0.6;
-            transition: opacity 0.2s ease;
-        }}
-        
-        .markmap-node:hover ~ .markmap-link,
-        .markmap-link:hover {{
-            opacity: 0.9;
-        }}
-        
-        /* SVG Background for better contrast */
-        #mindmap {{
-            background: #0d1117;
-        }}
-        
-        .loading {{
-            display: none;
-            position: absolute;
-            top: 50%;
-            left: 50%;
-            transform: translate(-50%, -50%);
-            background: rgba(21, 26, 33, 0.95);
-            padding: 24px;
-            border-radius: 12px;
-            z-index: 100;
-            color: #e6edf3;
-        }}
-        
-        .spinner {{
-            width: 32px;
-            height: 32px;
-            border: 3px solid rgba(59, 130, 246, 0.3);
-            border-top: 3px solid #3b82f6;
-            border-radius: 50%;
-            animation: spin 1s linear infinite;
-            margin: 0 auto 12px;
-        }}
-        
-        @keyframes spin {{
-            0% {{ transform: rotate(0deg); }}
-            100% {{ transform: rotate(360deg); }}
-        }}
-        
-        /* Print Styles */
-        @media print {{
-            body {{
-                background: white;
-            }}
-            
-            .container {{
-                max-width: 100%;
-                margin: 0;
-                box-shadow: none;
-                border: none;
-                height: auto;
-            }}
-            
-            .controls {{
-                display: none !important;
-            }}
-            
-            .controls button {{
-                display: none !important;
-            }}
-            
-            .header {{
-                background: white;
-                color: black;
-                border-bottom: 2px solid #e5e7eb;
-            }}
-            
-            .header h1 {{
-                background: none;
-                -webkit-text-fill-color: #1f2937;
-                color: #1f2937;
-            }}
-            
-            .header p {{
-                color: #6b7280;
-            }}
-            
-            .mindmap-container {{
-                background: white;
-            }}
-            
-            .markmap-node text {{
-                fill: #1f2937;
-            }}
-            
-            .loading {{
-                display: none !important;
-            }}
-        }}
-    </style>
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/d3/7.8.5/d3.min.js"></script>
-    <script src="https://cdn.jsdelivr.net/npm/markmap-lib@0.15.3/dist/browser/index.js"></script>
-    <script src="https://cdn.jsdelivr.net/npm/markmap-view@0.15.3/dist/browser/index.js"></script>
-</head>
-<body>
-    <!-- Control Buttons -->
-    <div class="controls">
-        <button class="btn" onclick="expandAll()">📂 Expand All</button>
-        <button class="btn" onclick="collapseAll()">📁 Collapse All</button>
-        <button class="btn" onclick="fitScreen()">🔍 Fit Screen</button>
-        <button class="btn" onclick="downloadHTML()">💾 Download HTML</button>
-    </div>
-    
-    <div class="container">
-        <div class="header">
-            <h1>🎯 Interactive Learning Roadmap</h1>
-            <p>Click nodes to expand • Drag to navigate • Scroll to zoom</p>
-        </div>
-        <div class="mindmap-container">
-            <svg id="mindmap"></svg>
-            <div class="loading" id="loading">
-                <div class="spinner"></div>
-                <div>Loading...</div>
-            </div>
-        </div>
-    </div>
-
-    <script>
-        var mm;
-        var markdown = {escaped_markdown};
-        
-        function init() {{
-            document.getElementById('loading').style.display = 'block';
-            
-            setTimeout(function() {{
-                try {{
-                    var transformer = new window.markmap.Transformer();
-                    var data = transformer.transform(markdown).root;
-                    
-                    mm = window.markmap.Markmap.create('#mindmap', {{
-                        color: function(node) {{
-                            var colors = ['#3b82f6', '#10b981', '#f59e0b', '#ef4444', '#8b5cf6'];
-                            return colors[node.depth % 5];
-                        }},
-                        duration: 300,
-                        maxWidth: 280,
-                        initialExpandLevel: {initial_expand_level}
-                    }}, data);
-                    
-                    mm.fit();
-                    document.getElementById('loading').style.display = 'none';
-                }} catch(e) {{
-                    console.error(e);
-                    document.getElementById('loading').style.display = 'none';
-                }}
-            }}, 100);
-        }}
-        
-        function fitScreen() {{
-            if (mm) mm.fit();
-        }}
-        
-        function expandAll() {{
-            if (!mm) return;
-            
-            var transformer = new window.markmap.Transformer();
-            var data = transformer.transform(markdown).root;
-            
-            // Recursively set fold=0 on all nodes
-            function forceExpand(node) {{
-                if (node.payload) {{
-                    delete node.payload.fold;
-                }}
-                node.payload = node.payload || {{}};
-                node.payload.fold = 0;
-                
-                if (node.children) {{
-                    node.children.forEach(forceExpand);
-                }}
-            }}
-            
-            forceExpand(data);
-            mm.setData(data);
-            mm.fit();
-        }}
-        
-        function collapseAll() {{
-            if (!mm) return;
-            
-            var transformer = new window.markmap.Transformer();
-            var data = transformer.transform(markdown).root;
-            
-            // Set fold=1 on all non-root nodes
-            function foldAll(node, isRoot) {{
-                if (!isRoot) {{
-                    node.payload = node.payload || {{}};
-                    node.payload.fold = 1;
-                }}
-                if (node.children) {{
-                    node.children.forEach(child => foldAll(child, false));
-                }}
-            }}
-            
-            foldAll(data, true);
-            mm.setData(data);
-            mm.fit();
-        }}
-        
-        function downloadHTML() {{
-            // Get complete HTML document
-            var fullHTML = document.documentElement.outerHTML;
-            
-            // Create blob and download with date-stamped filename
-            var blob = new Blob([fullHTML], {{ type: 'text/html;charset=utf-8' }});
-            var url = URL.createObjectURL(blob);
-            var a = document.createElement('a');
-            a.href = url;
-            a.download = 'mindmap-' + new Date().toISOString().split('T')[0] + '.html';
-            document.body.appendChild(a);
-            a.click();
-            document.body.removeChild(a);
-            URL.revokeObjectURL(url);
-        }}
-        
-        init();
-    </script>
-</body>
-</html>"""
+        # Very large trees ship their top levels; the rest is loaded on expand
+        lazy = subtree_url is not None and total_nodes >= settings.MARKMAP_LAZY_MIN_NODES
+        if lazy:
+            tree = prune_tree(tree, settings.MARKMAP_INLINE_LEVELS)
+        
+        logging.info(f"📊 Roadmap stats: {total_nodes} nodes, expand level: {initial_expand_level}, lazy subtrees: {lazy}")
+        
+        # The page shell is compiled once; only the roadmap data is filled in
+        if script_srcs is None:
+            script_srcs = static_assets.script_srcs()
+        html_content = MARKMAP_TEMPLATE.render(
+            **{slot: html.escape(src) for slot, src in script_srcs.items()},
+            title=html.escape(title),
+            heading=html.escape(title),
+            subtitle=html.escape(subtitle),
+            tree=script_json(tree),
+            subtree_url=script_json(subtree_url if lazy else None),
+            initial_expand_level=initial_expand_level
+        )
         
         # Write to file if output_file is provided
         if output_file:
             try:
                 with open(output_file, "w", encoding="utf-8") as f:
-                    f.write(html_template)
+                    f.write(html_content)
                 logging.info(f"✅ Interactive roadmap saved to {output_file}")
             except Exception as e:
                 logging.error(f"Failed to write HTML file: {e}")
         
-        return html_template
+        return html_content
 
     def _create_roadmap_prompt(self, topic: str, difficulty_level: str) -> str:
         """Create a prompt for generating the roadmap."""
@@ -0,0 +1,71 @@
+"""
+Markmap Trees - Parsed roadmap trees cached by markdown hash
+"""
+import asyncio
+import hashlib
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from app.config import settings
+from app.services.cache_store import CacheStore
+from app.utils.markmap_tree import parse_markmap_tree
+
+logger = logging.getLogger(__name__)
+
+# Larger documents are parsed off the event loop
+PARSE_IN_THREAD_CHARS = 200000
+
+class MarkmapTreeCache:
+    """
+    Roadmap markdown is parsed once into its markmap tree; pages and the
+    subtree endpoint share the result by id (a hash of the markdown).
+    """
+    
+    def __init__(self):
+        self.store = CacheStore("markmap_trees", max_entries=settings.MARKMAP_TREE_CACHE_MAX_ENTRIES)
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def tree_id(markdown: str) -> str:
+        return hashlib.sha256(markdown.encode("utf-8")).hexdigest()[:32]
+    
+    async def get(self, tree_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            entry = await self.store.get(tree_id)
+        except Exception as e:
+            logger.warning(f"⚠️ Markmap tree cache read failed for {tree_id}: {e}")
+            return None
+        return entry["value"] if entry is not None else None
+    
+    async def get_or_build(self, markdown: str) -> Tuple[str, Dict[str, Any]]:
+        """(tree id, tree) for a document, parsing it only on a cache miss"""
+        tree_id = self.tree_id(markdown)
+        tree = await self.get(tree_id)
+        if tree is not None:
+            self.hits += 1
+            return tree_id, tree
+        
+        self.misses += 1
+        if len(markdown) > PARSE_IN_THREAD_CHARS:
+            tree = await asyncio.to_thread(parse_markmap_tree, markdown)
+        else:
+            tree = parse_markmap_tree(markdown)
+        
+        try:
+            await self.store.set(tree_id, tree)
+        except Exception as e:
+            logger.warning(f"⚠️ Markmap tree cache write failed for {tree_id}: {e}")
+        return tree_id, tree
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "store": self.store.stats()
+        }
+
+# Global instance
+markmap_trees = MarkmapTreeCache()
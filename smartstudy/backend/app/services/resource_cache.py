@@ -0,0 +1,123 @@
+"""
+Resource Cache - Scraper results per (topic, site) with stale-while-revalidate
+"""
+import asyncio
+import logging
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+from app.config import settings
+from app.services.cache_store import CacheStore
+
+logger = logging.getLogger(__name__)
+
+def normalize_topic(topic: str) -> str:
+    """Case- and whitespace-insensitive form of a topic"""
+    return re.sub(r'\s+', ' ', topic).strip().lower()
+
+class ResourceCache:
+    """
+    Persistent cache in front of the site scrapers.
+    
+    Fresh entries (younger than RESOURCE_CACHE_TTL_SECONDS) are served as is.
+    Stale entries (up to RESOURCE_CACHE_STALE_SECONDS older) are served
+    immediately while one background scrape refreshes them. Anything older is
+    a miss and is scraped in the request. Empty results expire sooner, since
+    they are usually a blocked or failed scrape.
+    """
+    
+    def __init__(self):
+        self.store = CacheStore("resources", max_entries=settings.RESOURCE_CACHE_MAX_ENTRIES)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.fresh_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+    
+    @staticmethod
+    def key(site: str, topic: str) -> str:
+        return f"{site}:{normalize_topic(topic)}"
+    
+    async def get_or_scrape(
+        self,
+        site: str,
+        topic: str,
+        limit: int,
+        scrape: Callable[[], Awaitable[List[Dict]]]
+    ) -> List[Dict]:
+        """Cached resources for a topic on one site, running `scrape` when needed"""
+        
+        key = self.key(site, topic)
+        try:
+            entry = await self.store.get(key)
+        except Exception as e:
+            logger.warning(f"⚠️ Resource cache read failed for {key}: {e}")
+            entry = None
+        
+        # An entry only answers requests for at most as many resources as it was scraped for
+        if entry is not None and entry["value"]["limit"] >= limit:
+            resources = entry["value"]["resources"]
+            age = time.time() - entry["stored_at"]
+            ttl = settings.RESOURCE_CACHE_TTL_SECONDS if resources else settings.RESOURCE_CACHE_EMPTY_TTL_SECONDS
+            
+            if age < ttl:
+                self.fresh_hits += 1
+                return resources[:limit]
+            
+            if age < ttl + settings.RESOURCE_CACHE_STALE_SECONDS:
+                self.stale_hits += 1
+                if key not in self._inflight:
+                    self.refreshes += 1
+                    self._start_scrape(key, limit, scrape)
+                return resources[:limit]
+        
+        self.misses += 1
+        task = self._inflight.get(key) or self._start_scrape(key, limit, scrape)
+        # Shielded: a request that gives up (deadline) still lets the scrape fill the cache
+        resources = await asyncio.shield(task)
+        return resources[:limit]
+    
+    async def stop(self) -> None:
+        """Cancel background refreshes (on shutdown)"""
+        tasks = list(self._inflight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process plus store usage"""
+        lookups = self.fresh_hits + self.stale_hits + self.misses
+        return {
+            "fresh_hits": self.fresh_hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "in_flight": len(self._inflight),
+            "hit_rate": round((self.fresh_hits + self.stale_hits) / lookups, 3) if lookups else 0.0,
+            "store": self.store.stats()
+        }
+    
+    def _start_scrape(self, key: str, limit: int, scrape: Callable[[], Awaitable[List[Dict]]]) -> asyncio.Task:
+        """One scrape per key at a time; its result is written back to the store"""
+        task = asyncio.create_task(self._fill(key, limit, scrape))
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._finished(key, done))
+        return task
+    
+    async def _fill(self, key: str, limit: int, scrape: Callable[[], Awaitable[List[Dict]]]) -> List[Dict]:
+        resources = await scrape()
+        try:
+            await self.store.set(key, {"limit": limit, "resources": resources})
+        except Exception as e:
+            logger.warning(f"⚠️ Resource cache write failed for {key}: {e}")
+        return resources
+    
+    def _finished(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"❌ Resource scrape {key} failed: {task.exception()}")
+
+# Global instance
+resource_cache = ResourceCache()
@@ -0,0 +1,142 @@
+"""
+Roadmap Cache - Generated roadmaps keyed by normalized topic and difficulty
+"""
+import logging
+import re
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.services.cache_store import CacheStore
+
+logger = logging.getLogger(__name__)
+
+# Distinct topics whose request counts are tracked (the rarest are dropped beyond this)
+DEMAND_MAX_TOPICS = 10000
+
+# Spellings folded together (whole topic first, then word by word); extend via ROADMAP_TOPIC_SYNONYMS
+TOPIC_SYNONYMS = {
+    "js": "javascript",
+    "ts": "typescript",
+    "py": "python",
+    "python3": "python",
+    "golang": "go",
+    "cpp": "c++",
+    "c plus plus": "c++",
+    "csharp": "c#",
+    "c sharp": "c#",
+    "reactjs": "react",
+    "react.js": "react",
+    "vuejs": "vue",
+    "vue.js": "vue",
+    "nodejs": "node.js",
+    "k8s": "kubernetes",
+    "ml": "machine learning",
+    "ai": "artificial intelligence",
+    "dl": "deep learning",
+    "nlp": "natural language processing",
+    "dsa": "data structures and algorithms",
+    "dbms": "database management systems",
+    "oop": "object oriented programming",
+}
+
+def normalize_roadmap_topic(topic: str) -> str:
+    """Case-, whitespace-, punctuation- and synonym-insensitive form of a topic"""
+    text = re.sub(r'\s+', ' ', topic).strip().lower()
+    text = re.sub(r'^[^\w#+.]+|[^\w#+]+$', '', text)  # Keep "c#", "c++", ".net"
+    text = re.sub(r'\s*\broadmap$', '', text)
+    
+    synonyms = {**TOPIC_SYNONYMS, **{k.lower(): v.lower() for k, v in settings.ROADMAP_TOPIC_SYNONYMS.items()}}
+    if text in synonyms:
+        return synonyms[text]
+    return ' '.join(synonyms.get(word, word) for word in text.split(' '))
+
+class RoadmapCache:
+    """
+    Persistent, size-bounded cache of /roadmap/generate results.
+    
+    Entries are shared by everyone asking for the same normalized topic and
+    difficulty. A user can also hold a personal variant (e.g. after forcing
+    a refresh), which is looked up before the shared entry.
+    """
+    
+    def __init__(self):
+        self.store = CacheStore("roadmaps", max_entries=settings.ROADMAP_CACHE_MAX_ENTRIES)
+        self.hits = 0
+        self.misses = 0
+        self.demand: Counter = Counter()  # Requests per normalized topic (this worker)
+    
+    @staticmethod
+    def key(topic: str, difficulty_level: str, user_id: Optional[str] = None) -> str:
+        key = f"{difficulty_level.strip().lower()}:{normalize_roadmap_topic(topic)}"
+        return f"{key}:user:{user_id}" if user_id else key
+    
+    async def get(self, topic: str, difficulty_level: str, user_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """A fresh cached roadmap (the user's variant first), or None"""
+        keys = [self.key(topic, difficulty_level, user_id)] if user_id else []
+        keys.append(self.key(topic, difficulty_level))
+        self._count_request(topic)
+        
+        for key in keys:
+            try:
+                entry = await self.store.get(key)
+            except Exception as e:
+                logger.warning(f"⚠️ Roadmap cache read failed for {key}: {e}")
+                continue
+            if entry is not None and time.time() - entry["stored_at"] < settings.ROADMAP_CACHE_TTL_SECONDS:
+                self.hits += 1
+                return entry["value"]
+        
+        self.misses += 1
+        return None
+    
+    async def set(
+        self,
+        topic: str,
+        difficulty_level: str,
+        roadmap: Dict[str, Any],
+        user_id: Optional[str] = None
+    ) -> None:
+        """Store a roadmap (as the user's variant when user_id is given)"""
+        key = self.key(topic, difficulty_level, user_id)
+        try:
+            await self.store.set(key, roadmap)
+        except Exception as e:
+            logger.warning(f"⚠️ Roadmap cache write failed for {key}: {e}")
+    
+    async def age(self, topic: str, difficulty_level: str) -> Optional[float]:
+        """Seconds since the shared entry was stored, or None when there is none"""
+        entry = await self.store.get(self.key(topic, difficulty_level))
+        return time.time() - entry["stored_at"] if entry is not None else None
+    
+    async def popular_topics(self, limit: int) -> List[str]:
+        """Most requested topics on this worker, then the store's most recently used ones"""
+        topics = [topic for topic, _ in self.demand.most_common(limit)]
+        try:
+            keys = await self.store.recent_keys(limit * 3)  # Up to one key per difficulty
+        except Exception as e:
+            logger.warning(f"⚠️ Roadmap cache key listing failed: {e}")
+            keys = []
+        for key in keys:
+            _, _, topic = key.partition(":")
+            if ":user:" not in topic and topic not in topics:
+                topics.append(topic)
+        return topics[:limit]
+    
+    def _count_request(self, topic: str) -> None:
+        self.demand[normalize_roadmap_topic(topic)] += 1
+        if len(self.demand) > DEMAND_MAX_TOPICS:
+            self.demand = Counter(dict(self.demand.most_common(DEMAND_MAX_TOPICS // 2)))
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "store": self.store.stats()
+        }
+
+# Global instance
+roadmap_cache = RoadmapCache()
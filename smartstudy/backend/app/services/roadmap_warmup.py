@@ -0,0 +1,134 @@
+"""
+Roadmap Warm-up - Pre-generates popular roadmaps during off-peak hours
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.config import settings
+from app.services.roadmap_cache import normalize_roadmap_topic, roadmap_cache
+
+logger = logging.getLogger(__name__)
+
+# Builds a roadmap for (topic, difficulty); returns it for caching, or None when it shouldn't be cached
+RoadmapBuilder = Callable[[str, str], Awaitable[Optional[Dict[str, Any]]]]
+
+def in_off_peak_window(now: Optional[datetime] = None) -> bool:
+    """Whether the server's local hour is within ROADMAP_WARMUP_START_HOUR..END_HOUR (may wrap midnight)"""
+    hour = (now or datetime.now()).hour
+    start, end = settings.ROADMAP_WARMUP_START_HOUR, settings.ROADMAP_WARMUP_END_HOUR
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+class RoadmapWarmup:
+    """
+    Background job that fills the roadmap cache ahead of demand.
+    
+    Topics come from ROADMAP_WARMUP_TOPICS plus the most requested ones.
+    Inside the off-peak window each topic x difficulty whose cached roadmap
+    is missing or getting old is regenerated, one at a time and at most one
+    every ROADMAP_WARMUP_INTERVAL_SECONDS, so LLM load moves to idle hours.
+    """
+    
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._build: Optional[RoadmapBuilder] = None
+        self.generated = 0
+        self.skipped = 0
+        self.failed = 0
+        self.last_pass: Optional[float] = None
+    
+    def start(self, build: RoadmapBuilder) -> None:
+        """Start the job (no-op unless ROADMAP_WARMUP_ENABLED)"""
+        if not settings.ROADMAP_WARMUP_ENABLED or (self._task is not None and not self._task.done()):
+            return
+        self._build = build
+        self._task = asyncio.create_task(self._loop())
+        logger.info(
+            f"🔥 Roadmap warm-up started (hours {settings.ROADMAP_WARMUP_START_HOUR}-{settings.ROADMAP_WARMUP_END_HOUR}, "
+            f"one roadmap per {settings.ROADMAP_WARMUP_INTERVAL_SECONDS}s)"
+        )
+    
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def topics(self) -> List[str]:
+        """Configured topics first, then the most requested ones (normalized, no duplicates)"""
+        topics: List[str] = []
+        for topic in settings.ROADMAP_WARMUP_TOPICS:
+            topic = normalize_roadmap_topic(topic)
+            if topic and topic not in topics:
+                topics.append(topic)
+        if settings.ROADMAP_WARMUP_MINE_REQUESTS:
+            for topic in await roadmap_cache.popular_topics(settings.ROADMAP_WARMUP_MAX_TOPICS):
+                if topic not in topics:
+                    topics.append(topic)
+        return topics[:settings.ROADMAP_WARMUP_MAX_TOPICS]
+    
+    async def run_pass(
+        self,
+        build: Optional[RoadmapBuilder] = None,
+        now: Callable[[], datetime] = datetime.now
+    ) -> int:
+        """One sweep over topics x difficulties; stops when the window closes. Returns roadmaps generated."""
+        build = build or self._build
+        generated = 0
+        for topic in await self.topics():
+            for difficulty_level in settings.ROADMAP_WARMUP_DIFFICULTIES:
+                if not in_off_peak_window(now()):
+                    return generated
+                
+                age = await roadmap_cache.age(topic, difficulty_level)
+                if age is not None and age < settings.ROADMAP_WARMUP_REFRESH_AGE_SECONDS:
+                    self.skipped += 1
+                    continue
+                
+                try:
+                    roadmap = await build(topic, difficulty_level)
+                except Exception as e:
+                    logger.error(f"❌ Roadmap warm-up failed for {difficulty_level}:{topic}: {e}")
+                    self.failed += 1
+                    roadmap = None
+                if roadmap is not None:
+                    await roadmap_cache.set(topic, difficulty_level, roadmap)
+                    self.generated += 1
+                    generated += 1
+                    logger.info(f"🔥 Warmed roadmap {difficulty_level}:{topic}")
+                
+                # Throttle LLM calls even off-peak
+                await asyncio.sleep(settings.ROADMAP_WARMUP_INTERVAL_SECONDS)
+        
+        self.last_pass = time.time()
+        return generated
+    
+    async def _loop(self) -> None:
+        while True:
+            if in_off_peak_window():
+                try:
+                    await self.run_pass()
+                except Exception as e:
+                    logger.error(f"❌ Roadmap warm-up pass failed: {e}")
+            await asyncio.sleep(settings.ROADMAP_WARMUP_CHECK_SECONDS)
+    
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.ROADMAP_WARMUP_ENABLED,
+            "running": self._task is not None and not self._task.done(),
+            "off_peak": in_off_peak_window(),
+            "generated": self.generated,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "last_pass": self.last_pass
+        }
+
+# Global instance
+roadmap_warmup = RoadmapWarmup()
@@ -1,22 +1,52 @@
 import requests
-from bs4 import BeautifulSoup
 import asyncio
 import aiohttp
-from typing import List, Dict
-import urllib.parse
+from functools import partial
+from typing import AsyncIterator, Awaitable, Callable, List, Dict, Optional, Tuple
 import logging
 import re
-import json
+from app.config import settings
+from app.services.resource_cache import resource_cache
+from app.services.scraper_sites import SiteAdapter, read_fixture, site_registry, write_fixture
 
 class ScraperService:
     """
     Enhanced scraper that finds ACTUAL specific courses and videos
-    Scrapes from: YouTube, Coursera, Udemy, edX, Khan Academy, freeCodeCamp, GitHub
+    Scrapes the sites in the site registry (YouTube, Coursera, Udemy, freeCodeCamp, GitHub)
     """
     def __init__(self):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         }
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    async def start(self):
+        """Open the shared HTTP session (called from the app lifespan)"""
+        if self._session is None or self._session.closed:
+            self._session = self._open_session()
+    
+    async def close(self):
+        """Close the shared HTTP session (on shutdown)"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """One pooled session for every site, so connections and TLS sessions are reused"""
+        if self._session is None or self._session.closed:
+            # Outside the app lifespan (scripts, tests): open lazily
+            self._session = self._open_session()
+        return self._session
+    
+    def _open_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=settings.SCRAPER_MAX_CONNECTIONS,
+            limit_per_host=settings.SCRAPER_MAX_CONNECTIONS_PER_HOST,
+            ttl_dns_cache=300,
+            keepalive_timeout=30
+        )
+        return aiohttp.ClientSession(connector=connector, headers=self.headers)
         
     async def collect_resources(self, topic: str, limit: int = 20) -> List[Dict]:
         """
@@ -25,42 +55,104 @@ class ScraperService:
         all_resources = []
         
         # Collect from multiple sources in parallel
-        tasks = [
-            self._get_real_youtube_videos(topic, limit // 3),
-            self._get_real_coursera_courses(topic, 2),
-            self._get_real_udemy_courses(topic, 2),
-            self._get_real_freecodecamp_resources(topic, 2),
-            self._get_real_github_repos(topic, 2),
-        ]
-        
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        scrapes = self._site_scrapes(topic, limit)
+        results = await asyncio.gather(*(scrape() for _, scrape in scrapes), return_exceptions=True)
         
-        for result in results:
+        for (adapter, _), result in zip(scrapes, results):
             if isinstance(result, list):
-                all_resources.extend(result)
+                all_resources.extend((adapter.weight, resource) for resource in result)
         
-        # Remove duplicates, sort by quality, and return
-        unique_resources = self._remove_duplicates(all_resources)
-        sorted_resources = self._sort_by_quality(unique_resources)
-        return sorted_resources[:limit]
-    
-    async def collect_resources_for_topics(self, topics: List[str], limit_per_topic: int = 8) -> List[Dict]:
+        return self._rank(all_resources, limit)
+        
+    async def collect_resources_for_topics(
+        self,
+        topics: List[str],
+        limit_per_topic: int = 8,
+        deadline: Optional[float] = None
+    ) -> List[Dict]:
         """
         Collect resources for multiple topics
+        Every topic x site scrape runs at once (bounded by SCRAPER_CONCURRENCY);
+        whatever has arrived by the deadline is ranked and returned, the rest is cancelled
         """
-        all_resources = []
+        by_topic: Dict[str, List[Tuple[float, Dict]]] = {topic: [] for topic in topics}
+        async for topic, adapter, resources in self.iter_resources_for_topics(topics, limit_per_topic, deadline):
+            by_topic[topic].extend((adapter.weight, resource) for resource in resources)
         
-        for topic in topics:
-            try:
-                topic_resources = await self.collect_resources(topic, limit=limit_per_topic)
-                all_resources.extend(topic_resources)
-            except Exception as e:
-                logging.error(f"Failed to collect resources for topic '{topic}': {e}")
-                continue
+        return self.rank_topic_resources(by_topic, limit_per_topic)
+    
+    async def iter_resources_for_topics(
+        self,
+        topics: List[str],
+        limit_per_topic: int = 8,
+        deadline: Optional[float] = None
+    ) -> AsyncIterator[Tuple[str, SiteAdapter, List[Dict]]]:
+        """
+        Yield (topic, site, resources) as each topic x site scrape finishes.
+        Scrapes still running at the deadline are cancelled.
+        """
+        deadline = settings.SCRAPER_DEADLINE_SECONDS if deadline is None else deadline
+        semaphore = asyncio.Semaphore(settings.SCRAPER_CONCURRENCY)
+        
+        async def bounded(scrape):
+            async with semaphore:
+                return await scrape()
+        
+        tasks = {
+            asyncio.create_task(bounded(scrape)): (topic, adapter)
+            for topic in topics
+            for adapter, scrape in self._site_scrapes(topic, limit_per_topic)
+        }
+        
+        loop = asyncio.get_running_loop()
+        stop_at = loop.time() + deadline
+        pending = set(tasks)
+        try:
+            while pending:
+                remaining = stop_at - loop.time()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    topic, adapter = tasks[task]
+                    if task.exception() is not None:
+                        logging.error(f"Failed to collect {adapter.name} resources for topic '{topic}': {task.exception()}")
+                        continue
+                    yield topic, adapter, task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+                logging.warning(f"Resource deadline ({deadline}s): cancelled {len(pending)} of {len(tasks)} scrapes")
+    
+    def rank_topic_resources(self, by_topic: Dict[str, List[Tuple[float, Dict]]], limit_per_topic: int) -> List[Dict]:
+        """Rank each topic's (site weight, resource) pairs, then merge topics in order without duplicates"""
+        all_resources = []
+        for resources in by_topic.values():
+            all_resources.extend(self._rank(resources, limit_per_topic))
         
         unique_resources = self._remove_duplicates(all_resources)
         return unique_resources[:50]
     
+    def _site_scrapes(self, topic: str, limit: int) -> List[Tuple[SiteAdapter, Callable[[], Awaitable[List[Dict]]]]]:
+        """One not-yet-started scrape per enabled site for a topic, served through the resource cache"""
+        scrapes = []
+        for adapter in site_registry.enabled():
+            site_limit = adapter.quota(limit)
+            scrape = partial(self._scrape_site, adapter, topic, site_limit)
+            if settings.SCRAPER_FIXTURE_MODE != "replay":
+                # Replays measure the scrapers themselves, so they bypass the cache
+                scrape = partial(resource_cache.get_or_scrape, adapter.name, topic, site_limit, scrape)
+            scrapes.append((adapter, scrape))
+        return scrapes
+    
+    def _rank(self, resources: List[Tuple[float, Dict]], limit: int) -> List[Dict]:
+        """Sort (site weight, resource) pairs by weight, remove duplicates, and cut to limit"""
+        ranked = sorted(resources, key=lambda pair: pair[0], reverse=True)
+        unique_resources = self._remove_duplicates([resource for _, resource in ranked])
+        return unique_resources[:limit]
+    
     def _extract_topics_from_roadmap(self, roadmap_markdown: str) -> List[str]:
         """
         Extract learning topics from checkbox items in roadmap
@@ -68,7 +160,7 @@ class ScraperService:
         topics = []
         
         # Find all checkbox items with ** bold text **
-        checkbox_pattern = r'- \[ \] (?:\*\*)?([^*\n]+?)(?:\*\*)?'
+        checkbox_pattern = r'- \[ \] (?:\*\*)?([^*\n]+)'
         matches = re.findall(checkbox_pattern, roadmap_markdown)
         
         for match in matches:
@@ -84,234 +176,41 @@ class ScraperService:
         
         return topics
     
-    async def _get_real_youtube_videos(self, topic: str, limit: int) -> List[Dict]:
+    async def _scrape_site(self, adapter: SiteAdapter, topic: str, limit: int) -> List[Dict]:
         """
-        Get ACTUAL YouTube videos by scraping search results
+        Get ACTUAL resources from one site's search page
         """
-        try:
-            search_query = urllib.parse.quote_plus(f"{topic} full course tutorial")
-            url = f"https://www.youtube.com/results?search_query={search_query}"
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=self.headers, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                    if response.status != 200:
-                        logging.error(f"YouTube search failed with status {response.status}")
-                        return []
-                    
-                    html = await response.text()
-                    videos = []
-                    
-                    # Find ytInitialData in the HTML
-                    match = re.search(r'var ytInitialData = ({.*?});', html)
-                    if match:
-                        try:
-                            data = json.loads(match.group(1))
-                            contents = data.get('contents', {}).get('twoColumnSearchResultsRenderer', {}).get('primaryContents', {}).get('sectionListRenderer', {}).get('contents', [])
-                            
-                            for content in contents:
-                                item_section = content.get('itemSectionRenderer', {})
-                                for item in item_section.get('contents', []):
-                                    video_renderer = item.get('videoRenderer', {})
-                                    if video_renderer:
-                                        video_id = video_renderer.get('videoId')
-                                        title = video_renderer.get('title', {}).get('runs', [{}])[0].get('text', '')
-                                        channel = video_renderer.get('ownerText', {}).get('runs', [{}])[0].get('text', 'YouTube')
-                                        duration_text = video_renderer.get('lengthText', {}).get('simpleText', 'Unknown')
-                                        view_text = video_renderer.get('viewCountText', {}).get('simpleText', '')
-                                        
-                                        if video_id and title:
-                                            videos.append({
-                                                "title": title,
-                                                "url": f"https://www.youtube.com/watch?v={video_id}",
-                                                "source": channel,
-                                                "description": f"{view_text} • {duration_text}",
-                                                "duration": duration_text,
-                                                "type": "video"
-                                            })
-                                            
-                                            if len(videos) >= limit:
-                                                break
-                                
-                                if len(videos) >= limit:
-                                    break
-                        except json.JSONDecodeError:
-                            logging.error("Failed to parse YouTube data")
-                    
-                    return videos[:limit]
-                    
-        except Exception as e:
-            logging.error(f"YouTube scraping error: {e}")
+        if limit <= 0:
             return []
-    
-    async def _get_real_coursera_courses(self, topic: str, limit: int) -> List[Dict]:
-        """
-        Get ACTUAL Coursera courses
-        """
-        try:
-            search_query = urllib.parse.quote_plus(topic)
-            url = f"https://www.coursera.org/search?query={search_query}"
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=self.headers, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                    if response.status != 200:
-                        return []
-                    
-                    html = await response.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-                    courses = []
-                    course_cards = soup.find_all('a', {'class': re.compile(r'cds-.*-link')}, href=re.compile(r'/learn/'))
-                    
-                    for card in course_cards[:limit]:
-                        href = card.get('href', '')
-                        if not href:
-                            continue
-                        
-                        title_elem = card.find('h3') or card.find('h2')
-                        title = title_elem.get_text(strip=True) if title_elem else ''
-                        
-                        if title and href:
-                            full_url = f"https://www.coursera.org{href}" if href.startswith('/') else href
-                            courses.append({
-                                "title": title,
-                                "url": full_url,
-                                "source": "Coursera",
-                                "description": f"Professional course on {topic}",
-                                "duration": "4-6 weeks",
-                                "rating": "4.7/5",
-                                "type": "course"
-                            })
-                    
-                    return courses
-                    
-        except Exception as e:
-            logging.error(f"Coursera scraping error: {e}")
-            return []
-    
-    async def _get_real_udemy_courses(self, topic: str, limit: int) -> List[Dict]:
-        """
-        Get ACTUAL Udemy courses
-        """
-        try:
-            search_query = urllib.parse.quote_plus(topic)
-            url = f"https://www.udemy.com/courses/search/?q={search_query}"
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=self.headers, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                    if response.status != 200:
-                        return []
-                    
-                    html = await response.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-                    courses = []
-                    course_cards = soup.find_all('a', {'data-purpose': 'course-card-title'})
-                    
-                    for card in course_cards[:limit]:
-                        title = card.get_text(strip=True)
-                        href = card.get('href', '')
-                        
-                        if title and href:
-                            full_url = f"https://www.udemy.com{href}" if href.startswith('/') else href
-                            courses.append({
-                                "title": title,
-                                "url": full_url,
-                                "source": "Udemy",
-                                "description": f"Comprehensive {topic} course",
-                                "duration": "Variable",
-                                "rating": "4.5/5",
-                                "type": "course"
-                            })
-                    
-                    return courses
-                    
-        except Exception as e:
-            logging.error(f"Udemy scraping error: {e}")
-            return []
-    
-    async def _get_real_freecodecamp_resources(self, topic: str, limit: int) -> List[Dict]:
-        """
-        Get ACTUAL freeCodeCamp articles/tutorials
-        """
+        
         try:
-            search_query = urllib.parse.quote_plus(topic)
-            url = f"https://www.freecodecamp.org/news/search/?query={search_query}"
+            async with adapter.semaphore:
+                html = await self._fetch_search_page(adapter, topic)
+            if html is None:
+                return []
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=self.headers, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                    if response.status != 200:
-                        return []
-                    
-                    html = await response.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-                    resources = []
-                    articles = soup.find_all('article', class_=re.compile(r'post-card'))
-                    
-                    for article in articles[:limit]:
-                        link = article.find('a', class_=re.compile(r'post-card-image-link'))
-                        if not link:
-                            continue
-                        
-                        href = link.get('href', '')
-                        title_elem = article.find('h2', class_=re.compile(r'post-card-title'))
-                        title = title_elem.get_text(strip=True) if title_elem else ''
-                        
-                        if title and href:
-                            resources.append({
-                                "title": title,
-                                "url": href,
-                                "source": "freeCodeCamp",
-                                "description": f"Free tutorial on {topic}",
-                                "duration": "15-30 min read",
-                                "type": "article"
-                            })
-                    
-                    return resources
+            # Parsing is CPU-bound; keep it off the event loop
+            return await asyncio.to_thread(adapter.parse, html, topic, limit)
                     
         except Exception as e:
-            logging.error(f"freeCodeCamp scraping error: {e}")
+            logging.error(f"{adapter.name} scraping error: {e!r}")
             return []
     
-    async def _get_real_github_repos(self, topic: str, limit: int) -> List[Dict]:
-        """
-        Get ACTUAL GitHub repositories
-        """
-        try:
-            search_query = urllib.parse.quote_plus(f"{topic} tutorial")
-            url = f"https://github.com/search?q={search_query}&type=repositories"
+    async def _fetch_search_page(self, adapter: SiteAdapter, topic: str) -> Optional[str]:
+        """The site's search page for a topic (a recorded fixture in replay mode)"""
+        if settings.SCRAPER_FIXTURE_MODE == "replay":
+            return await asyncio.to_thread(read_fixture, adapter.name, topic)
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=self.headers, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                    if response.status != 200:
-                        return []
-                    
-                    html = await response.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-                    repos = []
-                    repo_items = soup.find_all('div', class_=re.compile(r'repo-list-item'))
-                    
-                    for item in repo_items[:limit]:
-                        link = item.find('a', class_=re.compile(r'v-align-middle'))
-                        if not link:
-                            continue
-                        
-                        href = link.get('href', '')
-                        title = link.get_text(strip=True)
-                        
-                        if title and href:
-                            full_url = f"https://github.com{href}" if href.startswith('/') else href
-                            repos.append({
-                                "title": title,
-                                "url": full_url,
-                                "source": "GitHub",
-                                "description": f"Open-source {topic} project",
-                                "duration": "Ongoing",
-                                "type": "repository"
-                            })
-                    
-                    return repos
-                    
-        except Exception as e:
-            logging.error(f"GitHub scraping error: {e}")
-            return []
+        url = adapter.search_url(topic)
+        async with self.session.get(url, timeout=aiohttp.ClientTimeout(total=adapter.timeout)) as response:
+            if response.status != 200:
+                logging.error(f"{adapter.name} search failed with status {response.status}")
+                return None
+            html = await response.text()
+                    
+        if settings.SCRAPER_FIXTURE_MODE == "record":
+            await asyncio.to_thread(write_fixture, adapter.name, topic, html)
+        return html
     
     def _remove_duplicates(self, resources: List[Dict]) -> List[Dict]:
         """
@@ -328,25 +227,5 @@ class ScraperService:
         
         return unique_resources
     
-    def _sort_by_quality(self, resources: List[Dict]) -> List[Dict]:
-        """
-        Sort resources by quality metrics
-        """
-        def get_quality_score(resource):
-            score = 0
-            resource_type = resource.get('type', '')
-            source = resource.get('source', '').lower()
-            
-            # Boost for popular platforms
-            if 'freecodecamp' in source or 'khan academy' in source:
-                score += 30
-            elif 'coursera' in source or 'edx' in source:
-                score += 25
-            elif 'udemy' in source or 'udacity' in source:
-                score += 20
-            elif 'youtube' in source:
-                score += 15
-            
-            return score
-        
-        return sorted(resources, key=get_quality_score, reverse=True)
+# Global instance
+scraper_service = ScraperService()
@@ -0,0 +1,172 @@
+"""
+Scraper Sites - Registry of the sites resources are scraped from
+Each site is an adapter (search URL + page parser) with its own budget:
+timeout, ranking weight, concurrency limit, result quota and enable flag.
+"""
+import asyncio
+import logging
+import os
+import re
+import urllib.parse
+from typing import Any, Callable, Dict, List, Optional
+
+from app.config import settings
+from app.services.resource_cache import normalize_topic
+from app.utils.site_parsers import (
+    parse_coursera_results,
+    parse_freecodecamp_results,
+    parse_github_results,
+    parse_udemy_results,
+    parse_youtube_results
+)
+
+logger = logging.getLogger(__name__)
+
+# Settings that can be overridden per site (SCRAPER_SITE_OVERRIDES)
+ADAPTER_OPTIONS = ("enabled", "timeout", "weight", "max_concurrency", "max_results", "share")
+
+class SiteAdapter:
+    """
+    One scrapeable site.
+    
+    `parse(html, topic, limit)` turns a search page into resources. Per topic a
+    site contributes `share` of the requested limit, or a fixed `max_results`.
+    Results are ranked by `weight` (higher first).
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        search_url: Callable[[str], str],
+        parse: Callable[[str, str, int], List[Dict]],
+        weight: float = 0,
+        timeout: float = 10.0,
+        max_concurrency: int = 4,
+        max_results: int = 2,
+        share: Optional[float] = None,
+        enabled: bool = True
+    ):
+        self.name = name
+        self.search_url = search_url
+        self.parse = parse
+        self.weight = weight
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.max_results = max_results
+        self.share = share
+        self.enabled = enabled
+        self._semaphore: Optional[asyncio.Semaphore] = None
+    
+    def quota(self, limit: int) -> int:
+        """How many resources this site contributes when `limit` are wanted for a topic"""
+        if self.share is not None:
+            return int(limit * self.share)
+        return self.max_results
+    
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        """Bounds this site's requests in flight across all callers"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+    
+    def describe(self) -> Dict[str, Any]:
+        return {"name": self.name, **{option: getattr(self, option) for option in ADAPTER_OPTIONS}}
+
+class SiteRegistry:
+    """Adapters by name, in registration order"""
+    
+    def __init__(self):
+        self._adapters: Dict[str, SiteAdapter] = {}
+    
+    def register(self, adapter: SiteAdapter) -> SiteAdapter:
+        self._adapters[adapter.name] = adapter
+        return adapter
+    
+    def get(self, name: str) -> Optional[SiteAdapter]:
+        return self._adapters.get(name)
+    
+    def enabled(self) -> List[SiteAdapter]:
+        return [adapter for adapter in self._adapters.values() if adapter.enabled]
+    
+    def configure(self, name: str, **options: Any) -> SiteAdapter:
+        """Change a site's budget or enable flag at runtime"""
+        adapter = self._adapters.get(name)
+        if adapter is None:
+            raise ValueError(f"Unknown scraper site: {name}")
+        
+        for option, value in options.items():
+            if option not in ADAPTER_OPTIONS:
+                raise ValueError(f"Unknown scraper site option: {option}")
+            setattr(adapter, option, value)
+        if "max_concurrency" in options:
+            adapter._semaphore = None
+        return adapter
+    
+    def apply_overrides(self, overrides: Dict[str, Dict[str, Any]]) -> None:
+        """Apply {site: {option: value}} overrides; unknown sites/options are logged and skipped"""
+        for name, options in overrides.items():
+            try:
+                self.configure(name, **options)
+            except ValueError as e:
+                logger.warning(f"⚠️ Ignoring scraper override for {name}: {e}")
+    
+    def describe(self) -> List[Dict[str, Any]]:
+        return [adapter.describe() for adapter in self._adapters.values()]
+
+def fixture_path(site: str, topic: str, directory: Optional[str] = None) -> str:
+    """Recorded search page for a site and topic: <dir>/<site>/<topic-slug>.html"""
+    slug = re.sub(r'[^a-z0-9]+', '-', normalize_topic(topic)).strip('-') or "default"
+    return os.path.join(directory or settings.SCRAPER_FIXTURE_DIR, site, f"{slug}.html")
+
+def read_fixture(site: str, topic: str) -> Optional[str]:
+    """A site's recorded page for a topic, else its default.html, else None"""
+    for path in (fixture_path(site, topic), fixture_path(site, "default")):
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                return f.read()
+    return None
+
+def write_fixture(site: str, topic: str, html: str) -> None:
+    path = fixture_path(site, topic)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(html)
+
+def _quoted(template: str) -> Callable[[str], str]:
+    return lambda topic: template.format(urllib.parse.quote_plus(topic))
+
+# Global instance
+site_registry = SiteRegistry()
+
+site_registry.register(SiteAdapter(
+    "youtube",
+    _quoted("https://www.youtube.com/results?search_query={}+full+course+tutorial"),
+    parse_youtube_results,
+    share=1 / 3
+))
+site_registry.register(SiteAdapter(
+    "coursera",
+    _quoted("https://www.coursera.org/search?query={}"),
+    parse_coursera_results,
+    weight=25
+))
+site_registry.register(SiteAdapter(
+    "udemy",
+    _quoted("https://www.udemy.com/courses/search/?q={}"),
+    parse_udemy_results,
+    weight=20
+))
+site_registry.register(SiteAdapter(
+    "freecodecamp",
+    _quoted("https://www.freecodecamp.org/news/search/?query={}"),
+    parse_freecodecamp_results,
+    weight=30
+))
+site_registry.register(SiteAdapter(
+    "github",
+    _quoted("https://github.com/search?q={}+tutorial&type=repositories"),
+    parse_github_results
+))
+
+site_registry.apply_overrides(settings.SCRAPER_SITE_OVERRIDES)
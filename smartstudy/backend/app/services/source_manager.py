@@ -2,13 +2,20 @@
 Source Manager - Handle multiple input sources
 Supports text, PDF, URL, and documents
 """
+import asyncio
 import hashlib
+import io
 import logging
-from typing import List, Optional, Dict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
 from datetime import datetime
-from app.models.source import Source, SourceType
+from urllib.parse import urlsplit, urlunsplit
+from fastapi import UploadFile
+from app.config import settings
+from app.models.source import Source, SourceStatus, SourceSummary, SourceType
 from app.utils.pdf_parser import extract_text_from_pdf
 from app.services.url_fetcher import url_fetcher
+from app.services.source_store import source_store
+from app.services.ingestion_queue import ingestion_queue, TERMINAL_STATUSES
 
 logger = logging.getLogger(__name__)
 
@@ -16,13 +23,21 @@ class SourceManager:
     """Manage multiple content sources"""
     
     def __init__(self):
-        self.sources: Dict[str, Source] = {}
+        self.store = source_store
     
-    async def add_text_source(self, text: str, title: Optional[str] = None) -> Source:
-        """Add text source"""
+    async def add_text_source(self, text: str, title: Optional[str] = None, owner: bool = False) -> Source:
+        """
+        Add text source
+        owner=True counts the caller as an owner (DELETE only removes a source once
+        every owner released it); other callers just keep it alive until its TTL
+        """
         
         source_id = self._generate_id(text)
         
+        existing = await self._reuse_source(source_id, title, owner)
+        if existing:
+            return existing
+        
         source = Source(
             id=source_id,
             type=SourceType.TEXT,
@@ -37,15 +52,32 @@ class SourceManager:
             status="ready"
         )
         
-        self.sources[source_id] = source
+        await self.store.save(source)
+        if owner:
+            await self._claim(source, owner)
         logger.info(f"✅ Added text source: {source_id}")
         
         return source
     
-    async def add_pdf_source(self, file, title: Optional[str] = None) -> Source:
-        """Add PDF source"""
+    async def add_pdf_source(
+        self,
+        file,
+        title: Optional[str] = None,
+        background: bool = False,
+        callback_url: Optional[str] = None,
+        owner: bool = False
+    ) -> Source:
+        """
+        Add PDF source
+        With background=True, returns the "processing" source right away and
+        extracts in the ingestion queue
+        """
         
-        source_id = self._generate_id(file.filename)
+        source_id, existing = await self.lookup_pdf_source(file, title, owner)
+        if existing:
+            return existing
+        if background and ingestion_queue.is_pending(source_id):
+            return await self._claim(await self.store.get(source_id), owner)
         
         # Create source with processing status
         source = Source(
@@ -58,32 +90,119 @@ class SourceManager:
             word_count=0,
             status="processing"
         )
+        if background:
+            source.metadata["ingest_worker"] = ingestion_queue.worker_id
+        
+        await self.store.save(source)
+        
+        if background:
+            # The upload is closed when the request ends, so keep its bytes
+            buffered = UploadFile(file=io.BytesIO(await file.read()), filename=file.filename)
+            await self._enqueue(source, lambda: self._extract_pdf(source, buffered, track=True), callback_url)
+            return await self._claim(source, owner) if owner else source
+        
+        if owner:
+            await self._claim(source, owner)
+        return await self._extract_pdf(source, file)
+    
+    async def _extract_pdf(self, source: Source, file, track: bool = False) -> Source:
+        """Extract a processing PDF source's text and mark it ready (or error)"""
         
-        self.sources[source_id] = source
+        on_progress = (lambda chars: ingestion_queue.update(source.id, chars=chars)) if track else None
         
         try:
             # Extract text from PDF
-            content = await extract_text_from_pdf(file)
+            content = await extract_text_from_pdf(file, on_progress=on_progress)
             
             # Update source
             source.content = content
             source.word_count = len(content.split())
             source.metadata["char_count"] = len(content)
             source.status = "ready"
+            await self.store.save(source)
             
-            logger.info(f"✅ Added PDF source: {source_id} ({source.word_count} words)")
+            logger.info(f"✅ Added PDF source: {source.id} ({source.word_count} words)")
             
         except Exception as e:
             source.status = "error"
             source.metadata["error"] = str(e)
+            await self.store.save(source)
             logger.error(f"❌ PDF extraction failed: {e}")
         
         return source
     
-    async def add_url_source(self, url: str, title: Optional[str] = None) -> Source:
-        """Add URL source"""
+    async def lookup_pdf_source(
+        self,
+        file,
+        title: Optional[str] = None,
+        owner: bool = False
+    ) -> Tuple[str, Optional[Source]]:
+        """
+        Identify a PDF by the digest of its bytes.
+        Returns the source id and the existing ready source, if any (a new reference when owner=True).
+        """
+        
+        data = await file.read()
+        await file.seek(0)
+        source_id = self._generate_id(data)
+        return source_id, await self._reuse_source(source_id, title or file.filename, owner)
+    
+    async def add_extracted_pdf_source(
+        self,
+        source_id: str,
+        filename: str,
+        content: str,
+        title: Optional[str] = None,
+        owner: bool = False
+    ) -> Source:
+        """Add PDF source whose text was already extracted (e.g. while streaming)"""
+        
+        existing = await self._reuse_source(source_id, title or filename, owner)
+        if existing:
+            return existing
+        
+        source = Source(
+            id=source_id,
+            type=SourceType.PDF,
+            title=title or filename,
+            content=content,
+            metadata={
+                "filename": filename,
+                "char_count": len(content)
+            },
+            created_at=datetime.now(),
+            word_count=len(content.split()),
+            status="ready"
+        )
+        
+        await self.store.save(source)
+        if owner:
+            await self._claim(source, owner)
+        logger.info(f"✅ Added PDF source: {source_id} ({source.word_count} words)")
+        
+        return source
+    
+    async def add_url_source(
+        self,
+        url: str,
+        title: Optional[str] = None,
+        background: bool = False,
+        callback_url: Optional[str] = None,
+        owner: bool = False
+    ) -> Source:
+        """
+        Add URL source
+        With background=True, returns the "processing" source right away and
+        fetches in the ingestion queue
+        """
         
-        source_id = self._generate_id(url)
+        source_id = self._generate_id(f"url:{self._normalize_url(url)}")
+        
+        existing = await self._reuse_source(source_id, title, owner)
+        if existing:
+            return existing
+        if background and ingestion_queue.is_pending(source_id):
+            return await self._claim(await self.store.get(source_id), owner)
         
         # Create source with processing status
         source = Source(
@@ -96,8 +215,21 @@ class SourceManager:
             word_count=0,
             status="processing"
         )
+        if background:
+            source.metadata["ingest_worker"] = ingestion_queue.worker_id
+        
+        await self.store.save(source)
         
-        self.sources[source_id] = source
+        if background:
+            await self._enqueue(source, lambda: self._fetch_url(source, url, title), callback_url)
+            return await self._claim(source, owner) if owner else source
+        
+        if owner:
+            await self._claim(source, owner)
+        return await self._fetch_url(source, url, title)
+    
+    async def _fetch_url(self, source: Source, url: str, title: Optional[str] = None) -> Source:
+        """Fetch a processing URL source's content and mark it ready (or error)"""
         
         try:
             # Fetch URL content
@@ -109,39 +241,151 @@ class SourceManager:
             source.word_count = len(content.split())
             source.metadata["char_count"] = len(content)
             source.status = "ready"
+            await self.store.save(source)
             
-            logger.info(f"✅ Added URL source: {source_id} ({source.word_count} words)")
+            logger.info(f"✅ Added URL source: {source.id} ({source.word_count} words)")
             
         except Exception as e:
             source.status = "error"
             source.metadata["error"] = str(e)
+            await self.store.save(source)
             logger.error(f"❌ URL fetch failed: {e}")
         
         return source
     
-    def get_source(self, source_id: str) -> Optional[Source]:
+    async def add_sources(
+        self,
+        urls: Optional[List[str]] = None,
+        texts: Optional[List[str]] = None,
+        files: Optional[list] = None,
+        concurrency: Optional[int] = None
+    ) -> List[Source]:
+        """
+        Ingest a mix of URLs, texts and PDF files concurrently
+        (at most `concurrency` at a time). Sources come back in input order;
+        failed ones keep status "error".
+        """
+        
+        semaphore = asyncio.Semaphore(concurrency or settings.SOURCE_INGEST_CONCURRENCY)
+        
+        async def bounded(coro):
+            async with semaphore:
+                return await coro
+        
+        # Coroutines only start running inside the semaphore
+        jobs = (
+            [self.add_url_source(url) for url in urls or []]
+            + [self.add_text_source(text) for text in texts or []]
+            + [self.add_pdf_source(file, title=file.filename) for file in files or []]
+        )
+        
+        sources = await asyncio.gather(*(bounded(job) for job in jobs))
+        logger.info(f"📥 Ingested {len(sources)} sources")
+        
+        return list(sources)
+    
+    def allocate_questions(self, sources: List[Source], num_questions: int) -> Dict[str, int]:
+        """
+        Split a question budget across sources in proportion to their word counts
+        (largest-remainder rounding, so the shares always add up to num_questions)
+        """
+        
+        total_words = sum(s.word_count for s in sources)
+        if total_words == 0:
+            return {s.id: 0 for s in sources}
+        
+        quotas = [num_questions * s.word_count / total_words for s in sources]
+        shares = [int(q) for q in quotas]
+        
+        leftover = num_questions - sum(shares)
+        by_remainder = sorted(range(len(sources)), key=lambda i: quotas[i] - shares[i], reverse=True)
+        for i in by_remainder[:leftover]:
+            shares[i] += 1
+        
+        allocation: Dict[str, int] = {}
+        for source, share in zip(sources, shares):
+            allocation[source.id] = allocation.get(source.id, 0) + share
+        return allocation
+    
+    async def get_source(self, source_id: str) -> Optional[Source]:
         """Get source by ID"""
-        return self.sources.get(source_id)
+        return await self.store.get(source_id)
     
-    def get_all_sources(self) -> List[Source]:
+    async def get_all_sources(self) -> List[Source]:
         """Get all sources"""
-        return list(self.sources.values())
+        return await self.store.list()
+    
+    async def list_source_summaries(
+        self,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        source_type: Optional[SourceType] = None,
+        status: Optional[str] = None
+    ) -> Tuple[List[SourceSummary], Optional[str]]:
+        """Page through sources without their content"""
+        return await self.store.list_summaries(
+            limit=limit,
+            cursor=cursor,
+            source_type=source_type.value if source_type else None,
+            status=status
+        )
+    
+    async def get_source_summary(self, source_id: str) -> Optional[SourceSummary]:
+        """Get a source without its content"""
+        return await self.store.get_summary(source_id)
+    
+    async def get_source_status(self, source_id: str) -> Optional[SourceStatus]:
+        """Status of a source, with live progress while it is being ingested here"""
+        status = await self.store.get_status(source_id)
+        if status is not None and status.status == "processing":
+            status.progress = ingestion_queue.progress(source_id)
+        return status
+    
+    async def watch_source(self, source_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Status events for a source until it is ready or failed"""
+        
+        # Subscribe before reading the status so the final event can't slip in between
+        events = ingestion_queue.subscribe(source_id)
+        try:
+            status = await self.get_source_status(source_id)
+            if status is None:
+                return
+            yield {"event": "status", **status.model_dump(mode="json")}
+            if status.status in TERMINAL_STATUSES or not ingestion_queue.is_pending(source_id):
+                return
+            
+            while True:
+                event = await events.get()
+                yield event
+                if event["event"] == "done":
+                    return
+        finally:
+            ingestion_queue.unsubscribe(source_id, events)
     
-    def remove_source(self, source_id: str) -> bool:
-        """Remove source"""
-        if source_id in self.sources:
-            del self.sources[source_id]
+    def iter_source_content(self, source_id: str) -> AsyncIterator[str]:
+        """Stream one source's content"""
+        return self.store.iter_content(source_id)
+    
+    async def remove_source(self, source_id: str) -> Optional[int]:
+        """
+        Remove source (drops one owner reference; deleted when none are left)
+        Returns the references still held (0 once deleted), or None if there is no such source
+        """
+        remaining = await self.store.release(source_id)
+        if remaining == 0:
             logger.info(f"🗑️ Removed source: {source_id}")
-            return True
-        return False
+        elif remaining is not None:
+            logger.info(f"🔗 Released source: {source_id} ({remaining} references left)")
+        return remaining
     
-    def get_combined_content(self, source_ids: Optional[List[str]] = None) -> str:
+    async def get_combined_content(self, source_ids: Optional[List[str]] = None) -> str:
         """Get combined content from multiple sources"""
         
         if source_ids:
-            sources = [self.sources[sid] for sid in source_ids if sid in self.sources]
+            sources = [await self.store.get(sid) for sid in source_ids]
+            sources = [s for s in sources if s is not None]
         else:
-            sources = list(self.sources.values())
+            sources = await self.store.list()
         
         # Filter ready sources
         ready_sources = [s for s in sources if s.status == "ready"]
@@ -153,9 +397,56 @@ class SourceManager:
         
         return combined
     
-    def _generate_id(self, text: str) -> str:
-        """Generate unique ID for source"""
-        return hashlib.md5(f"{text}{datetime.now()}".encode()).hexdigest()[:12]
+    async def _reuse_source(self, source_id: str, title: Optional[str] = None, owner: bool = False) -> Optional[Source]:
+        """Return the existing ready source for this id, recording the new title (and owner)"""
+        
+        source = await self.store.get(source_id)
+        if source is None or source.status != "ready":
+            return None
+        
+        # Keep the other names this content was added under as aliases
+        if title and title != source.title and title not in source.metadata.get("aliases", []):
+            await self.store.add_alias(source_id, title)
+        
+        await self._claim(source, owner)
+        logger.info(f"♻️ Reusing source: {source_id}")
+        
+        return source
+    
+    async def _enqueue(self, source: Source, job, callback_url: Optional[str]) -> None:
+        """Hand a processing source to the ingestion queue; when it is full the source is marked failed"""
+        try:
+            ingestion_queue.submit(source.id, job, callback_url)
+        except asyncio.QueueFull:
+            source.status = "error"
+            source.metadata["error"] = "Ingestion queue is full; try again later"
+            await self.store.save(source)
+            logger.warning(f"⚠️ Ingestion queue full, rejected source: {source.id}")
+            raise
+    
+    async def _claim(self, source: Optional[Source], owner: bool) -> Optional[Source]:
+        """Count an owner reference, or just extend the TTL for internal use"""
+        if source is None:
+            return None
+        if owner:
+            refs = await self.store.add_reference(source.id)
+            if refs is not None:
+                source.ref_count = refs
+        else:
+            await self.store.touch(source.id)
+        return source
+    
+    def _normalize_url(self, url: str) -> str:
+        """Canonical form of a URL for identity (case-insensitive host, no fragment)"""
+        parts = urlsplit(url.strip())
+        path = parts.path.rstrip("/") or "/"
+        return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, parts.query, ""))
+    
+    def _generate_id(self, key: Union[str, bytes]) -> str:
+        """Generate content-derived ID for source (same input -> same source)"""
+        if isinstance(key, str):
+            key = key.encode("utf-8", "surrogatepass")
+        return hashlib.sha256(key).hexdigest()[:16]
 
 # Global instance
 source_manager = SourceManager()
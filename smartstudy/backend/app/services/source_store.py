@@ -0,0 +1,587 @@
+"""
+Source Store - Persistent, bounded storage for content sources
+Metadata and content live in MongoDB (or a local SQLite file when MongoDB
+is unavailable), so sources survive restarts and are shared by all workers.
+Content is stored once per content hash; hot sources are kept in an LRU.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+
+from app.config import settings
+from app.models.source import Source, SourceStatus, SourceSummary
+from app.utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+def content_hash(content: str) -> str:
+    """Digest used to store (and share) source content"""
+    return hashlib.sha256(content.encode("utf-8", "surrogatepass")).hexdigest()
+
+SUMMARY_FIELDS = ("id", "type", "title", "word_count", "status", "created_at")
+
+class _SQLiteBackend:
+    """Local SQLite storage, shared by workers on the same host"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS sources (
+                    id TEXT PRIMARY KEY,
+                    type TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    metadata TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    word_count INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    content_hash TEXT,
+                    ref_count INTEGER NOT NULL DEFAULT 1,
+                    expires_at REAL NOT NULL
+                )"""
+            )
+            columns = [row["name"] for row in conn.execute("PRAGMA table_info(sources)")]
+            if "ref_count" not in columns:
+                conn.execute("ALTER TABLE sources ADD COLUMN ref_count INTEGER NOT NULL DEFAULT 1")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS source_contents (
+                    hash TEXT PRIMARY KEY,
+                    content TEXT NOT NULL,
+                    size INTEGER NOT NULL
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sources_expires ON sources(expires_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sources_hash ON sources(content_hash)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sources_created ON sources(created_at)")
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+    
+    def _run(self, fn, *args):
+        def call():
+            conn = self._connect()
+            try:
+                with conn:
+                    return fn(conn, *args)
+            finally:
+                conn.close()
+        return asyncio.to_thread(call)
+    
+    @staticmethod
+    def _to_doc(row: sqlite3.Row) -> Dict:
+        doc = dict(row)
+        doc["metadata"] = json.loads(doc["metadata"])
+        doc["created_at"] = datetime.fromisoformat(doc["created_at"])
+        return doc
+    
+    async def put_source(self, doc: Dict) -> None:
+        def op(conn, doc):
+            # ref_count is only set on insert; afterwards only add_refs changes it
+            conn.execute(
+                """INSERT INTO sources
+                   (id, type, title, metadata, created_at, word_count, status, content_hash, ref_count, expires_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(id) DO UPDATE SET
+                       type = excluded.type, title = excluded.title, metadata = excluded.metadata,
+                       created_at = excluded.created_at, word_count = excluded.word_count,
+                       status = excluded.status, content_hash = excluded.content_hash,
+                       expires_at = excluded.expires_at""",
+                (
+                    doc["id"], doc["type"], doc["title"], json.dumps(doc["metadata"], default=str),
+                    doc["created_at"].isoformat(), doc["word_count"], doc["status"],
+                    doc["content_hash"], doc["ref_count"], doc["expires_at"]
+                )
+            )
+        await self._run(op, doc)
+    
+    async def put_content(self, digest: str, content: str) -> None:
+        def op(conn, digest, content):
+            conn.execute(
+                "INSERT OR IGNORE INTO source_contents (hash, content, size) VALUES (?, ?, ?)",
+                (digest, content, len(content))
+            )
+        await self._run(op, digest, content)
+    
+    async def get_source(self, source_id: str) -> Optional[Dict]:
+        def op(conn, source_id):
+            row = conn.execute("SELECT * FROM sources WHERE id = ?", (source_id,)).fetchone()
+            return self._to_doc(row) if row else None
+        return await self._run(op, source_id)
+    
+    async def get_content(self, digest: str) -> Optional[str]:
+        def op(conn, digest):
+            row = conn.execute("SELECT content FROM source_contents WHERE hash = ?", (digest,)).fetchone()
+            return row["content"] if row else None
+        return await self._run(op, digest)
+    
+    async def add_refs(self, source_id: str, delta: int, expires_at: float) -> Optional[int]:
+        def op(conn, source_id, delta, expires_at):
+            conn.execute(
+                "UPDATE sources SET ref_count = ref_count + ?, expires_at = MAX(expires_at, ?) WHERE id = ?",
+                (delta, expires_at, source_id)
+            )
+            row = conn.execute("SELECT ref_count FROM sources WHERE id = ?", (source_id,)).fetchone()
+            return row["ref_count"] if row else None
+        return await self._run(op, source_id, delta, expires_at)
+    
+    async def add_alias(self, source_id: str, alias: str) -> None:
+        def op(conn, source_id, alias):
+            row = conn.execute("SELECT metadata FROM sources WHERE id = ?", (source_id,)).fetchone()
+            if not row:
+                return
+            metadata = json.loads(row["metadata"])
+            aliases = metadata.setdefault("aliases", [])
+            if alias not in aliases:
+                aliases.append(alias)
+                conn.execute("UPDATE sources SET metadata = ? WHERE id = ?", (json.dumps(metadata, default=str), source_id))
+        await self._run(op, source_id, alias)
+    
+    async def list_sources(self) -> List[Dict]:
+        def op(conn):
+            rows = conn.execute("SELECT * FROM sources ORDER BY created_at DESC, id DESC").fetchall()
+            return [self._to_doc(row) for row in rows]
+        return await self._run(op)
+    
+    async def list_summaries(
+        self,
+        limit: int,
+        after: Optional[Tuple[datetime, str]],
+        source_type: Optional[str],
+        status: Optional[str]
+    ) -> List[Dict]:
+        def op(conn):
+            clauses, params = [], []
+            if after:
+                clauses.append("(created_at < ? OR (created_at = ? AND id < ?))")
+                params += [after[0].isoformat(), after[0].isoformat(), after[1]]
+            if source_type:
+                clauses.append("type = ?")
+                params.append(source_type)
+            if status:
+                clauses.append("status = ?")
+                params.append(status)
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+            rows = conn.execute(
+                f"SELECT {', '.join(SUMMARY_FIELDS)} FROM sources {where} "
+                "ORDER BY created_at DESC, id DESC LIMIT ?",
+                params + [limit]
+            ).fetchall()
+            docs = [dict(row) for row in rows]
+            for doc in docs:
+                doc["created_at"] = datetime.fromisoformat(doc["created_at"])
+            return docs
+        return await self._run(op)
+    
+    async def delete_source(self, source_id: str) -> bool:
+        def op(conn, source_id):
+            row = conn.execute("SELECT content_hash FROM sources WHERE id = ?", (source_id,)).fetchone()
+            if not row:
+                return False
+            conn.execute("DELETE FROM sources WHERE id = ?", (source_id,))
+            self._delete_orphans(conn, [row["content_hash"]])
+            return True
+        return await self._run(op, source_id)
+    
+    async def fail_processing(self, worker_id: str, created_before: datetime, error: str) -> int:
+        def op(conn, worker_id, created_before, error):
+            rows = conn.execute("SELECT id, metadata, created_at FROM sources WHERE status = 'processing'").fetchall()
+            failed = 0
+            for row in rows:
+                metadata = json.loads(row["metadata"])
+                if metadata.get("ingest_worker") != worker_id and row["created_at"] >= created_before.isoformat():
+                    continue
+                metadata["error"] = error
+                conn.execute(
+                    "UPDATE sources SET status = 'error', metadata = ? WHERE id = ?",
+                    (json.dumps(metadata, default=str), row["id"])
+                )
+                failed += 1
+            return failed
+        return await self._run(op, worker_id, created_before, error)
+    
+    async def purge_expired(self, now: float) -> int:
+        def op(conn, now):
+            rows = conn.execute("SELECT id, content_hash FROM sources WHERE expires_at <= ?", (now,)).fetchall()
+            if not rows:
+                return 0
+            conn.execute("DELETE FROM sources WHERE expires_at <= ?", (now,))
+            self._delete_orphans(conn, [row["content_hash"] for row in rows])
+            return len(rows)
+        return await self._run(op, now)
+    
+    @staticmethod
+    def _delete_orphans(conn: sqlite3.Connection, digests: List[Optional[str]]) -> None:
+        for digest in set(d for d in digests if d):
+            in_use = conn.execute("SELECT 1 FROM sources WHERE content_hash = ? LIMIT 1", (digest,)).fetchone()
+            if not in_use:
+                conn.execute("DELETE FROM source_contents WHERE hash = ?", (digest,))
+
+class _MongoBackend:
+    """MongoDB storage, shared by all workers and hosts"""
+    
+    def __init__(self, database):
+        self.sources = database["sources"]
+        self.contents = database["source_contents"]
+        self._indexes_ready = False
+    
+    async def _ensure_indexes(self) -> None:
+        if self._indexes_ready:
+            return
+        await self.sources.create_index("expires_at")
+        await self.sources.create_index("content_hash")
+        await self.sources.create_index([("created_at", -1), ("_id", -1)])
+        self._indexes_ready = True
+    
+    @staticmethod
+    def _to_doc(record: Dict) -> Dict:
+        doc = dict(record)
+        doc["id"] = doc.pop("_id")
+        return doc
+    
+    async def put_source(self, doc: Dict) -> None:
+        await self._ensure_indexes()
+        record = dict(doc)
+        source_id = record.pop("id")
+        ref_count = record.pop("ref_count")
+        # ref_count is only set on insert; afterwards only add_refs changes it
+        await self.sources.update_one(
+            {"_id": source_id},
+            {"$set": record, "$setOnInsert": {"ref_count": ref_count}},
+            upsert=True
+        )
+    
+    async def put_content(self, digest: str, content: str) -> None:
+        await self.contents.update_one(
+            {"_id": digest},
+            {"$setOnInsert": {"content": content, "size": len(content)}},
+            upsert=True
+        )
+    
+    async def get_source(self, source_id: str) -> Optional[Dict]:
+        record = await self.sources.find_one({"_id": source_id})
+        return self._to_doc(record) if record else None
+    
+    async def get_content(self, digest: str) -> Optional[str]:
+        record = await self.contents.find_one({"_id": digest}, {"content": 1})
+        return record["content"] if record else None
+    
+    async def add_refs(self, source_id: str, delta: int, expires_at: float) -> Optional[int]:
+        record = await self.sources.find_one_and_update(
+            {"_id": source_id},
+            {"$inc": {"ref_count": delta}, "$max": {"expires_at": expires_at}},
+            projection={"ref_count": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        return record["ref_count"] if record else None
+    
+    async def add_alias(self, source_id: str, alias: str) -> None:
+        await self.sources.update_one({"_id": source_id}, {"$addToSet": {"metadata.aliases": alias}})
+    
+    async def list_sources(self) -> List[Dict]:
+        cursor = self.sources.find().sort([("created_at", -1), ("_id", -1)])
+        return [self._to_doc(record) async for record in cursor]
+    
+    async def list_summaries(
+        self,
+        limit: int,
+        after: Optional[Tuple[datetime, str]],
+        source_type: Optional[str],
+        status: Optional[str]
+    ) -> List[Dict]:
+        query: Dict = {}
+        if after:
+            query["$or"] = [
+                {"created_at": {"$lt": after[0]}},
+                {"created_at": after[0], "_id": {"$lt": after[1]}}
+            ]
+        if source_type:
+            query["type"] = source_type
+        if status:
+            query["status"] = status
+        projection = {field: 1 for field in SUMMARY_FIELDS if field != "id"}
+        cursor = self.sources.find(query, projection).sort([("created_at", -1), ("_id", -1)]).limit(limit)
+        return [self._to_doc(record) async for record in cursor]
+    
+    async def delete_source(self, source_id: str) -> bool:
+        record = await self.sources.find_one_and_delete({"_id": source_id})
+        if not record:
+            return False
+        await self._delete_orphans([record.get("content_hash")])
+        return True
+    
+    async def fail_processing(self, worker_id: str, created_before: datetime, error: str) -> int:
+        result = await self.sources.update_many(
+            {
+                "status": "processing",
+                "$or": [{"metadata.ingest_worker": worker_id}, {"created_at": {"$lt": created_before}}]
+            },
+            {"$set": {"status": "error", "metadata.error": error}}
+        )
+        return result.modified_count
+    
+    async def purge_expired(self, now: float) -> int:
+        expired = [record async for record in self.sources.find({"expires_at": {"$lte": now}}, {"content_hash": 1})]
+        if not expired:
+            return 0
+        await self.sources.delete_many({"_id": {"$in": [record["_id"] for record in expired]}})
+        await self._delete_orphans([record.get("content_hash") for record in expired])
+        return len(expired)
+    
+    async def _delete_orphans(self, digests: List[Optional[str]]) -> None:
+        for digest in set(d for d in digests if d):
+            if not await self.sources.find_one({"content_hash": digest}, {"_id": 1}):
+                await self.contents.delete_one({"_id": digest})
+
+class SourceStore:
+    """Persistent source storage with an in-memory LRU of hot sources"""
+    
+    def __init__(self):
+        self._backend = None
+        self._cleanup_task: Optional[asyncio.Task] = None
+        self.ttl = settings.SOURCE_TTL_SECONDS
+        # Only finished sources are cached; the short TTL bounds staleness across workers
+        self.cache = LRUCache(
+            max_bytes=settings.SOURCE_CACHE_MAX_BYTES,
+            ttl=settings.SOURCE_CACHE_TTL_SECONDS,
+            sizeof=lambda source: len(source.content) + 512
+        )
+    
+    def configure(self, database=None) -> None:
+        """Use MongoDB when a database is available, otherwise a local SQLite file"""
+        if database is not None:
+            self._backend = _MongoBackend(database)
+            logger.info("📦 Source store: MongoDB")
+        else:
+            self._backend = _SQLiteBackend(settings.SOURCE_STORE_PATH)
+            logger.info(f"📦 Source store: SQLite ({settings.SOURCE_STORE_PATH})")
+        self.cache.clear()
+    
+    @property
+    def backend(self):
+        if self._backend is None:
+            self.configure()
+        return self._backend
+    
+    async def save(self, source: Source) -> Source:
+        """Insert or update a source; its content is stored once per content hash"""
+        
+        if source.content:
+            source.content_hash = content_hash(source.content)
+            await self.backend.put_content(source.content_hash, source.content)
+        
+        doc = source.model_dump(exclude={"content"})
+        doc["type"] = source.type.value
+        doc["expires_at"] = time.time() + self.ttl
+        await self.backend.put_source(doc)
+        
+        if source.status == "processing":
+            self.cache.pop(source.id)
+        else:
+            self.cache.set(source.id, source)
+        
+        return source
+    
+    async def get(self, source_id: str) -> Optional[Source]:
+        """Get a source with its content"""
+        
+        source = self.cache.get(source_id)
+        if source is not None:
+            return source
+        
+        doc = await self.backend.get_source(source_id)
+        if doc is None:
+            return None
+        
+        source = await self._load(doc)
+        if source.status != "processing":
+            self.cache.set(source_id, source)
+        return source
+    
+    async def list(self) -> List[Source]:
+        """All sources, newest first"""
+        docs = await self.backend.list_sources()
+        return [await self._load(doc) for doc in docs]
+    
+    async def list_summaries(
+        self,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        source_type: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> Tuple[List[SourceSummary], Optional[str]]:
+        """
+        One page of source summaries, newest first, without loading content.
+        Returns the page and the cursor for the next one (None on the last page).
+        """
+        docs = await self.backend.list_summaries(limit + 1, self._decode_cursor(cursor), source_type, status)
+        summaries = [SourceSummary(**{field: doc[field] for field in SUMMARY_FIELDS}) for doc in docs[:limit]]
+        next_cursor = None
+        if len(docs) > limit:
+            last = summaries[-1]
+            next_cursor = self._encode_cursor(last.created_at, last.id)
+        return summaries, next_cursor
+    
+    async def get_summary(self, source_id: str) -> Optional[SourceSummary]:
+        """Get a source's summary without loading its content"""
+        source = self.cache.get(source_id)
+        doc = source.model_dump() if source is not None else await self.backend.get_source(source_id)
+        if doc is None:
+            return None
+        return SourceSummary(**{field: doc[field] for field in SUMMARY_FIELDS})
+    
+    async def get_status(self, source_id: str) -> Optional[SourceStatus]:
+        """Get a source's status (always read through, so other workers' updates show)"""
+        doc = await self.backend.get_source(source_id)
+        if doc is None:
+            return None
+        return SourceStatus(
+            **{field: doc[field] for field in SUMMARY_FIELDS},
+            error=doc["metadata"].get("error")
+        )
+    
+    async def iter_content(self, source_id: str, chunk_chars: int = 65536) -> AsyncIterator[str]:
+        """
+        Stream a source's content in chunks.
+        The content is read from the backend once (offset reads re-scan it
+        for every chunk) and sliced in memory; it is not added to the cache.
+        """
+        cached = self.cache.get(source_id)
+        if cached is not None:
+            content = cached.content
+        else:
+            doc = await self.backend.get_source(source_id)
+            digest = doc.get("content_hash") if doc else None
+            content = await self.backend.get_content(digest) if digest else None
+        
+        for start in range(0, len(content or ""), chunk_chars):
+            yield content[start:start + chunk_chars]
+    
+    async def delete(self, source_id: str) -> bool:
+        """Delete a source (and its content once nothing references it)"""
+        self.cache.pop(source_id)
+        return await self.backend.delete_source(source_id)
+    
+    async def add_reference(self, source_id: str) -> Optional[int]:
+        """Count another owner of an existing source and extend its TTL"""
+        refs = await self.backend.add_refs(source_id, 1, time.time() + self.ttl)
+        cached = self.cache.get(source_id)
+        if cached is not None and refs is not None:
+            cached.ref_count = refs
+        return refs
+    
+    async def touch(self, source_id: str) -> None:
+        """Extend a source's TTL without counting an owner (e.g. reused by a quiz request)"""
+        await self.backend.add_refs(source_id, 0, time.time() + self.ttl)
+    
+    async def add_alias(self, source_id: str, alias: str) -> None:
+        """Record another title the content was added under (only the metadata is written)"""
+        await self.backend.add_alias(source_id, alias)
+        cached = self.cache.get(source_id)
+        if cached is not None:
+            aliases = cached.metadata.setdefault("aliases", [])
+            if alias not in aliases:
+                aliases.append(alias)
+    
+    async def release(self, source_id: str) -> Optional[int]:
+        """
+        Drop one reference; the source is deleted when none are left.
+        Returns the references remaining (0 once deleted), or None if there is no such source.
+        """
+        refs = await self.backend.add_refs(source_id, -1, 0)
+        if refs is None:
+            self.cache.pop(source_id)
+            return None
+        if refs <= 0:
+            await self.delete(source_id)
+            return 0
+        cached = self.cache.get(source_id)
+        if cached is not None:
+            cached.ref_count = refs
+        return refs
+    
+    async def purge_expired(self) -> int:
+        """Delete sources past their TTL"""
+        removed = await self.backend.purge_expired(time.time())
+        if removed:
+            self.cache.clear()
+            logger.info(f"🧹 Purged {removed} expired sources")
+        return removed
+    
+    async def fail_interrupted(self, worker_id: str, created_before: datetime) -> int:
+        """
+        Mark sources left "processing" by a restart as failed (their ingestion
+        jobs lived in memory and are gone): those queued by this worker, and
+        any queued before `created_before`, which no live worker would still be running
+        """
+        failed = await self.backend.fail_processing(
+            worker_id,
+            created_before,
+            "Ingestion was interrupted by a server restart; add the source again"
+        )
+        if failed:
+            logger.warning(f"⚠️ Marked {failed} interrupted sources as failed")
+        return failed
+    
+    def start_cleanup(self) -> None:
+        """Start the periodic TTL cleanup task"""
+        if self._cleanup_task is None or self._cleanup_task.done():
+            self._cleanup_task = asyncio.create_task(self._cleanup_loop())
+    
+    async def stop_cleanup(self) -> None:
+        if self._cleanup_task is not None:
+            self._cleanup_task.cancel()
+            try:
+                await self._cleanup_task
+            except asyncio.CancelledError:
+                pass
+            self._cleanup_task = None
+    
+    async def _cleanup_loop(self) -> None:
+        while True:
+            try:
+                await self.purge_expired()
+            except Exception as e:
+                logger.error(f"❌ Source cleanup failed: {e}")
+            await asyncio.sleep(settings.SOURCE_CLEANUP_INTERVAL_SECONDS)
+    
+    @staticmethod
+    def _encode_cursor(created_at: datetime, source_id: str) -> str:
+        raw = f"{created_at.isoformat()}|{source_id}".encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+    
+    @staticmethod
+    def _decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, str]]:
+        if not cursor:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+            created_at, source_id = raw.split("|", 1)
+            return datetime.fromisoformat(created_at), source_id
+        except Exception:
+            raise ValueError("Invalid cursor")
+    
+    async def _load(self, doc: Dict) -> Source:
+        digest = doc.get("content_hash")
+        content = ""
+        if digest:
+            content = await self.backend.get_content(digest) or ""
+        fields = {key: value for key, value in doc.items() if key in Source.model_fields}
+        return Source(content=content, **fields)
+
+# Global instance
+source_store = SourceStore()
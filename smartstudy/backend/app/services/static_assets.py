@@ -0,0 +1,172 @@
+"""
+Static Assets - Third-party page scripts vendored under versioned paths
+
+The visual roadmap page needs d3 and markmap-view. `python -m app.services.static_assets`
+downloads them once into app/static/vendor/<name>@<version>/ and writes
+pre-compressed .gz (and .br, when brotli is installed) variants next to them.
+Vendored files are served with immutable cache headers; assets that are not
+vendored yet are referenced from their CDN instead.
+"""
+import gzip
+import logging
+import os
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False  # Only .gz variants are written (pip install brotli for .br)
+
+VENDOR_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static", "vendor")
+VENDOR_URL_PATH = "/static/vendor"
+
+# Paths carry the version, so a cached file never changes
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Pre-compressed variants, in order of preference
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+class VendorAsset:
+    """One pinned third-party file"""
+    
+    def __init__(self, name: str, version: str, filename: str, cdn_url: str):
+        self.name = name
+        self.version = version
+        self.filename = filename
+        self.cdn_url = cdn_url
+    
+    @property
+    def path(self) -> str:
+        """Versioned path under the vendor directory / URL"""
+        return f"{self.name}@{self.version}/{self.filename}"
+
+# Template slot -> asset (keep versions in step with app/templates/markmap.html)
+VENDOR_ASSETS: Dict[str, VendorAsset] = {
+    "d3_src": VendorAsset(
+        "d3", "7.8.5", "d3.min.js",
+        "https://cdnjs.cloudflare.com/ajax/libs/d3/7.8.5/d3.min.js"
+    ),
+    "markmap_view_src": VendorAsset(
+        "markmap-view", "0.15.3", "index.js",
+        "https://cdn.jsdelivr.net/npm/markmap-view@0.15.3/dist/browser/index.js"
+    ),
+}
+
+def accepted_encodings(accept_encoding: Optional[str]) -> set:
+    """Content codings a client accepts (q=0 excluded)"""
+    accepted = set()
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.strip().lower().partition(";")
+        quality = params.strip().removeprefix("q=")
+        try:
+            if params and float(quality) <= 0:
+                continue
+        except ValueError:
+            continue
+        if coding:
+            accepted.add(coding.strip())
+    return accepted
+
+class StaticAssets:
+    """
+    Vendored copies of VENDOR_ASSETS: which are present, their page URLs,
+    and the best pre-compressed variant for a request.
+    """
+    
+    def __init__(self):
+        self._assets = {asset.path: asset for asset in VENDOR_ASSETS.values()}
+        self._present: Dict[str, bool] = {}
+    
+    @property
+    def directory(self) -> str:
+        return settings.STATIC_VENDOR_DIR or VENDOR_DIR
+    
+    def local_file(self, asset: VendorAsset) -> str:
+        return os.path.join(self.directory, asset.name + "@" + asset.version, asset.filename)
+    
+    def is_vendored(self, asset: VendorAsset) -> bool:
+        """Checked once per process (vendoring happens at deploy time)"""
+        if asset.path not in self._present:
+            self._present[asset.path] = os.path.isfile(self.local_file(asset))
+        return self._present[asset.path]
+    
+    def refresh(self) -> None:
+        self._present.clear()
+    
+    def script_srcs(self, base_url: Optional[str] = None) -> Dict[str, str]:
+        """
+        Template slot -> script URL. Vendored assets get an absolute URL on this
+        server: the page is opened from its GET URL here, but the HTML returned by
+        POST /generate-visual-roadmap may be shown from another origin. Without a
+        base URL, or when not vendored, the CDN is used.
+        """
+        base_url = (settings.STATIC_ASSETS_BASE_URL or base_url or "").rstrip("/")
+        srcs = {}
+        for slot, asset in VENDOR_ASSETS.items():
+            if base_url and not settings.STATIC_ASSETS_USE_CDN and self.is_vendored(asset):
+                srcs[slot] = f"{base_url}{VENDOR_URL_PATH}/{asset.path}"
+            else:
+                srcs[slot] = asset.cdn_url
+        return srcs
+    
+    def resolve(self, path: str, accept_encoding: Optional[str] = None) -> Optional[Tuple[str, Optional[str]]]:
+        """(file, content coding) to send for a vendored path, or None if unknown/not vendored"""
+        asset = self._assets.get(path)
+        if asset is None or not self.is_vendored(asset):
+            return None
+        
+        file = self.local_file(asset)
+        accepted = accepted_encodings(accept_encoding)
+        for coding, suffix in ENCODINGS:
+            if (coding in accepted or "*" in accepted) and os.path.isfile(file + suffix):
+                return file + suffix, coding
+        return file, None
+    
+    def vendor(self, fetch: Optional[Callable[[str], bytes]] = None) -> List[str]:
+        """Download every asset and write its compressed variants; returns the files written"""
+        if fetch is None:
+            fetch = _download
+        
+        written = []
+        for asset in VENDOR_ASSETS.values():
+            data = fetch(asset.cdn_url)
+            file = self.local_file(asset)
+            os.makedirs(os.path.dirname(file), exist_ok=True)
+            
+            variants = [(file, data), (file + ".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+            if BROTLI_AVAILABLE:
+                variants.append((file + ".br", brotli.compress(data, quality=11)))
+            for path, content in variants:
+                _write_atomic(path, content)
+                written.append(path)
+            logger.info(f"📦 Vendored {asset.path} ({len(data)} bytes)")
+        
+        if not BROTLI_AVAILABLE:
+            logger.warning("⚠️ brotli not installed; only gzip variants were written")
+        self.refresh()
+        return written
+
+def _download(url: str) -> bytes:
+    import httpx
+    response = httpx.get(url, follow_redirects=True, timeout=30.0)
+    response.raise_for_status()
+    return response.content
+
+def _write_atomic(path: str, content: bytes) -> None:
+    partial = path + ".part"
+    with open(partial, "wb") as f:
+        f.write(content)
+    os.replace(partial, path)
+
+# Global instance
+static_assets = StaticAssets()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    for path in static_assets.vendor():
+        print(path)
@@ -1,20 +1,64 @@
 """
 URL Fetcher - Extract content from web pages
 """
+import asyncio
 import httpx
 import logging
-from typing import Tuple, Optional
-from bs4 import BeautifulSoup
+import time
+from typing import Dict, List, Tuple, Optional
+from lxml import etree, html as lxml_html
 import re
+from app.config import settings
+from app.utils.cache import LRUCache
 
 logger = logging.getLogger(__name__)
 
+# Content types we parse as HTML
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "application/xml", "text/xml")
+
+# Dropped before extraction (with their subtrees)
+SKIPPED_TAGS = ('script', 'style', 'nav', 'header', 'footer', 'aside', 'iframe', 'noscript')
+
+# Elements whose text is kept
+TEXT_TAGS = frozenset(('p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li'))
+
+CONTENT_CLASS = re.compile(r'content|article|post|entry', re.I)
+
 class URLFetcher:
     """Fetch and extract content from URLs"""
     
     def __init__(self):
         self.timeout = 30.0
         self.user_agent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+        self._client: Optional[httpx.AsyncClient] = None
+        
+        # url -> extracted text plus the validators needed to revalidate it
+        self.cache = LRUCache(
+            max_bytes=settings.URL_CACHE_MAX_BYTES,
+            ttl=settings.URL_CACHE_MAX_AGE_SECONDS,
+            sizeof=lambda entry: len(entry["content"])
+        )
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared client, so connections (and TLS sessions) are pooled across fetches"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                follow_redirects=True,
+                headers={"User-Agent": self.user_agent},
+                limits=httpx.Limits(
+                    max_connections=settings.URL_FETCH_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.URL_FETCH_MAX_CONNECTIONS
+                )
+            )
+        return self._client
+    
+    async def close(self) -> None:
+        """Close the shared client (on shutdown)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
     
     async def fetch_url(self, url: str) -> Tuple[str, Optional[str]]:
         """
@@ -28,11 +72,32 @@ class URLFetcher:
         if not self._is_valid_url(url):
             raise ValueError(f"Invalid URL: {url}")
         
-        # Fetch page
-        html = await self._fetch_html(url)
+        # Recently extracted: no request at all
+        cached = self.cache.get(url)
+        if cached and time.monotonic() - cached["fetched_at"] < settings.URL_CACHE_FRESH_SECONDS:
+            logger.info(f"⚡ Cache hit for {url}")
+            return cached["content"], cached["title"]
+        
+        # Fetch page (conditional when we have validators)
+        fetched = await self._fetch_html(url, cached)
         
-        # Extract content
-        content, title = self._extract_content(html)
+        if fetched is None:
+            logger.info(f"♻️ Not modified: {url}")
+            cached["fetched_at"] = time.monotonic()
+            self.cache.set(url, cached)
+            return cached["content"], cached["title"]
+        
+        html, validators = fetched
+        
+        # Extract content (lxml releases the GIL, keep it off the event loop)
+        content, title = await asyncio.to_thread(self._extract_content, html)
+        
+        self.cache.set(url, {
+            "content": content,
+            "title": title,
+            "fetched_at": time.monotonic(),
+            **validators
+        })
         
         logger.info(f"✅ Extracted {len(content)} chars from {url}")
         
@@ -50,82 +115,122 @@ class URLFetcher:
         
         return url_pattern.match(url) is not None
     
-    async def _fetch_html(self, url: str) -> str:
-        """Fetch HTML from URL"""
+    async def _fetch_html(self, url: str, cached: Optional[Dict] = None) -> Optional[Tuple[str, Dict]]:
+        """
+        Fetch HTML from URL
+        Returns (html, validators), or None when the cached copy is still current (304)
+        """
         
         headers = {
-            "User-Agent": self.user_agent,
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
             "Accept-Language": "en-US,en;q=0.5",
         }
-        
-        async with httpx.AsyncClient(timeout=self.timeout, follow_redirects=True) as client:
-            response = await client.get(url, headers=headers)
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+        
+        async with self.client.stream("GET", url, headers=headers) as response:
+            if response.status_code == 304 and cached:
+                return None
             
             if response.status_code != 200:
                 raise Exception(f"HTTP {response.status_code}: {url}")
             
-            return response.text
+            content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+            if content_type and content_type not in HTML_CONTENT_TYPES:
+                raise ValueError(f"Unsupported content type: {content_type}")
+            
+            max_bytes = settings.URL_FETCH_MAX_BYTES
+            declared = response.headers.get("content-length")
+            if declared and declared.isdigit() and int(declared) > max_bytes:
+                raise ValueError(f"Page too large: {declared} bytes (limit {max_bytes})")
+            
+            # Stream the body and stop as soon as it passes the limit
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body.extend(chunk)
+                if len(body) > max_bytes:
+                    raise ValueError(f"Page too large: more than {max_bytes} bytes")
+            
+            validators = {}
+            if response.headers.get("etag"):
+                validators["etag"] = response.headers["etag"]
+            if response.headers.get("last-modified"):
+                validators["last_modified"] = response.headers["last-modified"]
+            
+            return bytes(body).decode(response.charset_encoding or "utf-8", errors="replace"), validators
     
     def _extract_content(self, html: str) -> Tuple[str, Optional[str]]:
-        """Extract main content from HTML"""
+        """
+        Extract main content from HTML
+        Container preference: article, main, content-like div, body
+        """
         
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        # Extract title
-        title = None
-        title_tag = soup.find('title')
-        if title_tag:
-            title = title_tag.get_text().strip()
+        try:
+            root = lxml_html.document_fromstring(
+                html.encode("utf-8"),
+                parser=lxml_html.HTMLParser(encoding="utf-8", remove_comments=True)
+            )
+        except (etree.ParserError, ValueError):
+            return "", None
         
         # Remove unwanted elements
-        for element in soup(['script', 'style', 'nav', 'header', 'footer', 'aside', 'iframe', 'noscript']):
-            element.decompose()
-        
-        # Try to find main content
-        main_content = None
-        
-        # Strategy 1: Look for article tag
-        article = soup.find('article')
-        if article:
-            main_content = article
-        
-        # Strategy 2: Look for main tag
-        if not main_content:
-            main = soup.find('main')
-            if main:
-                main_content = main
-        
-        # Strategy 3: Look for content div
-        if not main_content:
-            content_divs = soup.find_all('div', class_=re.compile(r'content|article|post|entry', re.I))
-            if content_divs:
-                main_content = content_divs[0]
-        
-        # Strategy 4: Use body
-        if not main_content:
-            main_content = soup.find('body')
-        
-        # Extract text
-        if main_content:
-            # Get all paragraphs
-            paragraphs = main_content.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li'])
-            
-            text_parts = []
-            for p in paragraphs:
-                text = p.get_text().strip()
-                if len(text) > 20:  # Only include substantial text
-                    text_parts.append(text)
-            
-            content = '\n\n'.join(text_parts)
+        etree.strip_elements(root, *SKIPPED_TAGS, with_tail=False)
+        
+        # Single walk: collect text blocks and the block range of each candidate container
+        title = None
+        blocks: List[str] = []
+        ranges: Dict[str, Tuple[int, int]] = {}
+        open_candidates: Dict[str, Tuple[object, int]] = {}
+        
+        for event, element in etree.iterwalk(root, events=("start", "end")):
+            tag = element.tag
+            if not isinstance(tag, str):
+                continue
+        
+            if event == "start":
+                if tag == 'title' and title is None:
+                    title = element.text_content().strip() or None
+                elif tag in TEXT_TAGS:
+                    text = element.text_content().strip()
+                    if len(text) > 20:  # Only include substantial text
+                        blocks.append(text)
+        
+                kind = self._container_kind(element)
+                if kind and kind not in ranges and kind not in open_candidates:
+                    open_candidates[kind] = (element, len(blocks))
+        
+            elif open_candidates:
+                for kind, (candidate, start) in list(open_candidates.items()):
+                    if candidate is element:
+                        ranges[kind] = (start, len(blocks))
+                        del open_candidates[kind]
+        
+        for kind in ('article', 'main', 'div', 'body'):
+            if kind in ranges:
+                start, end = ranges[kind]
+                content = '\n\n'.join(blocks[start:end])
+                break
         else:
-            content = soup.get_text()
+            content = root.text_content()
         
         # Clean up content
         content = self._clean_text(content)
         
         return content, title
     
+    @staticmethod
+    def _container_kind(element) -> Optional[str]:
+        """Which main-content strategy an element matches, if any"""
+        tag = element.tag
+        if tag in ('article', 'main', 'body'):
+            return tag
+        if tag == 'div' and CONTENT_CLASS.search(element.get('class', '')):
+            return 'div'
+        return None
+    
     def _clean_text(self, text: str) -> str:
         """Clean extracted text"""
         
@@ -0,0 +1,106 @@
+"""
+In-memory LRU cache with entry/size bounds and optional TTL
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+class LRUCache:
+    """
+    Least-recently-used cache bounded by entry count and/or total size.
+    
+    Entries older than `ttl` seconds are treated as missing. Sizes come from
+    `sizeof` (defaults to 1 per entry). Not thread-safe: use it from the
+    event loop only.
+    """
+    
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+        sizeof: Optional[Callable[[Any], int]] = None
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizeof = sizeof or (lambda value: 1)
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value (marking it recently used) or `default`"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        
+        value, size, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return default
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Insert or replace a value, evicting least-recently-used entries as needed"""
+        self._remove(key)
+        
+        size = self.sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return  # Larger than the whole cache; don't flush everything for it
+        
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self._entries[key] = (value, size, expires_at)
+        self._bytes += size
+        
+        while self._entries and (
+            (self.max_entries is not None and len(self._entries) > self.max_entries)
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+    
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove and return a value"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        self._remove(key)
+        return entry[0]
+    
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current usage"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+    
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and (entry[2] is None or entry[2] > time.monotonic())
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
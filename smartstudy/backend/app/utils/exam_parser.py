@@ -0,0 +1,170 @@
+"""
+Exam Parser - Single-pass, line-oriented parsing of exam keys
+"""
+import re
+from typing import Dict, List, Tuple
+
+# Each pattern is applied to one line at a time, so there is no backtracking across the document
+QUESTION_LINE = re.compile(r'(\d+)[.)]\s*(.+)')
+OPTION_LINE = re.compile(r'(?:([A-D])[.)]|\[([A-D])\])\s*(.+)')
+ANSWER_PAIR = re.compile(r'(\d+)\s*[.:)\-]?\s*([A-D])(?![A-Za-z])')
+ANSWER_LINE = re.compile(r'(?:\d+\s*[.:)\-]?\s*[A-D](?![A-Za-z])[\s,;|]*)+')
+ANSWER_HEADER = re.compile(r'(?:answer\s*key|answers|answer\s*sheet|key)\s*:?', re.I)
+
+# First characters that can start an option / an answer-key heading
+OPTION_LEADS = frozenset('ABCD[')
+HEADER_LEADS = frozenset('AaKk')
+
+# Line starts counted for exam detection (as written, without leading whitespace)
+DETECT_QUESTION = re.compile(r'\d+[.)](?:\s|$)')
+DETECT_OPTION = re.compile(r'[A-D][.)](?:\s|$)')
+
+# Bare answer lines (no "Answer Key" heading) only count as a key past this many answers
+MIN_BARE_ANSWERS = 10
+
+def parse_exam(content: str) -> Dict:
+    """
+    Parse questions, options and the answer key in one pass over the lines.
+    
+    Returns a dict with:
+      questions: [{'number', 'text', 'options': [{'letter', 'text'}]}] in document order
+      answer_key: {question number: letter} (empty if none was found)
+      question_lines / option_lines: line counts used for exam detection
+    
+    Question text runs until the first option, the next question or a blank
+    line; options are one line each and belong to the question above them.
+    """
+    return merge_exam_shards([parse_exam_shard(content)])
+
+def parse_exam_shard(text: str) -> Dict:
+    """
+    Parse one shard (or a whole document) without deciding on the answer key yet.
+    Module-level and picklable so shards can be parsed in worker processes.
+    """
+    
+    questions: List[Dict] = []
+    answers: Dict[int, str] = {}
+    question_lines = option_lines = 0
+    
+    current = None          # Question receiving options
+    collecting_text = False # Continuation lines still belong to the question text
+    in_answer_section = False
+    saw_header = False
+    
+    for raw in text.splitlines():
+        # Cheap first-character checks decide which (if any) pattern can apply
+        lead = raw[:1]
+        if lead.isdigit():
+            if DETECT_QUESTION.match(raw):
+                question_lines += 1
+        elif lead in OPTION_LEADS and DETECT_OPTION.match(raw):
+            option_lines += 1
+        
+        line = raw.strip()
+        if not line:
+            collecting_text = False
+            continue
+        
+        first = line[0]
+        if first.isdigit():
+            if ANSWER_LINE.fullmatch(line):
+                for number, letter in ANSWER_PAIR.findall(line):
+                    answers[int(number)] = letter
+                current = None
+                collecting_text = False
+                continue
+            
+            match = QUESTION_LINE.match(line)
+            if match:
+                in_answer_section = False
+                current = {'number': int(match.group(1)), 'text': match.group(2).strip(), 'options': []}
+                questions.append(current)
+                collecting_text = True
+                continue
+        
+        elif first in HEADER_LEADS and ANSWER_HEADER.fullmatch(line):
+            in_answer_section = saw_header = True
+            current = None
+            collecting_text = False
+            continue
+        
+        match = OPTION_LINE.match(line) if first in OPTION_LEADS else None
+        if match and current is not None and not in_answer_section:
+            current['options'].append({
+                'letter': match.group(1) or match.group(2),
+                'text': match.group(3).strip()
+            })
+            collecting_text = False
+            continue
+        
+        if collecting_text:
+            current['text'] += '\n' + line
+    
+    return {
+        'questions': questions,
+        'answers': answers,
+        'saw_header': saw_header,
+        'question_lines': question_lines,
+        'option_lines': option_lines
+    }
+
+def merge_exam_shards(parts: List[Dict]) -> Dict:
+    """Combine shard results (in document order) into the parse_exam result"""
+    
+    questions: List[Dict] = []
+    answers: Dict[int, str] = {}
+    for part in parts:
+        questions.extend(part['questions'])
+        answers.update(part['answers'])
+    
+    return {
+        'questions': questions,
+        'answer_key': _accept_answers(answers, any(part['saw_header'] for part in parts)),
+        'question_lines': sum(part['question_lines'] for part in parts),
+        'option_lines': sum(part['option_lines'] for part in parts)
+    }
+
+def split_exam(content: str, shard_questions: int) -> Tuple[List[str], Dict[int, str]]:
+    """
+    Split content into shards of about `shard_questions` questions, cutting only
+    at question lines, and read the answer key on the way.
+    
+    Each shard parses on its own (a question never spans two shards), and the
+    key is known before any shard is parsed, so shards can be answered as they finish.
+    """
+    
+    lines = content.splitlines()
+    shards: List[str] = []
+    answers: Dict[int, str] = {}
+    saw_header = False
+    start = 0
+    count = 0
+    
+    for i, raw in enumerate(lines):
+        line = raw.strip()
+        if not line:
+            continue
+        
+        first = line[0]
+        if first in HEADER_LEADS:
+            saw_header = saw_header or bool(ANSWER_HEADER.fullmatch(line))
+        elif not first.isdigit():
+            continue
+        elif ANSWER_LINE.fullmatch(line):
+            for number, letter in ANSWER_PAIR.findall(line):
+                answers[int(number)] = letter
+        elif QUESTION_LINE.match(line):
+            if count == shard_questions:
+                shards.append('\n'.join(lines[start:i]))
+                start = i
+                count = 0
+            count += 1
+    
+    shards.append('\n'.join(lines[start:]))
+    return shards, _accept_answers(answers, saw_header)
+
+def _accept_answers(answers: Dict[int, str], saw_header: bool) -> Dict[int, str]:
+    """Bare answer lines only form a key when there are enough of them"""
+    if not saw_header and len(answers) <= MIN_BARE_ANSWERS:
+        return {}
+    return answers
@@ -0,0 +1,145 @@
+"""
+Markmap Tree - Roadmap markdown parsed into the node tree markmap renders
+Same shape as markmap-lib's Transformer output ({content, depth, children}),
+so the page can hand it straight to Markmap.create without transforming.
+"""
+import html
+import re
+from typing import Dict, List, Optional
+
+HEADING = re.compile(r'(#{1,6})\s+(.*?)\s*#*\s*$')
+LIST_ITEM = re.compile(r'(\s*)(?:[-*+]|\d+[.)])\s+(.*)')
+FENCE = re.compile(r'\s*(```|~~~)')
+RULE = re.compile(r'\s*([-*_])(\s*\1){2,}\s*$')
+
+CODE_SPAN = re.compile(r'`([^`]+)`')
+LINK = re.compile(r'\[([^\]]+)\]\(([^)\s]+)\)')
+STRONG = re.compile(r'(\*\*|__)(.+?)\1')
+EMPHASIS = re.compile(r'(?<![\w*])\*(?!\s)(.+?)(?<!\s)\*(?!\*)')
+CHECKBOX = re.compile(r'\[([ xX])\]\s+')
+URL_SCHEME = re.compile(r'([a-zA-Z][a-zA-Z0-9+.-]*):')
+
+# Like markdown-it, links only keep safe targets (no javascript:, vbscript:, data: ...)
+SAFE_SCHEMES = ("http", "https", "mailto")
+
+def _render_link(match) -> str:
+    text, href = match.group(1), match.group(2)
+    scheme = URL_SCHEME.match(href)
+    if scheme and scheme.group(1).lower() not in SAFE_SCHEMES:
+        return text
+    return f'<a href="{href.replace(chr(34), "&quot;")}">{text}</a>'
+
+def render_inline(text: str) -> str:
+    """Inline markdown (code, links, bold, italics, task boxes) as node HTML"""
+    codes: List[str] = []
+    
+    def keep_code(match) -> str:
+        codes.append(f"<code>{html.escape(match.group(1))}</code>")
+        return f"\x00{len(codes) - 1}\x00"
+    
+    text = CODE_SPAN.sub(keep_code, text)
+    text = CHECKBOX.sub(lambda m: "☐ " if m.group(1) == " " else "☑ ", text, count=1)
+    text = html.escape(text, quote=False)
+    text = LINK.sub(_render_link, text)
+    text = STRONG.sub(r'<strong>\2</strong>', text)
+    text = EMPHASIS.sub(r'<em>\1</em>', text)
+    return re.sub(r'\x00(\d+)\x00', lambda m: codes[int(m.group(1))], text)
+
+def _node(content: str) -> Dict:
+    return {"content": content, "depth": 0, "children": []}
+
+def parse_markmap_tree(markdown: str) -> Dict:
+    """
+    Headings nest by level, list items by indentation under the current
+    heading, other text lines become leaf nodes. A document with a single
+    top-level node uses it as the root (as markmap does).
+    """
+    root = _node("")
+    headings = [(0, root)]  # (level, node)
+    items: List[tuple] = []  # (indent, node) of the open list
+    in_fence = False
+    
+    for line in markdown.splitlines():
+        if FENCE.match(line):
+            in_fence = not in_fence
+            continue
+        if in_fence or not line.strip() or RULE.match(line):
+            continue
+        
+        heading = HEADING.match(line)
+        if heading:
+            level = len(heading.group(1))
+            while headings[-1][0] >= level:
+                headings.pop()
+            node = _node(render_inline(heading.group(2)))
+            headings[-1][1]["children"].append(node)
+            headings.append((level, node))
+            items = []
+            continue
+        
+        item = LIST_ITEM.match(line)
+        indent = len(line.expandtabs(4)) - len(line.expandtabs(4).lstrip())
+        if item:
+            while items and items[-1][0] >= indent:
+                items.pop()
+            parent = items[-1][1] if items else headings[-1][1]
+            node = _node(render_inline(item.group(2).strip()))
+            parent["children"].append(node)
+            items.append((indent, node))
+        elif items and indent > items[0][0]:
+            # Wrapped list item: continues the innermost item it is indented under
+            owner = next((node for item_indent, node in reversed(items) if item_indent <= indent), items[-1][1])
+            owner["content"] += " " + render_inline(line.strip())
+        else:
+            headings[-1][1]["children"].append(_node(render_inline(line.strip())))
+            items = []
+    
+    if len(root["children"]) == 1:
+        root = root["children"][0]
+    _set_depths(root, 0)
+    return root
+
+def _set_depths(node: Dict, depth: int) -> None:
+    stack = [(node, depth)]
+    while stack:
+        current, level = stack.pop()
+        current["depth"] = level
+        stack.extend((child, level + 1) for child in current["children"])
+
+def count_nodes(tree: Dict) -> int:
+    count, stack = 0, [tree]
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack.extend(node["children"])
+    return count
+
+def find_node(tree: Dict, path: str) -> Optional[Dict]:
+    """Node at a dotted child-index path ("" is the root, "0.2" the root's first child's third child)"""
+    node = tree
+    for part in filter(None, path.split(".")):
+        if not part.isdigit() or int(part) >= len(node["children"]):
+            return None
+        node = node["children"][int(part)]
+    return node
+
+def prune_tree(node: Dict, levels: Optional[int], path: str = "") -> Dict:
+    """
+    Copy of `node` down to `levels` levels below it (None keeps everything).
+    A node whose children were cut keeps one placeholder child (so it can be
+    expanded) and `payload.lazy`, the path to load its subtree from.
+    """
+    children = node["children"]
+    pruned = {"content": node["content"], "depth": node["depth"]}
+    
+    if children and levels is not None and levels <= 0:
+        pruned["children"] = [{"content": "…", "depth": node["depth"] + 1, "children": []}]
+        pruned["payload"] = {"fold": 1, "lazy": path}
+        return pruned
+    
+    next_levels = None if levels is None else levels - 1
+    pruned["children"] = [
+        prune_tree(child, next_levels, f"{path}.{index}" if path else str(index))
+        for index, child in enumerate(children)
+    ]
+    return pruned
@@ -0,0 +1,48 @@
+"""
+Page Template - HTML shells compiled once, filled per request
+"""
+import hashlib
+import json
+import os
+import re
+from typing import Any, List
+
+# {{ name }} marks a slot; everything else is copied verbatim (CSS/JS braces need no escaping)
+SLOT = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates")
+
+class PageTemplate:
+    """
+    A template split at its slots when loaded, so rendering is a single join
+    of the static parts with the per-page values (no parsing or formatting).
+    """
+    
+    def __init__(self, text: str):
+        self._parts: List[str] = SLOT.split(text)
+        self.slots = set(self._parts[1::2])
+        self.fingerprint = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]  # Changes with the template
+    
+    @classmethod
+    def load(cls, name: str) -> "PageTemplate":
+        with open(os.path.join(TEMPLATE_DIR, name), encoding="utf-8") as f:
+            return cls(f.read())
+    
+    def render(self, **values: Any) -> str:
+        """Fill every slot; values are inserted as given (escape them for their context first)"""
+        missing = self.slots - values.keys()
+        if missing:
+            raise ValueError(f"Missing template values: {', '.join(sorted(missing))}")
+        
+        parts = list(self._parts)
+        parts[1::2] = [str(values[name]) for name in self._parts[1::2]]
+        return "".join(parts)
+
+def script_json(value: Any) -> str:
+    """Compact JSON that is safe inside an inline <script> (can't close the tag or break the line)"""
+    return (json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+            .replace("<", "\\u003c")
+            .replace(">", "\\u003e")
+            .replace("&", "\\u0026")
+            .replace("\u2028", "\\u2028")
+            .replace("\u2029", "\\u2029"))
@@ -1,5 +1,7 @@
 from fastapi import UploadFile
+from typing import AsyncIterator, Callable, Iterable, Iterator, List, Optional
 import PyPDF2
+import asyncio
 import io
 import re
 import logging
@@ -27,64 +29,32 @@ except ImportError:
 
 OCR_AVAILABLE = GOOGLE_VISION_AVAILABLE or PYTESSERACT_AVAILABLE
 
-async def extract_text_from_pdf(file: UploadFile) -> str:
-    """Extract and clean text content from uploaded PDF file"""
+# Control characters stripped from extracted text (tab, newline and CR are kept)
+_CONTROL_CHARS = dict.fromkeys(c for c in range(0x20) if c not in (0x09, 0x0a, 0x0d))
+_SPACES = re.compile(r'[ \t]+')
+
+async def extract_text_from_pdf(
+    file: UploadFile,
+    on_progress: Optional[Callable[[int], None]] = None
+) -> str:
+    """
+    Extract and clean text content from uploaded PDF file
+    on_progress, if given, is called with the number of characters extracted so far
+    """
     
     try:
-        # Read file content
-        content = await file.read()
-        logger.info(f"PDF file size: {len(content)} bytes")
-        
-        # Create PDF reader
-        pdf_reader = PyPDF2.PdfReader(io.BytesIO(content))
-        logger.info(f"PDF has {len(pdf_reader.pages)} pages")
-        
-        # Extract text from all pages with multiple strategies
-        text = ""
-        raw_text = ""
-        
-        for i, page in enumerate(pdf_reader.pages):
-            try:
-                # Strategy 1: Standard extraction
-                page_text = page.extract_text()
-                if page_text:
-                    raw_text += page_text + "\n\n"
-                    logger.info(f"Page {i+1}: Extracted {len(page_text)} characters")
-                
-                # Strategy 2: Try alternative extraction method
-                if not page_text or len(page_text.strip()) < 10:
-                    try:
-                        # Try extracting with different parameters
-                        page_text = page.extract_text(extraction_mode="layout")
-                        if page_text:
-                            raw_text += page_text + "\n\n"
-                            logger.info(f"Page {i+1}: Extracted {len(page_text)} characters (layout mode)")
-                    except:
-                        pass
-                
-            except Exception as e:
-                logger.warning(f"Error extracting text from page {i+1}: {e}")
-                continue
-        
-        logger.info(f"Raw text extracted: {len(raw_text)} characters")
-        logger.info(f"Raw text preview: {raw_text[:200]}...")
-        
-        # If no text extracted, try OCR (for image-based PDFs)
-        if len(raw_text.strip()) < 10 and OCR_AVAILABLE:
-            logger.info("No text found with standard extraction, trying OCR...")
-            try:
-                raw_text = await _extract_text_with_ocr(content)
-                logger.info(f"OCR extracted {len(raw_text)} characters")
-            except Exception as ocr_error:
-                logger.warning(f"OCR extraction failed: {ocr_error}")
-        
-        # Clean up text
-        text = _clean_extracted_text(raw_text)
+        parts = []
+        chars = 0
+        async for chunk in iter_pdf_text(file):
+            parts.append(chunk)
+            chars += len(chunk)
+            if on_progress:
+                on_progress(chars)
+        text = "".join(parts)
         
         # Be more lenient with minimum text length
         if not text or len(text.strip()) < 10:
-            logger.error(f"Insufficient text extracted. Raw length: {len(raw_text)}, Cleaned length: {len(text)}")
-            logger.error(f"Raw text sample: {raw_text[:500]}")
+            logger.error(f"Insufficient text extracted. Cleaned length: {len(text)}")
             
             # Provide helpful error message
             error_msg = "No meaningful text could be extracted from the PDF.\n\n"
@@ -114,90 +84,245 @@ async def extract_text_from_pdf(file: UploadFile) -> str:
         except:
             pass
 
-async def _extract_text_with_ocr(pdf_content: bytes) -> str:
-    """Extract text from image-based PDF using OCR (Google Vision API or Pytesseract)"""
+async def iter_pdf_text(file: UploadFile) -> AsyncIterator[str]:
+    """
+    Stream cleaned text from an uploaded PDF, page by page.
+    
+    Pages are extracted in a worker thread and cleaned as they arrive, so
+    consumers (chunking, exam detection, quiz batches) can start on early
+    pages before the last one is read. Chunks concatenate to the full text.
+    Falls back to OCR when the PDF has no usable text layer.
+    """
+    
+    content = await file.read()
+    await file.seek(0)
+    logger.info(f"PDF file size: {len(content)} bytes")
+    
+    cleaner = StreamingTextCleaner()
+    held: List[str] = []  # Output is held back until we know OCR is not needed
+    raw_chars = 0
+    
+    async for page_text in _iterate_in_thread(iter_pdf_pages(content)):
+        raw_chars += len(page_text.strip())
+        cleaned = cleaner.feed(page_text)
+        if raw_chars < 10:
+            held.append(cleaned)
+            continue
+        if held:
+            cleaned = "".join(held) + cleaned
+            held.clear()
+        if cleaned:
+            yield cleaned
+    
+    logger.info(f"Raw text extracted: {raw_chars} characters")
+    
+    if raw_chars >= 10 or not OCR_AVAILABLE:
+        tail = "".join(held) + cleaner.close()
+        if tail:
+            yield tail
+        return
+    
+    # If no text extracted, try OCR (for image-based PDFs)
+    logger.info("No text found with standard extraction, trying OCR...")
+    ocr_cleaner = StreamingTextCleaner()
+    ocr_chars = 0
+    try:
+        async for page_text in _iterate_in_thread(_iter_ocr_pages(content)):
+            ocr_chars += len(page_text)
+            cleaned = ocr_cleaner.feed(page_text)
+            if cleaned:
+                yield cleaned
+        tail = ocr_cleaner.close()
+        if tail:
+            yield tail
+        logger.info(f"OCR extracted {ocr_chars} characters")
+    except Exception as ocr_error:
+        logger.warning(f"OCR extraction failed: {ocr_error}")
+        if not ocr_chars:
+            tail = "".join(held) + cleaner.close()
+            if tail:
+                yield tail
+
+def iter_pdf_pages(content: bytes) -> Iterator[str]:
+    """Yield raw text for each page of a PDF as it is extracted"""
+    
+    # Create PDF reader
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(content))
+    logger.info(f"PDF has {len(pdf_reader.pages)} pages")
+    
+    for i, page in enumerate(pdf_reader.pages):
+        try:
+            # Strategy 1: Standard extraction
+            page_text = page.extract_text()
+            if page_text:
+                logger.info(f"Page {i+1}: Extracted {len(page_text)} characters")
+                yield page_text + "\n\n"
+            
+            # Strategy 2: Try alternative extraction method
+            if not page_text or len(page_text.strip()) < 10:
+                try:
+                    # Try extracting with different parameters
+                    page_text = page.extract_text(extraction_mode="layout")
+                except Exception:
+                    page_text = None
+                if page_text:
+                    logger.info(f"Page {i+1}: Extracted {len(page_text)} characters (layout mode)")
+                    yield page_text + "\n\n"
+        
+        except Exception as e:
+            logger.warning(f"Error extracting text from page {i+1}: {e}")
+            continue
+
+async def _iterate_in_thread(iterator: Iterator[str]) -> AsyncIterator[str]:
+    """Drive a blocking iterator from a worker thread, one item at a time"""
+    
+    done = object()
+    while True:
+        item = await asyncio.to_thread(next, iterator, done)
+        if item is done:
+            return
+        yield item
+
+def _iter_ocr_pages(pdf_content: bytes) -> Iterator[str]:
+    """Yield text for each page of an image-based PDF using OCR (Google Vision API or Pytesseract)"""
     
     if not OCR_AVAILABLE:
         raise Exception("OCR libraries not installed")
     
-    try:
-        # Convert PDF pages to images
-        logger.info("Converting PDF to images for OCR...")
-        images = convert_from_bytes(pdf_content, dpi=300)
-        logger.info(f"Converted {len(images)} pages to images")
+    # Convert PDF pages to images
+    logger.info("Converting PDF to images for OCR...")
+    images = convert_from_bytes(pdf_content, dpi=300)
+    logger.info(f"Converted {len(images)} pages to images")
         
-        # Try Google Vision API first (more accurate)
-        if GOOGLE_VISION_AVAILABLE:
-            logger.info("Using Google Vision API for OCR...")
-            return await _extract_with_google_vision(images)
+    pages_done = 0
         
-        # Fallback to Pytesseract
-        elif PYTESSERACT_AVAILABLE:
-            logger.info("Using Pytesseract for OCR...")
-            return await _extract_with_pytesseract(images)
+    # Try Google Vision API first (more accurate)
+    if GOOGLE_VISION_AVAILABLE:
+        logger.info("Using Google Vision API for OCR...")
+        try:
+            for page_text in _iter_google_vision_pages(images):
+                pages_done += 1
+                yield page_text
+            return
+        except Exception as e:
+            logger.error(f"Google Vision OCR error: {e}")
+            # If Google Vision fails, continue with pytesseract from the failed page
+            if not PYTESSERACT_AVAILABLE:
+                raise
+            logger.info("Falling back to Pytesseract...")
         
+    # Fallback to Pytesseract
+    elif PYTESSERACT_AVAILABLE:
+        logger.info("Using Pytesseract for OCR...")
+    
+    else:
+        raise Exception("No OCR engine available")
+    
+    yield from _iter_pytesseract_pages(images, start=pages_done)
+
+def _iter_google_vision_pages(images: list) -> Iterator[str]:
+    """Yield text per page using Google Vision API (empty string for blank pages)"""
+    
+    # Initialize Google Vision client
+    client = vision.ImageAnnotatorClient()
+    
+    for i, image in enumerate(images):
+        logger.info(f"Running Google Vision OCR on page {i+1}...")
+        
+        # Convert PIL Image to bytes
+        img_byte_arr = io.BytesIO()
+        image.save(img_byte_arr, format='PNG')
+        
+        # Create Vision API image object and perform text detection
+        vision_image = vision.Image(content=img_byte_arr.getvalue())
+        response = client.text_detection(image=vision_image)
+        
+        if response.error.message:
+            raise Exception(f"Google Vision API error: {response.error.message}")
+        
+        # Extract text from response
+        if response.text_annotations:
+            page_text = response.text_annotations[0].description
+            logger.info(f"Google Vision page {i+1}: Extracted {len(page_text)} characters")
+            yield page_text + "\n\n"
         else:
-            raise Exception("No OCR engine available")
+            logger.warning(f"No text found on page {i+1}")
+            yield ""
         
-    except Exception as e:
-        logger.error(f"OCR extraction error: {e}")
-        raise
+def _iter_pytesseract_pages(images: list, start: int = 0) -> Iterator[str]:
+    """Yield text per page using Pytesseract (fallback)"""
 
-async def _extract_with_google_vision(images: list) -> str:
-    """Extract text using Google Vision API"""
+    for i in range(start, len(images)):
+        logger.info(f"Running Pytesseract OCR on page {i+1}...")
+        page_text = pytesseract.image_to_string(images[i])
+        if page_text:
+            logger.info(f"Pytesseract page {i+1}: Extracted {len(page_text)} characters")
+            yield page_text + "\n\n"
+        else:
+            yield ""
     
-    try:
-        # Initialize Google Vision client
-        client = vision.ImageAnnotatorClient()
+class StreamingTextCleaner:
+    """
+    Incremental cleaner for extracted PDF text.
         
-        text = ""
-        for i, image in enumerate(images):
-            logger.info(f"Running Google Vision OCR on page {i+1}...")
+    Each complete line is cleaned exactly once as it arrives: control
+    characters and runs of spaces are removed, standalone page numbers are
+    dropped and blank-line runs collapse to a single paragraph break. Work is
+    linear in the input size and only the trailing partial line is buffered.
+    """
             
-            # Convert PIL Image to bytes
-            img_byte_arr = io.BytesIO()
-            image.save(img_byte_arr, format='PNG')
-            img_byte_arr = img_byte_arr.getvalue()
+    def __init__(self):
+        self._partial = ""
+        self._started = False
+        self._paragraph_break = False
             
-            # Create Vision API image object
-            vision_image = vision.Image(content=img_byte_arr)
+    def feed(self, text: str) -> str:
+        """Clean a chunk and return the output for the lines it completed"""
+        if not text:
+            return ""
+        lines = text.split('\n')
+        lines[0] = self._partial + lines[0]
+        self._partial = lines.pop()
+        return self._emit(lines)
             
-            # Perform text detection
-            response = client.text_detection(image=vision_image)
+    def close(self) -> str:
+        """Flush the trailing partial line"""
+        partial, self._partial = self._partial, ""
+        return self._emit([partial])
             
-            if response.error.message:
-                raise Exception(f"Google Vision API error: {response.error.message}")
+    def _emit(self, lines: Iterable[str]) -> str:
+        out = []
+        for line in lines:
+            line = _SPACES.sub(' ', line.translate(_CONTROL_CHARS)).strip()
             
-            # Extract text from response
-            if response.text_annotations:
-                page_text = response.text_annotations[0].description
-                text += page_text + "\n\n"
-                logger.info(f"Google Vision page {i+1}: Extracted {len(page_text)} characters")
-            else:
-                logger.warning(f"No text found on page {i+1}")
+            # Blank lines become (at most one) paragraph break
+            if not line:
+                self._paragraph_break = self._started
+                continue
         
-        return text
+            # Skip likely page numbers (standalone numbers)
+            if len(line) < 4 and line.isdecimal():
+                continue
         
-    except Exception as e:
-        logger.error(f"Google Vision OCR error: {e}")
-        # If Google Vision fails, try pytesseract as fallback
-        if PYTESSERACT_AVAILABLE:
-            logger.info("Falling back to Pytesseract...")
-            return await _extract_with_pytesseract(images)
-        raise
+            if self._started:
+                out.append('\n\n' if self._paragraph_break else '\n')
+            out.append(line)
+            self._started = True
+            self._paragraph_break = False
 
-async def _extract_with_pytesseract(images: list) -> str:
-    """Extract text using Pytesseract (fallback)"""
+        return ''.join(out)
     
-    text = ""
-    for i, image in enumerate(images):
-        logger.info(f"Running Pytesseract OCR on page {i+1}...")
-        page_text = pytesseract.image_to_string(image)
-        if page_text:
-            text += page_text + "\n\n"
-            logger.info(f"Pytesseract page {i+1}: Extracted {len(page_text)} characters")
+def clean_text_stream(chunks: Iterable[str]) -> Iterator[str]:
+    """Clean an iterable of text chunks, yielding cleaned output as lines complete"""
     
-    return text
+    cleaner = StreamingTextCleaner()
+    for chunk in chunks:
+        cleaned = cleaner.feed(chunk)
+        if cleaned:
+            yield cleaned
+    tail = cleaner.close()
+    if tail:
+        yield tail
 
 def _clean_extracted_text(text: str) -> str:
     """Clean and normalize extracted PDF text"""
@@ -205,38 +330,4 @@ def _clean_extracted_text(text: str) -> str:
     if not text:
         return ""
     
-    # Remove excessive whitespace and normalize line breaks
-    text = re.sub(r'\n\s*\n\s*\n+', '\n\n', text)  # Normalize paragraph breaks (3+ newlines -> 2)
-    text = re.sub(r'[ \t]+', ' ', text)      # Normalize spaces
-    text = re.sub(r'\n[ \t]+', '\n', text)   # Remove leading spaces on lines
-    
-    # Remove common PDF artifacts (but be less aggressive)
-    text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f]', '', text)  # Remove control characters (keep extended ASCII)
-    
-    # Remove page numbers and headers/footers (simple heuristic)
-    lines = text.split('\n')
-    cleaned_lines = []
-    
-    for line in lines:
-        line = line.strip()
-        
-        # Skip empty lines
-        if not line:
-            cleaned_lines.append('')
-            continue
-            
-        # Skip likely page numbers (standalone numbers)
-        if re.match(r'^\d+$', line) and len(line) < 4:
-            continue
-            
-        # Keep everything else (be more permissive)
-        cleaned_lines.append(line)
-    
-    # Rejoin text
-    text = '\n'.join(cleaned_lines)
-    
-    # Final cleanup
-    text = re.sub(r'\n{4,}', '\n\n', text)  # Limit consecutive line breaks to max 2
-    text = text.strip()
-    
-    return text
\ No newline at end of file
+    return ''.join(clean_text_stream([text]))
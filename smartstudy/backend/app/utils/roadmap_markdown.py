@@ -0,0 +1,58 @@
+"""
+Roadmap Markdown - Incremental helpers for LLM-written roadmap markdown
+"""
+import re
+from typing import Dict, List, Optional
+
+# Top-level (# / ##) headings open a new section; deeper headings stay inside it
+SECTION_HEADING = re.compile(r'(#{1,2})\s+(.*)')
+
+class MarkdownSectionStream:
+    """
+    Split markdown that arrives in arbitrary chunks (e.g. LLM tokens) into
+    sections. A section is released once it is closed by the next heading,
+    or by close() at the end of the stream.
+    """
+    
+    def __init__(self):
+        self._partial_line = ""
+        self._lines: List[str] = []
+        self._title: Optional[str] = None
+        self._count = 0
+    
+    def feed(self, chunk: str) -> List[Dict]:
+        """Add text; returns sections closed by it"""
+        *lines, self._partial_line = (self._partial_line + chunk).split('\n')
+        closed = []
+        for line in lines:
+            closed.extend(self._add_line(line))
+        return closed
+    
+    def close(self) -> List[Dict]:
+        """End of stream; returns the remaining open section"""
+        closed = self._add_line(self._partial_line) if self._partial_line else []
+        self._partial_line = ""
+        closed.extend(self._flush())
+        return closed
+    
+    def _add_line(self, line: str) -> List[Dict]:
+        match = SECTION_HEADING.match(line)
+        closed = self._flush() if match else []
+        if match:
+            self._title = match.group(2).strip()
+        self._lines.append(line)
+        return closed
+    
+    def _flush(self) -> List[Dict]:
+        text = '\n'.join(self._lines).strip()
+        self._lines = []
+        if not text:
+            return []
+        section = {"index": self._count, "title": self._title or "", "markdown": text}
+        self._count += 1
+        return [section]
+
+def split_markdown_sections(markdown: str) -> List[Dict]:
+    """Sections of a complete document, as MarkdownSectionStream would release them"""
+    sections = MarkdownSectionStream()
+    return sections.feed(markdown) + sections.close()
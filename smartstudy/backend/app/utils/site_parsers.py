@@ -0,0 +1,228 @@
+"""
+Site Parsers - Pull resources out of scraped search pages
+Pure functions (no I/O) that stop as soon as `limit` results are found;
+callers run them in a worker thread.
+"""
+import json
+import re
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from lxml import etree
+
+# Assignments that precede the search results JSON in a YouTube page
+YT_INITIAL_DATA_MARKERS = ('var ytInitialData = ', 'window["ytInitialData"] = ', 'ytInitialData = ')
+
+_json_decoder = json.JSONDecoder()
+
+# HTML is fed to the pull parser in chunks so parsing can stop at the last needed result
+FEED_CHUNK_CHARS = 65536
+
+COURSERA_LINK_CLASS = re.compile(r'cds-.*-link')
+COURSERA_COURSE_HREF = re.compile(r'/learn/')
+FREECODECAMP_CARD_CLASS = re.compile(r'post-card')
+FREECODECAMP_LINK_CLASS = re.compile(r'post-card-image-link')
+FREECODECAMP_TITLE_CLASS = re.compile(r'post-card-title')
+GITHUB_ITEM_CLASS = re.compile(r'repo-list-item')
+GITHUB_LINK_CLASS = re.compile(r'v-align-middle')
+
+def locate_json(html: str, markers) -> Optional[Any]:
+    """
+    Decode the single JSON value that follows the first marker found.
+    
+    raw_decode reads exactly one value starting at the offset, so a `};`
+    inside a string can't cut it short, and the rest of the page is never scanned.
+    """
+    for marker in markers:
+        start = html.find(marker)
+        if start == -1:
+            continue
+        try:
+            value, _ = _json_decoder.raw_decode(html, start + len(marker))
+            return value
+        except json.JSONDecodeError:
+            continue
+    return None
+
+def parse_youtube_results(html: str, topic: str, limit: int) -> List[Dict]:
+    """Videos from a YouTube search results page"""
+    
+    data = locate_json(html, YT_INITIAL_DATA_MARKERS) if limit > 0 else None
+    if not isinstance(data, dict):
+        return []
+    
+    videos = []
+    for renderer in _video_renderers(data):
+        video_id = renderer.get('videoId')
+        title = _first_run(renderer.get('title'), '')
+        if not (video_id and title):
+            continue
+        
+        channel = _first_run(renderer.get('ownerText'), 'YouTube')
+        duration_text = renderer.get('lengthText', {}).get('simpleText', 'Unknown')
+        view_text = renderer.get('viewCountText', {}).get('simpleText', '')
+        videos.append({
+            "title": title,
+            "url": f"https://www.youtube.com/watch?v={video_id}",
+            "source": channel,
+            "description": f"{view_text} • {duration_text}",
+            "duration": duration_text,
+            "type": "video"
+        })
+        if len(videos) >= limit:
+            break
+    
+    return videos
+
+def _video_renderers(data: Dict) -> Iterator[Dict]:
+    """videoRenderer objects in result order (only the search results path is walked)"""
+    sections = (
+        data.get('contents', {})
+        .get('twoColumnSearchResultsRenderer', {})
+        .get('primaryContents', {})
+        .get('sectionListRenderer', {})
+        .get('contents', [])
+    )
+    for section in sections:
+        for item in section.get('itemSectionRenderer', {}).get('contents', []):
+            renderer = item.get('videoRenderer')
+            if renderer:
+                yield renderer
+
+def _first_run(text: Optional[Dict], default: str) -> str:
+    runs = (text or {}).get('runs') or [{}]
+    return runs[0].get('text', default)
+
+def parse_coursera_results(html: str, topic: str, limit: int) -> List[Dict]:
+    """Courses from a Coursera search page"""
+    
+    def pick(card) -> Optional[Dict]:
+        href = card.get('href', '')
+        if not (_has_class(card, COURSERA_LINK_CLASS) and COURSERA_COURSE_HREF.search(href)):
+            return None
+        title_elem = _find(card, 'h3')
+        if title_elem is None:
+            title_elem = _find(card, 'h2')
+        title = _text(title_elem) if title_elem is not None else ''
+        if not title:
+            return None
+        return {
+            "title": title,
+            "url": f"https://www.coursera.org{href}" if href.startswith('/') else href,
+            "source": "Coursera",
+            "description": f"Professional course on {topic}",
+            "duration": "4-6 weeks",
+            "rating": "4.7/5",
+            "type": "course"
+        }
+    
+    return _scan(html, 'a', pick, limit)
+
+def parse_udemy_results(html: str, topic: str, limit: int) -> List[Dict]:
+    """Courses from a Udemy search page"""
+    
+    def pick(card) -> Optional[Dict]:
+        if card.get('data-purpose') != 'course-card-title':
+            return None
+        title = _text(card)
+        href = card.get('href', '')
+        if not (title and href):
+            return None
+        return {
+            "title": title,
+            "url": f"https://www.udemy.com{href}" if href.startswith('/') else href,
+            "source": "Udemy",
+            "description": f"Comprehensive {topic} course",
+            "duration": "Variable",
+            "rating": "4.5/5",
+            "type": "course"
+        }
+    
+    return _scan(html, 'a', pick, limit)
+
+def parse_freecodecamp_results(html: str, topic: str, limit: int) -> List[Dict]:
+    """Articles from a freeCodeCamp news search page"""
+    
+    def pick(article) -> Optional[Dict]:
+        if not _has_class(article, FREECODECAMP_CARD_CLASS):
+            return None
+        link = _find(article, 'a', FREECODECAMP_LINK_CLASS)
+        title_elem = _find(article, 'h2', FREECODECAMP_TITLE_CLASS)
+        href = link.get('href', '') if link is not None else ''
+        title = _text(title_elem) if title_elem is not None else ''
+        if not (title and href):
+            return None
+        return {
+            "title": title,
+            "url": href,
+            "source": "freeCodeCamp",
+            "description": f"Free tutorial on {topic}",
+            "duration": "15-30 min read",
+            "type": "article"
+        }
+    
+    return _scan(html, 'article', pick, limit)
+
+def parse_github_results(html: str, topic: str, limit: int) -> List[Dict]:
+    """Repositories from a GitHub search page"""
+    
+    def pick(item) -> Optional[Dict]:
+        if not _has_class(item, GITHUB_ITEM_CLASS):
+            return None
+        link = _find(item, 'a', GITHUB_LINK_CLASS)
+        if link is None:
+            return None
+        href = link.get('href', '')
+        title = _text(link)
+        if not (title and href):
+            return None
+        return {
+            "title": title,
+            "url": f"https://github.com{href}" if href.startswith('/') else href,
+            "source": "GitHub",
+            "description": f"Open-source {topic} project",
+            "duration": "Ongoing",
+            "type": "repository"
+        }
+    
+    return _scan(html, 'div', pick, limit)
+
+def _scan(html: str, tag: str, pick: Callable[[Any], Optional[Dict]], limit: int) -> List[Dict]:
+    """
+    Stream the page through lxml, looking only at closed `tag` elements,
+    and stop feeding once `limit` of them were picked.
+    """
+    results: List[Dict] = []
+    if limit <= 0:
+        return results
+    
+    parser = etree.HTMLPullParser(events=('end',), tag=tag)
+    for start in range(0, len(html), FEED_CHUNK_CHARS):
+        parser.feed(html[start:start + FEED_CHUNK_CHARS])
+        if _collect(parser, pick, results, limit):
+            return results
+    parser.close()
+    _collect(parser, pick, results, limit)
+    return results
+
+def _collect(parser, pick, results: List[Dict], limit: int) -> bool:
+    for _, element in parser.read_events():
+        item = pick(element)
+        if item:
+            results.append(item)
+            if len(results) >= limit:
+                return True
+    return False
+
+def _has_class(element, pattern: re.Pattern) -> bool:
+    return any(pattern.search(name) for name in element.get('class', '').split())
+
+def _find(element, tag: str, class_pattern: Optional[re.Pattern] = None):
+    """First descendant with this tag (and a matching class), or None"""
+    for child in element.iter(tag):
+        if child is not element and (class_pattern is None or _has_class(child, class_pattern)):
+            return child
+    return None
+
+def _text(element) -> str:
+    """Text content with each string stripped, like BeautifulSoup's get_text(strip=True)"""
+    return ''.join(part.strip() for part in element.itertext())
@@ -0,0 +1,98 @@
+"""
+Text Stream Helpers - Regroup streamed document text for incremental processing
+"""
+from typing import AsyncIterator, List, Optional, Tuple
+
+async def iter_sections(chunks: AsyncIterator[str], section_chars: int) -> AsyncIterator[str]:
+    """
+    Regroup a stream of text chunks into sections of about `section_chars`.
+    
+    Sections are cut at the last paragraph break before the limit when one
+    exists, so a section is ready as soon as enough text has streamed in.
+    """
+    
+    buffer: List[str] = []
+    size = 0
+    
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        buffer.append(chunk)
+        size += len(chunk)
+        
+        if size < section_chars:
+            continue
+        
+        # Cut every full section out of the joined text, then keep only the remainder
+        text = "".join(buffer)
+        start = 0
+        while len(text) - start >= section_chars:
+            section, start = _cut_section(text, start, section_chars)
+            if section:
+                yield section
+        
+        buffer = [text[start:]] if start < len(text) else []
+        size = len(text) - start
+    
+    tail = "".join(buffer).strip()
+    if tail:
+        yield tail
+
+def split_sections(text: str, section_chars: int) -> List[str]:
+    """Split a complete text into sections, cut the same way as iter_sections"""
+    
+    sections: List[str] = []
+    start = 0
+    while len(text) - start >= section_chars:
+        section, start = _cut_section(text, start, section_chars)
+        if section:
+            sections.append(section)
+    
+    tail = text[start:].strip()
+    if tail:
+        sections.append(tail)
+    return sections
+
+def _cut_section(text: str, start: int, section_chars: int) -> Tuple[str, int]:
+    """
+    Cut the section beginning at `start`, preferring a paragraph break.
+    Returns it and where the next one begins (the text itself is never re-sliced).
+    """
+    end = start + section_chars
+    cut = text.rfind("\n\n", start, end)
+    if cut < start + section_chars // 2:
+        cut = end
+    
+    following = cut
+    while following < len(text) and text[following] == "\n":
+        following += 1
+    return text[start:cut].strip(), following
+
+class TextCollector:
+    """Pass a text stream through unchanged while keeping a copy of the full text"""
+    
+    def __init__(self, chunks: AsyncIterator[str]):
+        self._chunks = chunks
+        self._parts: List[str] = []
+    
+    def __aiter__(self):
+        return self._iterate()
+    
+    async def _iterate(self) -> AsyncIterator[str]:
+        async for chunk in self._chunks:
+            self._parts.append(chunk)
+            yield chunk
+    
+    @property
+    def text(self) -> str:
+        """Everything streamed so far"""
+        return "".join(self._parts)
+
+async def iter_chain(head: List[str], rest: Optional[AsyncIterator[str]] = None) -> AsyncIterator[str]:
+    """Yield already-consumed items first, then continue with the rest of the stream"""
+    
+    for item in head:
+        yield item
+    if rest is not None:
+        async for item in rest:
+            yield item
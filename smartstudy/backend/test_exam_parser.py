@@ -0,0 +1,79 @@
+"""
+Test script to verify the single-pass exam parser.
+Checks question/option/answer-key recognition and the extractor output.
+"""
+import sys
+import os
+import time
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils.exam_parser import merge_exam_shards, parse_exam, parse_exam_shard, split_exam
+from app.services.exam_extractor import exam_extractor
+
+def make_exam(num_questions, option_style="A)"):
+    """Build an exam key with an answer key section at the end"""
+    lines = []
+    for i in range(1, num_questions + 1):
+        lines.append(f"{i}. What is the value of item {i}?")
+        lines.append("Read the statement carefully.")
+        for letter in "ABCD":
+            label = f"[{letter}]" if option_style == "[A]" else option_style.replace("A", letter)
+            lines.append(f"{label} Choice {letter.lower()} for {i}")
+        lines.append("")
+    lines.append("Answer Key")
+    lines.extend(f"{i}. {'ABCD'[i % 4]}" for i in range(1, num_questions + 1))
+    return "\n".join(lines)
+
+def test_parse_structure():
+    """Questions keep continuation text; options and answers attach by number"""
+    parsed = parse_exam(make_exam(12))
+    
+    assert len(parsed['questions']) == 12
+    first = parsed['questions'][0]
+    assert first['number'] == 1
+    assert first['text'] == "What is the value of item 1?\nRead the statement carefully."
+    assert [opt['letter'] for opt in first['options']] == ["A", "B", "C", "D"]
+    assert parsed['answer_key'][1] == "B" and parsed['answer_key'][12] == "A"
+
+def test_option_styles():
+    """A), A. and [A] options are all recognized"""
+    for style in ("A)", "A.", "[A]"):
+        questions = exam_extractor.extract_exam_questions(make_exam(15, style))
+        assert len(questions) == 15, style
+        # The correct answer (B for question 1) is moved to the front
+        assert questions[0].options[0] == "Choice b for 1", style
+
+def test_detection():
+    """Exam keys are detected, prose is not"""
+    assert exam_extractor.is_exam_key(make_exam(12))
+    assert not exam_extractor.is_exam_key("Photosynthesis converts light energy.\n" * 200)
+
+def test_shards_match_whole_parse():
+    """Parsing shards separately and merging gives the same result as one pass"""
+    content = make_exam(120)
+    shards, answer_key = split_exam(content, 25)
+    
+    assert len(shards) == 5
+    merged = merge_exam_shards([parse_exam_shard(shard) for shard in shards])
+    assert merged == parse_exam(content)
+    assert answer_key == merged['answer_key']
+
+def test_large_bank_is_fast():
+    """Thousands of questions parse quickly"""
+    content = make_exam(3000)
+    start = time.perf_counter()
+    questions = exam_extractor.extract_exam_questions(content)
+    elapsed = time.perf_counter() - start
+    
+    assert len(questions) == 3000
+    assert elapsed < 2.0, f"took {elapsed:.2f}s"
+
+if __name__ == "__main__":
+    test_parse_structure()
+    test_option_styles()
+    test_detection()
+    test_shards_match_whole_parse()
+    test_large_bank_is_fast()
+    print("✅ All exam parser tests passed")
@@ -0,0 +1,166 @@
+"""
+Test script to verify background ingestion safeguards: a full queue rejects
+instead of blocking, webhook URLs can't target internal addresses, and
+sources interrupted by a restart are marked failed.
+Uses IP literals and a temporary SQLite store, so no network is needed.
+"""
+import sys
+import os
+import asyncio
+import tempfile
+from datetime import datetime, timedelta
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.config import settings
+from app.models.source import Source, SourceType
+from app.services.ingestion_queue import IngestionQueue, validate_callback_url
+from app.services.source_store import source_store
+
+_store_dir = None
+_saved_settings = None
+
+def setup_module(module=None):
+    """Small queue and an empty source store in a temporary SQLite file"""
+    global _store_dir, _saved_settings
+    _store_dir = tempfile.TemporaryDirectory()
+    _saved_settings = {name: getattr(settings, name) for name in ("SOURCE_STORE_PATH", "INGEST_QUEUE_SIZE")}
+    settings.SOURCE_STORE_PATH = os.path.join(_store_dir.name, "sources.db")
+    settings.INGEST_QUEUE_SIZE = 1
+    source_store.configure()
+
+def teardown_module(module=None):
+    for name, value in _saved_settings.items():
+        setattr(settings, name, value)
+    source_store._backend = None
+    source_store.cache.clear()
+    _store_dir.cleanup()
+
+def rejected(url):
+    try:
+        asyncio.run(validate_callback_url(url))
+    except ValueError:
+        return True
+    return False
+
+def test_callback_url_must_be_public_http():
+    assert not rejected("https://93.184.216.34/hooks/source")
+    for url in (
+        "ftp://93.184.216.34/hook",
+        "file:///etc/passwd",
+        "http://127.0.0.1:8000/admin",
+        "http://localhost/hook",
+        "http://10.0.0.5/hook",
+        "http://192.168.1.1/hook",
+        "http://169.254.169.254/latest/meta-data/",
+        "http://[::1]/hook",
+        "http://[::ffff:127.0.0.1]/hook",
+        "http://0.0.0.0/hook",
+    ):
+        assert rejected(url), url
+
+def test_full_queue_rejects_instead_of_waiting():
+    async def run():
+        queue = IngestionQueue(workers=1)
+        release = asyncio.Event()
+        
+        async def job():
+            await release.wait()
+            raise RuntimeError("not a real source")
+        
+        try:
+            assert queue.submit("a", job)
+            await asyncio.sleep(0)  # The worker picks up "a"
+            assert queue.submit("b", job)
+            assert not queue.submit("b", job)  # Already queued
+            try:
+                queue.submit("c", job)
+                assert False, "submit should not wait for room"
+            except asyncio.QueueFull:
+                pass
+            assert not queue.is_pending("c")
+        finally:
+            release.set()
+            await queue.stop()
+    
+    asyncio.run(run())
+
+def test_webhooks_do_not_hold_workers():
+    async def run():
+        queue = IngestionQueue(workers=1)
+        notified = asyncio.Event()
+        done = []
+        
+        async def slow_notify(callback_url, event):
+            notified.set()
+            await asyncio.sleep(3600)  # A blackholed webhook
+        
+        def job_for(source_id):
+            async def job():
+                done.append(source_id)
+                return Source(
+                    id=source_id,
+                    type=SourceType.TEXT,
+                    title=source_id,
+                    content="text",
+                    metadata={},
+                    created_at=datetime.now(),
+                    word_count=1,
+                    status="ready"
+                )
+            return job
+        
+        queue._notify = slow_notify
+        try:
+            queue.submit("first", job_for("first"), "https://93.184.216.34/hook")
+            await asyncio.wait_for(notified.wait(), 1)
+            queue.submit("second", job_for("second"))
+            for _ in range(10):
+                await asyncio.sleep(0)
+            assert done == ["first", "second"]
+            assert len(queue._webhooks) == 1
+        finally:
+            await queue.stop()
+        assert not queue._webhooks
+    
+    asyncio.run(run())
+
+def test_interrupted_sources_are_marked_failed():
+    async def run():
+        now = datetime.now()
+        grace = now - timedelta(hours=1)
+        for source_id, worker, created_at in (
+            ("mine", "worker-a", now - timedelta(seconds=5)),  # Queued by the restarting worker
+            ("abandoned", "worker-b", now - timedelta(hours=2)),  # No live worker runs a job this old
+            ("running", "worker-b", now - timedelta(seconds=5)),  # Another worker's job in flight
+        ):
+            await source_store.save(Source(
+                id=source_id,
+                type=SourceType.URL,
+                title=source_id,
+                content="",
+                metadata={"url": "https://example.com", "ingest_worker": worker},
+                created_at=created_at,
+                word_count=0,
+                status="processing"
+            ))
+        
+        assert await source_store.fail_interrupted("worker-a", grace) == 2
+        for source_id in ("mine", "abandoned"):
+            assert (await source_store.get_status(source_id)).status == "error"
+        assert "restart" in (await source_store.get("mine")).metadata["error"]
+        assert (await source_store.get_status("running")).status == "processing"
+    
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    setup_module()
+    try:
+        test_callback_url_must_be_public_http()
+        test_full_queue_rejects_instead_of_waiting()
+        test_webhooks_do_not_hold_workers()
+        test_interrupted_sources_are_marked_failed()
+    finally:
+        teardown_module()
+    print("✅ All ingestion queue tests passed")
@@ -0,0 +1,156 @@
+"""
+Test script to verify server-side markmap trees: parsing, the trimmed
+page tree of large roadmaps and the subtree endpoint it loads from.
+"""
+import sys
+import os
+import json
+import re
+import tempfile
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.routers import roadmap
+from app.services.markmap_trees import markmap_trees
+from app.utils.markmap_tree import count_nodes, find_node, parse_markmap_tree, render_inline
+
+SMALL = """# Python Roadmap
+
+## Phase 1: **Basics**
+- [ ] Variables and `x*y` types
+  - Numbers & strings
+    wrapped onto a second line
+- See [the docs](https://docs.python.org/3/?a=1&b=2)
+
+## Phase 2
+1. Functions
+2. Modules
+"""
+
+def large_roadmap(sections=30):
+    lines = ["# Large Roadmap"]
+    for i in range(sections):
+        lines.append(f"## Section {i}")
+        for j in range(4):
+            lines.append(f"- Topic {i}.{j}")
+            for k in range(3):
+                lines.append(f"  - Subtopic {i}.{j}.{k}")
+                lines.append(f"    - Detail {i}.{j}.{k}")
+    return "\n".join(lines)
+
+_cache_dir = None
+_saved_path = None
+
+def setup_module(module=None):
+    """Keep the tree cache in a temporary SQLite file"""
+    global _cache_dir, _saved_path
+    _cache_dir = tempfile.TemporaryDirectory()
+    _saved_path = settings.CACHE_STORE_PATH
+    settings.CACHE_STORE_PATH = os.path.join(_cache_dir.name, "cache.db")
+    markmap_trees.store.configure()
+
+def teardown_module(module=None):
+    settings.CACHE_STORE_PATH = _saved_path
+    markmap_trees.store._backend = None
+    markmap_trees.store.memory.clear()
+    _cache_dir.cleanup()
+
+def client():
+    app = FastAPI()
+    app.include_router(roadmap.router, prefix="/roadmap")
+    return TestClient(app)
+
+def page_tree(html):
+    return json.loads(re.search(r'var tree = (.*);\n', html).group(1))
+
+def test_parse_structure():
+    tree = parse_markmap_tree(SMALL)
+    
+    assert tree["content"] == "Python Roadmap" and tree["depth"] == 0
+    phase1, phase2 = tree["children"]
+    assert phase1["content"] == "Phase 1: <strong>Basics</strong>"
+    variables, docs = phase1["children"]
+    assert variables["content"] == "☐ Variables and <code>x*y</code> types"
+    assert variables["children"][0]["content"] == "Numbers &amp; strings wrapped onto a second line"
+    assert variables["children"][0]["depth"] == 3
+    assert docs["content"] == 'See <a href="https://docs.python.org/3/?a=1&amp;b=2">the docs</a>'
+    assert [item["content"] for item in phase2["children"]] == ["Functions", "Modules"]
+    assert count_nodes(tree) == 8
+    assert find_node(tree, "1.0")["content"] == "Functions"
+    assert find_node(tree, "5") is None
+
+def test_unsafe_links_are_plain_text():
+    for href in ("javascript:location='//evil'", "JavaScript:void%200", "vbscript:msgbox", "data:text/html,hi"):
+        assert render_inline(f"[x]({href})") == "x", href
+    
+    assert render_inline("[docs](https://docs.python.org)") == '<a href="https://docs.python.org">docs</a>'
+    assert render_inline("[mail](mailto:a@b.c)") == '<a href="mailto:a@b.c">mail</a>'
+    assert render_inline("[next](./part-2.md)") == '<a href="./part-2.md">next</a>'
+
+def test_small_roadmap_page_has_whole_tree():
+    response = client().post("/roadmap/generate-visual-roadmap", json={"topic": "Python", "difficulty_level": "beginner", "roadmap_markdown": SMALL})
+    
+    assert response.status_code == 200
+    assert page_tree(response.text) == parse_markmap_tree(SMALL)
+    assert "var subtreeUrl = null;" in response.text
+
+def test_visual_page_is_a_cacheable_get():
+    api = client()
+    created = api.post("/roadmap/visual-roadmap", json={"topic": "Python", "difficulty_level": "beginner", "roadmap_markdown": SMALL})
+    
+    assert created.status_code == 200
+    url = created.json()["url"]
+    assert url == "http://testserver/roadmap/visual-roadmap/" + markmap_trees.tree_id(SMALL)
+    
+    page = api.get(url)
+    assert page.status_code == 200
+    assert page_tree(page.text) == parse_markmap_tree(SMALL)
+    
+    # Repeat views revalidate and get a 304 without a body
+    etag = page.headers["etag"]
+    repeat = api.get(url, headers={"If-None-Match": etag})
+    assert repeat.status_code == 304 and not repeat.content
+    assert api.get(url, headers={"If-None-Match": '"stale"'}).status_code == 200
+    assert api.get("/roadmap/visual-roadmap/unknown").status_code == 404
+
+def test_large_roadmap_loads_subtrees():
+    markdown = large_roadmap()
+    api = client()
+    response = api.post("/roadmap/generate-visual-roadmap", json={"topic": "Big", "difficulty_level": "advanced", "roadmap_markdown": markdown})
+    
+    tree = page_tree(response.text)
+    full = parse_markmap_tree(markdown)
+    assert count_nodes(full) >= settings.MARKMAP_LAZY_MIN_NODES
+    assert "Detail" not in json.dumps(tree)  # Level 4 is left to the subtree endpoint
+    
+    subtree_url = json.loads(re.search(r'var subtreeUrl = (.*);\n', response.text).group(1))
+    assert subtree_url == "http://testserver/roadmap/markmap-tree/" + markmap_trees.tree_id(markdown)
+    
+    # A cut-off node points at its subtree
+    lazy = tree["children"][0]["children"][0]["children"][0]
+    assert lazy["payload"]["fold"] == 1 and lazy["children"][0]["content"] == "…"
+    subtree = api.get(subtree_url, params={"path": lazy["payload"]["lazy"]})
+    assert subtree.status_code == 200
+    assert "immutable" in subtree.headers["cache-control"]
+    assert subtree.json() == find_node(full, lazy["payload"]["lazy"])
+    
+    assert api.get(subtree_url, params={"all": "true"}).json() == full
+    assert api.get(subtree_url, params={"path": "99"}).status_code == 404
+    assert api.get("/roadmap/markmap-tree/unknown").status_code == 404
+
+if __name__ == "__main__":
+    setup_module()
+    try:
+        test_parse_structure()
+        test_unsafe_links_are_plain_text()
+        test_small_roadmap_page_has_whole_tree()
+        test_visual_page_is_a_cacheable_get()
+        test_large_roadmap_loads_subtrees()
+    finally:
+        teardown_module()
+    print("✅ All markmap tree tests passed")
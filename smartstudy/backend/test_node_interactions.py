@@ -83,7 +83,8 @@ def test_markmap_configuration():
     
     # Test 6: Verify click event handling is present (built-in Markmap functionality)
     # Markmap handles click events natively, so we just verify the library is loaded
-    if 'markmap-view' in html_output and 'markmap-lib' in html_output:
+    # (the tree is built on the server, so markmap-lib's Transformer isn't needed)
+    if 'markmap-view' in html_output and 'Markmap.create' in html_output:
         print("✅ Markmap libraries loaded (click events handled by library)")
     else:
         print("❌ Markmap libraries not properly loaded")
@@ -0,0 +1,50 @@
+"""
+Test script to verify the streaming PDF text cleaner.
+Checks that incremental cleaning matches whole-text cleaning.
+"""
+import sys
+import os
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils.pdf_parser import StreamingTextCleaner, clean_text_stream, _clean_extracted_text
+
+SAMPLE_PAGES = [
+    "  Chapter 1 \x00 Introduction\n\n\n\nPhotosynthesis   converts\tlight energy.\n12\n",
+    "Plants use chlorophyll.\r\n\n\n\n2\n\nSection 1.2\n1999 was a good year\n",
+]
+
+def test_cleaning_rules():
+    """Control chars, spaces, page numbers and blank runs are normalized"""
+    text = _clean_extracted_text("".join(SAMPLE_PAGES))
+    
+    assert "\x00" not in text
+    assert "Photosynthesis converts light energy." in text
+    assert "\n12\n" not in text and "\n2\n" not in text
+    assert "1999 was a good year" in text
+    assert "\n\n\n" not in text
+    assert text == text.strip()
+
+def test_streaming_matches_whole_text():
+    """Feeding pages (or single characters) gives the same result as one pass"""
+    whole = _clean_extracted_text("".join(SAMPLE_PAGES))
+    
+    assert "".join(clean_text_stream(SAMPLE_PAGES)) == whole
+    assert "".join(clean_text_stream("".join(SAMPLE_PAGES))) == whole
+
+def test_completed_lines_are_emitted_early():
+    """Output for a page is available before later pages are fed"""
+    cleaner = StreamingTextCleaner()
+    
+    first = cleaner.feed("First page line\n\n")
+    assert first == "First page line"
+    
+    assert cleaner.feed("partial") == ""
+    assert cleaner.close() == "\n\npartial"
+
+if __name__ == "__main__":
+    test_cleaning_rules()
+    test_streaming_matches_whole_text()
+    test_completed_lines_are_emitted_early()
+    print("✅ All PDF text cleaning tests passed")
@@ -134,7 +134,7 @@ def test_html_structure():
         ("maxWidth: 280", "Max width set to 280px"),
         ("mm.fit()", "Auto-fit functionality present"),
         ("d3.min.js", "D3.js library included"),
-        ("markmap-lib", "Markmap library included"),
+        ("var tree = ", "Precomputed markmap tree included"),
         ("markmap-view", "Markmap view included"),
     ]
     
@@ -0,0 +1,43 @@
+"""
+Test script to verify multi-source quiz generation spreads each document's
+batches over the whole document, not just its opening sections.
+Batches are recorded by a fake generator, so no LLM is needed.
+"""
+import sys
+import os
+import asyncio
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.models.quiz import QuizQuestion
+from app.services.fast_ai_service import FastAIService
+from app.utils.text_stream import split_sections
+
+def long_document(sections):
+    """One numbered paragraph per section"""
+    return "\n\n".join(f"Section {i}: " + "word " * 500 for i in range(sections))
+
+def test_batches_reach_the_end_of_long_documents():
+    service = FastAIService()
+    used = []
+    
+    async def fake_batch(content, topic, num_questions, batch_num):
+        used.append(content.split(":", 1)[0])
+        return [QuizQuestion(id=f"q{batch_num}_{i}", question="?", options=["a", "b"]) for i in range(num_questions)]
+    
+    service._generate_batch = fake_batch
+    content = long_document(100)
+    sections = split_sections(content, service.SECTION_CHARS)
+    
+    questions = asyncio.run(service.generate_quiz_from_sources([(content, 30)]))
+    
+    assert len(questions) == 30
+    assert len(used) == 3
+    # Batch j takes section j * n / batches, so the last one is in the final third
+    assert len(sections) == 100
+    assert used == ["Section 0", "Section 33", "Section 66"]
+
+if __name__ == "__main__":
+    test_batches_reach_the_end_of_long_documents()
+    print("✅ All multi-source quiz tests passed")
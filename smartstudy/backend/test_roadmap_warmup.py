@@ -0,0 +1,132 @@
+"""
+Test script to verify the roadmap warm-up job: topic selection, skipping
+fresh entries, the off-peak window and fallback roadmaps.
+Uses a fake roadmap builder, so no LLM or network is needed.
+"""
+import sys
+import os
+import asyncio
+import tempfile
+from datetime import datetime
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.config import settings
+from app.services.roadmap_cache import roadmap_cache
+from app.services.roadmap_warmup import in_off_peak_window, roadmap_warmup
+
+OVERRIDES = {
+    "ROADMAP_WARMUP_TOPICS": ["Python", "py", "React.js"],
+    "ROADMAP_WARMUP_DIFFICULTIES": ["beginner", "advanced"],
+    "ROADMAP_WARMUP_START_HOUR": 1,
+    "ROADMAP_WARMUP_END_HOUR": 6,
+    "ROADMAP_WARMUP_INTERVAL_SECONDS": 0,
+}
+
+_cache_dir = None
+_saved_settings = None
+
+def setup_module(module=None):
+    """Empty roadmap cache in a temporary SQLite file"""
+    global _cache_dir, _saved_settings
+    _cache_dir = tempfile.TemporaryDirectory()
+    _saved_settings = {name: getattr(settings, name) for name in [*OVERRIDES, "CACHE_STORE_PATH", "CACHE_STORE_TOUCH_SECONDS"]}
+    for name, value in OVERRIDES.items():
+        setattr(settings, name, value)
+    settings.CACHE_STORE_PATH = os.path.join(_cache_dir.name, "cache.db")
+    roadmap_cache.store.configure()
+    roadmap_cache.demand.clear()
+
+def teardown_module(module=None):
+    for name, value in _saved_settings.items():
+        setattr(settings, name, value)
+    roadmap_cache.store._backend = None
+    roadmap_cache.store.memory.clear()
+    roadmap_cache.demand.clear()
+    _cache_dir.cleanup()
+
+def off_peak():
+    return datetime(2026, 1, 1, 3, 0)
+
+class FakeBuilder:
+    def __init__(self, fallback_topics=()):
+        self.calls = []
+        self.fallback_topics = fallback_topics
+    
+    async def __call__(self, topic, difficulty_level):
+        self.calls.append(f"{difficulty_level}:{topic}")
+        if topic in self.fallback_topics:
+            return None
+        return {"topic": topic, "roadmap_markdown": f"# {topic}", "resources": [], "estimated_duration": "4 weeks"}
+
+def test_off_peak_window():
+    assert in_off_peak_window(datetime(2026, 1, 1, 1, 0))
+    assert not in_off_peak_window(datetime(2026, 1, 1, 6, 0))
+    
+    settings.ROADMAP_WARMUP_START_HOUR, settings.ROADMAP_WARMUP_END_HOUR = 22, 4
+    try:
+        assert in_off_peak_window(datetime(2026, 1, 1, 23, 0))
+        assert in_off_peak_window(datetime(2026, 1, 1, 2, 0))
+        assert not in_off_peak_window(datetime(2026, 1, 1, 12, 0))
+    finally:
+        settings.ROADMAP_WARMUP_START_HOUR, settings.ROADMAP_WARMUP_END_HOUR = 1, 6
+
+def test_warms_configured_and_requested_topics():
+    async def run():
+        # A peak-time miss makes "rust" a requested topic
+        assert await roadmap_cache.get("Rust", "beginner") is None
+        assert await roadmap_warmup.topics() == ["python", "react", "rust"]
+        
+        builder = FakeBuilder(fallback_topics={"react"})
+        generated = await roadmap_warmup.run_pass(builder, now=off_peak)
+        
+        assert len(builder.calls) == 6
+        assert generated == 4  # Fallback roadmaps are not cached
+        assert await roadmap_cache.get("RUST", "advanced") is not None
+        assert await roadmap_cache.get("react", "beginner") is None
+        
+        # Fresh entries are skipped on the next pass
+        builder = FakeBuilder()
+        await roadmap_warmup.run_pass(builder, now=off_peak)
+        assert builder.calls == ["beginner:react", "advanced:react"]
+    
+    asyncio.run(run())
+
+def test_memory_hits_count_as_recent_use():
+    async def run():
+        store = roadmap_cache.store
+        for key in ("beginner:hot", "beginner:cold"):
+            await store.set(key, {"topic": key})
+        
+        # "hot" is only ever served from memory; its stored last_used must still move
+        settings.CACHE_STORE_TOUCH_SECONDS = 0
+        try:
+            await asyncio.sleep(0.01)
+            assert await store.get("beginner:hot") is not None
+        finally:
+            settings.CACHE_STORE_TOUCH_SECONDS = _saved_settings["CACHE_STORE_TOUCH_SECONDS"]
+        assert (await store.recent_keys(2))[0] == "beginner:hot"
+        
+        # Within the throttle window a memory hit doesn't write
+        await store.set("beginner:cold", {"topic": "cold"})
+        assert await store.get("beginner:hot") is not None
+        assert (await store.recent_keys(2))[0] == "beginner:cold"
+    
+    asyncio.run(run())
+
+def test_stops_outside_window():
+    builder = FakeBuilder()
+    generated = asyncio.run(roadmap_warmup.run_pass(builder, now=lambda: datetime(2026, 1, 1, 12, 0)))
+    assert generated == 0 and builder.calls == []
+
+if __name__ == "__main__":
+    setup_module()
+    try:
+        test_off_peak_window()
+        test_warms_configured_and_requested_topics()
+        test_memory_hits_count_as_recent_use()
+        test_stops_outside_window()
+    finally:
+        teardown_module()
+    print("✅ All roadmap warm-up tests passed")
@@ -0,0 +1,113 @@
+"""
+Test script to verify the scraper site registry in fixture-replay mode.
+Serves recorded search pages from disk, so it runs offline.
+"""
+import sys
+import os
+import asyncio
+import json
+import tempfile
+import time
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.config import settings
+from app.services.scraper_service import scraper_service
+from app.services.scraper_sites import fixture_path, site_registry
+
+def youtube_page(count):
+    items = [
+        {"videoRenderer": {
+            "videoId": f"vid{i}",
+            "title": {"runs": [{"text": f"Video {i} with }}; inside"}]},
+            "ownerText": {"runs": [{"text": "Channel"}]},
+            "lengthText": {"simpleText": "10:00"},
+            "viewCountText": {"simpleText": "1K views"}
+        }}
+        for i in range(count)
+    ]
+    data = {"contents": {"twoColumnSearchResultsRenderer": {"primaryContents": {
+        "sectionListRenderer": {"contents": [{"itemSectionRenderer": {"contents": items}}]}
+    }}}}
+    return f"<html><script>var ytInitialData = {json.dumps(data)};</script></html>"
+
+FIXTURES = {
+    "youtube": youtube_page(10),
+    "coursera": "".join(
+        f"<a class='cds-1-link' href='/learn/course-{i}'><h3>Course {i}</h3></a>" for i in range(5)
+    ),
+    "udemy": "".join(
+        f"<a data-purpose='course-card-title' href='/course/u{i}/'>Udemy {i}</a>" for i in range(5)
+    ),
+    "freecodecamp": "".join(
+        f"<article class='post-card'><a class='post-card-image-link' href='https://www.freecodecamp.org/news/a{i}/'></a>"
+        f"<h2 class='post-card-title'>Article {i}</h2></article>" for i in range(5)
+    ),
+    "github": "".join(
+        f"<div class='repo-list-item'><a class='v-align-middle' href='/org/repo{i}'>org/repo{i}</a></div>" for i in range(5)
+    ),
+}
+
+def write_fixtures(directory):
+    for site, html in FIXTURES.items():
+        path = fixture_path(site, "default", directory)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(html)
+
+_fixture_dir = None
+_saved_settings = None
+
+def setup_module(module=None):
+    """Replay recorded pages from a temporary directory"""
+    global _fixture_dir, _saved_settings
+    _fixture_dir = tempfile.TemporaryDirectory()
+    _saved_settings = (settings.SCRAPER_FIXTURE_MODE, settings.SCRAPER_FIXTURE_DIR)
+    settings.SCRAPER_FIXTURE_MODE = "replay"
+    settings.SCRAPER_FIXTURE_DIR = _fixture_dir.name
+    write_fixtures(_fixture_dir.name)
+
+def teardown_module(module=None):
+    settings.SCRAPER_FIXTURE_MODE, settings.SCRAPER_FIXTURE_DIR = _saved_settings
+    _fixture_dir.cleanup()
+
+def test_replay_collects_every_site():
+    """Each enabled site contributes its quota; higher-weight sites rank first"""
+    resources = asyncio.run(scraper_service.collect_resources("Python", limit=9))
+    
+    sources = [resource["source"] for resource in resources]
+    assert sources[:2] == ["freeCodeCamp", "freeCodeCamp"]
+    assert sources.count("Channel") == 3  # YouTube gets a third of the limit
+    assert len(resources) == 9
+    assert any("};" in resource["title"] for resource in resources)
+
+def test_disabled_site_is_skipped():
+    site_registry.configure("udemy", enabled=False)
+    try:
+        resources = asyncio.run(scraper_service.collect_resources_for_topics(["Python", "Rust"], limit_per_topic=8))
+    finally:
+        site_registry.configure("udemy", enabled=True)
+    
+    assert resources
+    assert all(resource["source"] != "Udemy" for resource in resources)
+
+def test_replay_throughput():
+    """Many topics replay quickly (no network, parsing in threads)"""
+    topics = [f"Topic {i}" for i in range(40)]
+    start = time.perf_counter()
+    resources = asyncio.run(scraper_service.collect_resources_for_topics(topics, limit_per_topic=8))
+    elapsed = time.perf_counter() - start
+    
+    assert resources
+    assert elapsed < 5.0, f"took {elapsed:.2f}s"
+
+if __name__ == "__main__":
+    setup_module()
+    try:
+        test_replay_collects_every_site()
+        test_disabled_site_is_skipped()
+        test_replay_throughput()
+    finally:
+        teardown_module()
+    print("✅ All scraper replay tests passed")
@@ -0,0 +1,86 @@
+"""
+Test script to verify source reference counting: only explicit owners
+(POST /sources) are counted, internal reuse doesn't pin a source, aliases
+don't overwrite the count and a source is deleted with its last owner.
+Uses a temporary SQLite store, so no MongoDB is needed.
+"""
+import sys
+import os
+import asyncio
+import tempfile
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.config import settings
+from app.services.source_manager import source_manager
+from app.services.source_store import source_store
+
+_store_dir = None
+_saved_path = None
+
+def setup_module(module=None):
+    """Empty source store in a temporary SQLite file"""
+    global _store_dir, _saved_path
+    _store_dir = tempfile.TemporaryDirectory()
+    _saved_path = settings.SOURCE_STORE_PATH
+    settings.SOURCE_STORE_PATH = os.path.join(_store_dir.name, "sources.db")
+    source_store.configure()
+
+def teardown_module(module=None):
+    settings.SOURCE_STORE_PATH = _saved_path
+    source_store._backend = None
+    source_store.cache.clear()
+    _store_dir.cleanup()
+
+async def stored_refs(source_id):
+    source_store.cache.clear()
+    source = await source_store.get(source_id)
+    return None if source is None else source.ref_count
+
+def test_internal_reuse_is_not_counted():
+    async def run():
+        source = await source_manager.add_text_source("internal quiz text " * 20)
+        await source_manager.add_text_source("internal quiz text " * 20, title="Quiz")
+        assert await stored_refs(source.id) == 0
+        
+        # An owner's DELETE isn't held up by earlier quiz requests
+        await source_manager.add_text_source("internal quiz text " * 20, owner=True)
+        assert await source_manager.remove_source(source.id) == 0
+        assert await stored_refs(source.id) is None
+    
+    asyncio.run(run())
+
+def test_owners_and_aliases():
+    async def run():
+        text = "shared notes " * 20
+        source = await source_manager.add_text_source(text, title="Notes", owner=True)
+        await source_manager.add_text_source(text, title="Copy of notes", owner=True)
+        await source_manager.add_text_source(text, title="Quiz input")
+        
+        # Alias updates only touch the metadata, never the reference count
+        source_store.cache.clear()
+        stored = await source_store.get(source.id)
+        assert stored.ref_count == 2
+        assert stored.metadata["aliases"] == ["Copy of notes", "Quiz input"]
+        
+        # Saving a stale copy keeps the stored count
+        source.ref_count = 0
+        await source_store.save(source)
+        assert await stored_refs(source.id) == 2
+        
+        assert await source_manager.remove_source(source.id) == 1
+        assert await stored_refs(source.id) == 1
+        assert await source_manager.remove_source(source.id) == 0
+        assert await source_manager.remove_source(source.id) is None
+    
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    setup_module()
+    try:
+        test_internal_reuse_is_not_counted()
+        test_owners_and_aliases()
+    finally:
+        teardown_module()
+    print("✅ All source reference tests passed")
@@ -0,0 +1,84 @@
+"""
+Test script to verify vendored page scripts: pre-compressed variants,
+immutable caching and the URLs written into the visual roadmap page.
+Uses a fake download, so it runs offline.
+"""
+import sys
+import os
+import gzip
+import tempfile
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.routers import assets
+from app.services.llm_service import LLMService
+from app.services.static_assets import VENDOR_ASSETS, static_assets
+
+SCRIPT = b"/* vendored */ window.fake = function () { return 42; };\n" * 200
+
+_vendor_dir = None
+_saved_dir = None
+
+def setup_module(module=None):
+    """Vendor fake assets into a temporary directory"""
+    global _vendor_dir, _saved_dir
+    _vendor_dir = tempfile.TemporaryDirectory()
+    _saved_dir = settings.STATIC_VENDOR_DIR
+    settings.STATIC_VENDOR_DIR = _vendor_dir.name
+    static_assets.vendor(fetch=lambda url: SCRIPT)
+
+def teardown_module(module=None):
+    settings.STATIC_VENDOR_DIR = _saved_dir
+    static_assets.refresh()
+    _vendor_dir.cleanup()
+
+def client():
+    app = FastAPI()
+    app.include_router(assets.router, prefix="/static")
+    return TestClient(app)
+
+def test_serves_gzip_variant_with_immutable_caching():
+    path = "/static/vendor/" + VENDOR_ASSETS["d3_src"].path
+    response = client().get(path, headers={"Accept-Encoding": "gzip"})
+    
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "immutable" in response.headers["cache-control"]
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(SCRIPT)
+    assert response.content == SCRIPT  # Decoded by the client
+
+def test_identity_and_unknown_paths():
+    path = "/static/vendor/" + VENDOR_ASSETS["markmap_view_src"].path
+    response = client().get(path, headers={"Accept-Encoding": "gzip;q=0, identity"})
+    assert "content-encoding" not in response.headers
+    assert response.content == SCRIPT
+    
+    assert client().get("/static/vendor/../../main.py").status_code == 404
+    assert client().get("/static/vendor/d3@0.0.1/d3.min.js").status_code == 404
+
+def test_page_references_vendored_scripts():
+    srcs = static_assets.script_srcs("http://testserver/")
+    html = LLMService().convert_to_markmap("# Python\n## Basics", script_srcs=srcs)
+    
+    assert 'src="http://testserver/static/vendor/d3@7.8.5/d3.min.js"' in html
+    assert "markmap-view@0.15.3" in html
+    assert "cdn.jsdelivr.net" not in html
+    
+    # Without a base URL (or before vendoring) the CDN is used
+    assert static_assets.script_srcs()["d3_src"].startswith("https://cdnjs.cloudflare.com/")
+
+if __name__ == "__main__":
+    setup_module()
+    try:
+        test_serves_gzip_variant_with_immutable_caching()
+        test_identity_and_unknown_paths()
+        test_page_references_vendored_scripts()
+    finally:
+        teardown_module()
+    print("✅ All static asset tests passed")
@@ -75,29 +75,19 @@ export default function Roadmap() {
 
     try {
       setIsGeneratingVisual(true)
-      const response = await axios.post(`${import.meta.env.VITE_API_URL || 'https://acemind.onrender.com'}/roadmap/generate-visual-roadmap`, {
+      // The page itself is a cacheable GET: repeat views are revalidated by the browser
+      const response = await axios.post(`${import.meta.env.VITE_API_URL || 'https://acemind.onrender.com'}/roadmap/visual-roadmap`, {
         topic: topic,
         difficulty_level: difficultyLevel,
         roadmap_markdown: roadmapData.roadmap_markdown || ''
-      }, {
-        responseType: 'text'  // Important: Tell axios to expect HTML text, not JSON
       })
       
-      if (response.status === 200 && response.data) {
-        const htmlContent = response.data
-        // Create Blob with HTML content
-        const blob = new Blob([htmlContent], { type: 'text/html' })
-        
-        // Create temporary URL using URL.createObjectURL
-        const url = URL.createObjectURL(blob)
-
-        // Open URL in new window with dimensions 1200x800
-        const newWindow = window.open(url, 'Visual Roadmap', 'width=1200,height=800')
+      if (response.status === 200 && response.data?.url) {
+        // Open the roadmap page in new window with dimensions 1200x800
+        const newWindow = window.open(response.data.url, 'Visual Roadmap', 'width=1200,height=800')
 
         if (newWindow) {
           newWindow.focus()
-          // Revoke URL after 2 seconds for memory cleanup
-          setTimeout(() => URL.revokeObjectURL(url), 2000)
         } else {
           setError('Please allow popups for this site to view the visual roadmap')
         }